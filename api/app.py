@@ -2,9 +2,17 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
+import sys
 import json
 from dotenv import load_dotenv
 
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.llm_client import LLMClient, LLMError
+
 # --- CONFIG ---
 load_dotenv()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
@@ -12,6 +20,11 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 app = Flask(__name__)
 CORS(app, origins=["*"])
 
+# serverless invocations on a warm instance reuse the pooled connection;
+# one quick retry at most so the function stays well inside its time limit
+llm_client = LLMClient(OPENROUTER_API_KEY, "tngtech/deepseek-r1t2-chimera:free",
+                       connect_timeout=2, read_timeout=5, budget_seconds=6, retries=1)
+
 # Simplified mock data for Vercel deployment
 MOCK_DATA = {
     "matches": [
@@ -118,33 +131,16 @@ def llm_fallback(text):
         return "I understand your question, but I'm optimized for specific sports queries. Try asking about match details like scores, stadiums, or tournaments!"
     
     # For complex questions, use LLM (but with timeout)
-    import requests
-    
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": "tngtech/deepseek-r1t2-chimera:free",
-        "messages": [
-            {"role": "system", "content": "You are a helpful sports chatbot. Provide brief responses in 1-2 sentences. If you don't know something, suggest asking about specific match details."},
-            {"role": "user", "content": text}
-        ],
-        "max_tokens": 100,
-        "temperature": 0.7
-    }
+    messages = [
+        {"role": "system", "content": "You are a helpful sports chatbot. Provide brief responses in 1-2 sentences. If you don't know something, suggest asking about specific match details."},
+        {"role": "user", "content": text}
+    ]
     
     try:
         print("🤖 Making LLM API call...")
-        response = requests.post("https://openrouter.ai/api/v1/chat/completions", 
-                               headers=headers, json=data, timeout=5)  # Reduced timeout
-        if response.status_code == 200:
-            result = response.json()
-            if 'choices' in result and len(result['choices']) > 0:
-                reply = result['choices'][0]['message']['content'].strip()
-                return reply if reply else "I understand your question. Try asking about specific match details!"
-    except Exception as e:
+        reply = llm_client.chat(messages, max_tokens=100, temperature=0.7)
+        return reply if reply else "I understand your question. Try asking about specific match details!"
+    except LLMError as e:
         print(f"LLM API timeout/error: {e}")
     
     return "I understand your question. Try asking about specific match details like scores, stadiums, or tournaments!"
@@ -155,6 +151,7 @@ def health():
         "status": "healthy",
         "version": "vercel_v1.0",
         "llm_configured": bool(OPENROUTER_API_KEY),
+        "llm_client": llm_client.stats(),
         "matches_count": len(MOCK_DATA["matches"])
     })
 
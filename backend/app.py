@@ -1,20 +1,51 @@
 # Enhanced Backend with New Intents and Optimizations
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import sqlite3, re, joblib, os, requests
-from contextlib import closing
+import sqlite3, re, joblib, os, sys, time, queue
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from random import choice
 from dotenv import load_dotenv
-from functools import lru_cache
 import json
 from datetime import datetime
 
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend import queries
+from backend.data_version import DataVersion
+from backend.db_pool import ConnectionPool
+from backend.gazetteer import LiveGazetteer, normalize
+from backend.inference_batcher import MicroBatcher
+from backend.intent_rules import IntentCascade, IntentRules
+from backend.intent_scorer import CompiledIntentModel, artifact_version
+from backend.llm_client import LLMClient, LLMError
+from backend.leaderboard import LiveLeaderboard
+from backend.match_facts import MatchFactsService
+from backend.snapshot import SnapshotServer
+from backend.migrations import apply_migrations
+from backend import precompute
+from backend.performance_optimization import (BoundedExecutor, QueueFullError, SingleFlight, create_cache,
+                                              response_cache)
+from backend.semantic_cache import SemanticCache
+
 # --- CONFIG ---
-DB_PATH = "db.sqlite3"
+DB_PATH = os.environ.get("DB_PATH", "db.sqlite3")
 MODEL_PATH = "../nlp/artifacts/intent_model_enhanced.pkl"
 CONF_THRESHOLD = 0.6  # Updated based on enhanced model analysis
+LEADERBOARD_SIZE = 10  # largest "top N" answered from the leaderboard
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+SERVING_MODE = os.environ.get("SERVING_MODE", "file")  # "snapshot" serves reads from memory
 OPENROUTER_MODEL = os.environ.get("OPENROUTER_MODEL", "tngtech/deepseek-r1t2-chimera:free")
+# "first" tries the keyword rules before the model, "fallback" only when it
+# is missing or fails, "off" never
+INTENT_RULES_MODE = os.environ.get("INTENT_RULES_MODE", "first")
+# time a request may take end to end; the LLM fallback is skipped when too little is left
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", 12))
+# LLM calls slower than this count against the circuit breaker; free models
+# often take several seconds, so keep it close to the 10s read timeout
+LLM_SLOW_SECONDS = float(os.environ.get("LLM_SLOW_SECONDS", 8))
 
 # load secrets
 load_dotenv()
@@ -24,199 +55,211 @@ app = Flask(__name__)
 CORS(app)
 
 # --- ENHANCED INTENT MODEL ---
+# the compiled export scores with NumPy alone, so scikit-learn is never imported;
+# its .compiled directory is memory-mapped, one page-cache copy for all workers
+COMPILED_MODEL_PATH = os.environ.get("COMPILED_MODEL_PATH") or next(
+    (path for path in (os.path.splitext(MODEL_PATH)[0] + ext for ext in (".compiled", ".npz"))
+     if os.path.exists(path)), None)
 try:
-    intent_model = joblib.load(MODEL_PATH)
-    print("✅ Enhanced intent model loaded successfully")
+    if COMPILED_MODEL_PATH:
+        intent_model_path = COMPILED_MODEL_PATH
+        intent_model = CompiledIntentModel(COMPILED_MODEL_PATH)
+        print(f"✅ Compiled intent model loaded successfully ({intent_model.dtype})")
+    else:
+        # arrays of an uncompressed pickle are mapped rather than copied
+        intent_model_path = MODEL_PATH
+        intent_model = joblib.load(MODEL_PATH, mmap_mode="r")
+        print("✅ Enhanced intent model loaded successfully")
 except Exception as e:
     print(f"⚠️ Could not load enhanced model, falling back to original: {e}")
     try:
-        intent_model = joblib.load("../nlp/artifacts/intent_model.pkl")
+        intent_model_path = "../nlp/artifacts/intent_model.pkl"
+        intent_model = joblib.load(intent_model_path)
         print("✅ Fallback model loaded")
     except:
         print("❌ No model found!")
         intent_model = None
 
-@lru_cache(maxsize=128)
+# cached predictions are keyed on the artifact's content, so a retrained
+# model never sees the previous one's answers
+INTENT_MODEL_VERSION = artifact_version(intent_model_path) if intent_model is not None else None
+
+# Bring indexes up to date before serving; read-only deployments ship migrated
+try:
+    apply_migrations(DB_PATH)
+except Exception as e:
+    print(f"⚠️ Could not apply migrations: {e}")
+
+# One persistent read-only connection per worker thread
+db_pool = ConnectionPool(DB_PATH)
+
 def get_conn():
-    """Cached database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """This thread's pooled database connection"""
+    return db_pool.connection()
+
+# In snapshot mode reads go to an in-memory copy that a watcher thread
+# replaces whenever db.sqlite3 changes
+snapshot = None
+if SERVING_MODE == "snapshot":
+    try:
+        snapshot = SnapshotServer(DB_PATH, db_pool).start()
+    except Exception as e:
+        print(f"⚠️ Could not load serving snapshot, reading from {DB_PATH}: {e}")
+
+# one change detector shared by every cache built over the database; with a
+# snapshot, caches follow snapshot swaps rather than the file itself
+data_version = snapshot or DataVersion(DB_PATH)
+# components that keep their own connection read the snapshot too
+connect_db = snapshot.connect if snapshot else None
+
+def predict_intents(texts):
+    """(intent, confidence, probabilities) for each text from one vectorized predict_proba"""
+    probas = intent_model.predict_proba(texts)
+    best = probas.argmax(axis=1)
+    return [(str(intent_model.classes_[i]), float(row[i]), row.tolist()) for i, row in zip(best, probas)]
+
+# concurrent requests are classified together: the pipeline's per-call
+# overhead is paid once per batch instead of once per message
+intent_batcher = MicroBatcher(predict_intents, max_batch=int(os.environ.get("INTENT_BATCH_SIZE", 64)),
+                              window_seconds=float(os.environ.get("INTENT_BATCH_WINDOW_MS", 2)) / 1000,
+                              name="intent-batcher")
+
+# most traffic repeats a few thousand phrasings; predictions are made on the
+# normalized text (case-folded, punctuation and extra whitespace dropped), so
+# every phrasing that normalizes alike shares one entry
+intent_cache = create_cache(max_size=int(os.environ.get("INTENT_CACHE_SIZE", 5000)), ttl_seconds=24 * 3600,
+                            backend="memory")
+
+def model_intent(text):
+    """(intent, confidence) from the model, through the prediction cache"""
+    prediction = intent_cache.get(text, version=INTENT_MODEL_VERSION)
+    if prediction is None:
+        prediction = intent_batcher.submit(normalize(text))
+        intent_cache.set(text, prediction, version=INTENT_MODEL_VERSION)
+    intent, confidence, _ = prediction
+    return intent, confidence
+
+# unambiguous phrasings are answered by the rules without touching the model,
+# and the rules keep questions routed when there is no model at all
+def rule_teams(text):
+    """Teams the gazetteer finds in text, for the rules' team anchors"""
+    try:
+        return gazetteer.get().team_names(text)
+    except Exception as e:
+        print(f"⚠️ Team lookup for the intent rules failed: {e}")
+        return []
+
+intent_cascade = IntentCascade(IntentRules(teams=rule_teams), model_intent if intent_model is not None else None,
+                               mode=INTENT_RULES_MODE)
 
 def intent_with_conf(text):
-    """Get intent prediction with confidence score"""
-    if not intent_model:
-        return None, 0.0
-    
+    """Get intent prediction with confidence score and the cascade stage that answered"""
     try:
-        proba = intent_model.predict_proba([text])[0]
-        intent = intent_model.classes_[proba.argmax()]
-        confidence = proba.max()
-        print(f"🧠 Intent: {intent}, Confidence: {confidence:.3f}")
-        return intent, confidence
+        intent, confidence, stage = intent_cascade.classify(text)
+        print(f"🧠 Intent: {intent}, Confidence: {confidence:.3f} ({stage})")
+        return intent, confidence, stage
     except Exception as e:
         print(f"Intent prediction error: {e}")
-        return None, 0.0
+        return None, 0.0, "none"
+
+# --- ENTITY GAZETTEER ---
+# Built once at startup and rebuilt only when the entity tables change
+gazetteer = LiveGazetteer(DB_PATH, version=data_version, connect=connect_db)
+try:
+    gazetteer.get()
+except Exception as e:
+    print(f"⚠️ Could not build gazetteer: {e}")
 
-@lru_cache(maxsize=64)
 def extract_teams_from_text(text):
-    """Enhanced team extraction with caching"""
-    teams = []
-    with closing(get_conn()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM teams")
-        all_teams = [row[0] for row in cursor.fetchall()]
-    
-    text_lower = text.lower()
-    for team in all_teams:
-        if team.lower() in text_lower:
-            teams.append(team)
-    
+    """Team extraction in one pass over the message"""
+    teams = gazetteer.get().team_names(text)
     print(f"🏆 Extracted teams: {teams}")
     return teams
 
 def extract_player_from_text(text):
     """Extract player name from text"""
-    with closing(get_conn()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM players")
-        all_players = [row[0] for row in cursor.fetchall()]
-    
-    text_lower = text.lower()
-    for player in all_players:
-        if player.lower() in text_lower:
-            print(f"👤 Extracted player: {player}")
-            return player
+    players = gazetteer.get().player_names(text)
+    if players:
+        print(f"👤 Extracted player: {players[0]}")
+        return players[0]
     return None
 
+def team_pair_key(team1, team2):
+    """Canonical unordered (min id, max id) key for two team names"""
+    g = gazetteer.get()
+    id1, id2 = g.entity_id("team", team1), g.entity_id("team", team2)
+    if id1 is None or id2 is None:
+        return None
+    return (min(id1, id2), max(id1, id2))
+
 # --- ENHANCED INTENT HANDLERS ---
 
+# The five match intents below share one cached record per team pair, so
+# follow-up questions about the same fixture cost no extra query.
+match_facts = MatchFactsService(get_conn, data_version)
+
+def latest_match(teams):
+    """Cached facts for the latest match between the first two teams"""
+    pair = team_pair_key(teams[0], teams[1])
+    if pair is None:
+        return None
+    return match_facts.latest(pair)
+
 def handle_score_intent(teams):
     """Handle score queries"""
     if len(teams) < 2:
         return "Please specify two teams to get the match score."
     
-    team1, team2 = teams[0], teams[1]
-    
-    with closing(get_conn()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT t1.name as home_team, t2.name as away_team, 
-                   m.home_score, m.away_score, m.match_date, tourn.name as tournament
-            FROM matches m
-            JOIN teams t1 ON m.home_team_id = t1.id
-            JOIN teams t2 ON m.away_team_id = t2.id  
-            JOIN tournaments tourn ON m.tournament_id = tourn.id
-            WHERE (t1.name = ? AND t2.name = ?) OR (t1.name = ? AND t2.name = ?)
-            ORDER BY m.match_date DESC LIMIT 1
-        """, (team1, team2, team2, team1))
-        
-        match = cursor.fetchone()
-        if match:
-            return f"{match['home_team']} {match['home_score']}-{match['away_score']} {match['away_team']} ({match['tournament']})"
-        else:
-            return f"No recent match found between {team1} and {team2}."
+    match = latest_match(teams)
+    if match:
+        return f"{match['home_team']} {match['home_score']}-{match['away_score']} {match['away_team']} ({match['tournament']})"
+    else:
+        return f"No recent match found between {teams[0]} and {teams[1]}."
 
 def handle_stadium_intent(teams):
     """Handle stadium queries"""
     if len(teams) < 2:
         return "Please specify two teams to get the stadium information."
     
-    team1, team2 = teams[0], teams[1]
-    
-    with closing(get_conn()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT m.stadium, t1.name as home_team, t2.name as away_team
-            FROM matches m
-            JOIN teams t1 ON m.home_team_id = t1.id
-            JOIN teams t2 ON m.away_team_id = t2.id
-            WHERE (t1.name = ? AND t2.name = ?) OR (t1.name = ? AND t2.name = ?)
-            ORDER BY m.match_date DESC LIMIT 1
-        """, (team1, team2, team2, team1))
-        
-        match = cursor.fetchone()
-        if match:
-            return f"The match was played at {match['stadium']}"
-        else:
-            return f"No stadium information found for {team1} vs {team2}."
+    match = latest_match(teams)
+    if match and match['stadium']:
+        return f"The match was played at {match['stadium']}"
+    else:
+        return f"No stadium information found for {teams[0]} vs {teams[1]}."
 
 def handle_scorers_intent(teams):
     """Handle scorers queries"""
     if len(teams) < 2:
         return "Please specify two teams to get the scorers information."
     
-    team1, team2 = teams[0], teams[1]
-    
-    with closing(get_conn()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT p.name, s.minute, t.name as team_name
-            FROM scorers s
-            JOIN players p ON s.player_id = p.id
-            JOIN teams t ON p.team_id = t.id
-            JOIN matches m ON s.match_id = m.id
-            JOIN teams t1 ON m.home_team_id = t1.id
-            JOIN teams t2 ON m.away_team_id = t2.id
-            WHERE (t1.name = ? AND t2.name = ?) OR (t1.name = ? AND t2.name = ?)
-            ORDER BY s.minute
-        """, (team1, team2, team2, team1))
-        
-        scorers = cursor.fetchall()
-        if scorers:
-            scorer_list = [f"{row['name']} ({row['minute']}')" for row in scorers]
-            return f"Scorers: {', '.join(scorer_list)}"
-        else:
-            return f"No scorer information found for {team1} vs {team2}."
+    match = latest_match(teams)
+    if match and match['scorers']:
+        scorer_list = [f"{s['name']} ({s['minute']}')" for s in match['scorers']]
+        return f"Scorers: {', '.join(scorer_list)}"
+    else:
+        return f"No scorer information found for {teams[0]} vs {teams[1]}."
 
 def handle_date_intent(teams):
     """Handle date queries"""
     if len(teams) < 2:
         return "Please specify two teams to get the match date."
     
-    team1, team2 = teams[0], teams[1]
-    
-    with closing(get_conn()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT m.match_date, t1.name as home_team, t2.name as away_team
-            FROM matches m
-            JOIN teams t1 ON m.home_team_id = t1.id
-            JOIN teams t2 ON m.away_team_id = t2.id
-            WHERE (t1.name = ? AND t2.name = ?) OR (t1.name = ? AND t2.name = ?)
-            ORDER BY m.match_date DESC LIMIT 1
-        """, (team1, team2, team2, team1))
-        
-        match = cursor.fetchone()
-        if match:
-            return f"The match was played on {match['match_date']}"
-        else:
-            return f"No match date found for {team1} vs {team2}."
+    match = latest_match(teams)
+    if match and match['match_date']:
+        return f"The match was played on {match['match_date']}"
+    else:
+        return f"No match date found for {teams[0]} vs {teams[1]}."
 
 def handle_tournament_intent(teams):
     """Handle tournament queries"""
     if len(teams) < 2:
         return "Please specify two teams to get the tournament information."
     
-    team1, team2 = teams[0], teams[1]
-    
-    with closing(get_conn()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT tourn.name as tournament, t1.name as home_team, t2.name as away_team
-            FROM matches m
-            JOIN teams t1 ON m.home_team_id = t1.id
-            JOIN teams t2 ON m.away_team_id = t2.id
-            JOIN tournaments tourn ON m.tournament_id = tourn.id
-            WHERE (t1.name = ? AND t2.name = ?) OR (t1.name = ? AND t2.name = ?)
-            ORDER BY m.match_date DESC LIMIT 1
-        """, (team1, team2, team2, team1))
-        
-        match = cursor.fetchone()
-        if match:
-            return f"The match was part of the {match['tournament']}"
-        else:
-            return f"No tournament information found for {team1} vs {team2}."
+    match = latest_match(teams)
+    if match and match['tournament']:
+        return f"The match was part of the {match['tournament']}"
+    else:
+        return f"No tournament information found for {teams[0]} vs {teams[1]}."
 
 # --- NEW INTENT HANDLERS ---
 
@@ -226,14 +269,9 @@ def handle_player_stats_intent(text):
     if not player_name:
         return "Please specify a player name to get their statistics."
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT p.name, p.goals, p.appearances, p.position, t.name as team_name
-            FROM players p
-            JOIN teams t ON p.team_id = t.id
-            WHERE p.name = ?
-        """, (player_name,))
+        cursor.execute(queries.PLAYER_STATS, (gazetteer.get().entity_id("player", player_name),))
         
         player = cursor.fetchone()
         if player:
@@ -248,17 +286,9 @@ def handle_team_ranking_intent(teams):
     
     team_name = teams[0]
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT ts.position, ts.points, ts.matches_played, ts.wins, ts.draws, ts.losses,
-                   t.name as team_name, tourn.name as tournament
-            FROM team_standings ts
-            JOIN teams t ON ts.team_id = t.id
-            JOIN tournaments tourn ON ts.tournament_id = tourn.id
-            WHERE t.name = ?
-            ORDER BY ts.points DESC LIMIT 1
-        """, (team_name,))
+        cursor.execute(queries.TEAM_RANKING, (gazetteer.get().entity_id("team", team_name),))
         
         standing = cursor.fetchone()
         if standing:
@@ -266,32 +296,41 @@ def handle_team_ranking_intent(teams):
         else:
             return f"No ranking information found for {team_name}."
 
-def handle_head_to_head_intent(teams):
+SEASON_PATTERN = re.compile(r"\b(\d{4})[/-](\d{2}|\d{4})\b")
+
+def extract_season_from_text(text):
+    """Season such as '2024/2025' (also written 2024-25) mentioned in the text"""
+    match = SEASON_PATTERN.search(text or "")
+    if not match:
+        return None
+    start, end = match.groups()
+    if len(end) == 2:
+        end = start[:2] + end
+    return f"{start}/{end}"
+
+def handle_head_to_head_intent(teams, text=""):
     """Handle head-to-head record queries"""
     if len(teams) < 2:
         return "Please specify two teams to get their head-to-head record."
     
     team1, team2 = teams[0], teams[1]
+    pair = team_pair_key(team1, team2)
+    if pair is None:
+        return f"No head-to-head record found between {team1} and {team2}."
+    season = extract_season_from_text(text)
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_matches,
-                SUM(CASE WHEN (t1.name = ? AND m.home_score > m.away_score) OR 
-                              (t2.name = ? AND m.away_score > m.home_score) THEN 1 ELSE 0 END) as team1_wins,
-                SUM(CASE WHEN (t2.name = ? AND m.home_score > m.away_score) OR 
-                              (t1.name = ? AND m.away_score > m.home_score) THEN 1 ELSE 0 END) as team2_wins,
-                SUM(CASE WHEN m.home_score = m.away_score THEN 1 ELSE 0 END) as draws
-            FROM matches m
-            JOIN teams t1 ON m.home_team_id = t1.id
-            JOIN teams t2 ON m.away_team_id = t2.id
-            WHERE (t1.name = ? AND t2.name = ?) OR (t1.name = ? AND t2.name = ?)
-        """, (team1, team1, team2, team2, team1, team2, team2, team1))
+        cursor.execute(queries.HEAD_TO_HEAD, pair + (0, season or ""))
         
         record = cursor.fetchone()
-        if record and record['total_matches'] > 0:
-            return f"Head-to-head: {team1} and {team2} have met {record['total_matches']} times. {team1}: {record['team1_wins']} wins, {team2}: {record['team2_wins']} wins, Draws: {record['draws']}"
+        if record and record['matches'] > 0:
+            # the row is stored from the lower team id's point of view
+            team1_is_lo = gazetteer.get().entity_id("team", team1) == pair[0]
+            team1_wins = record['lo_wins'] if team1_is_lo else record['hi_wins']
+            team2_wins = record['hi_wins'] if team1_is_lo else record['lo_wins']
+            scope = f" in {season}" if season else ""
+            return f"Head-to-head: {team1} and {team2} have met {record['matches']} times{scope}. {team1}: {team1_wins} wins, {team2}: {team2_wins} wins, Draws: {record['draws']}"
         else:
             return f"No head-to-head record found between {team1} and {team2}."
 
@@ -305,70 +344,262 @@ def handle_next_match_intent(teams):
     # For now, return a placeholder since we don't have future matches
     return f"Next match information for {team_name} is not available in the current database. This feature will show upcoming fixtures."
 
-def handle_league_top_scorer_intent():
-    """Handle top scorer queries"""
-    with closing(get_conn()) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT p.name, p.goals, t.name as team_name, p.position
-            FROM players p
-            JOIN teams t ON p.team_id = t.id
-            WHERE p.goals > 0
-            ORDER BY p.goals DESC
-            LIMIT 1
-        """, )
-        
-        top_scorer = cursor.fetchone()
-        if top_scorer:
-            return f"{top_scorer['name']} ({top_scorer['team_name']}) is the current top scorer with {top_scorer['goals']} goals"
-        else:
-            return "No top scorer information available."
+# Goals aggregated from the scorers table, kept as a bounded top-K per scope
+leaderboard = LiveLeaderboard(DB_PATH, data_version, k=LEADERBOARD_SIZE, connect=connect_db)
+
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+                "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+TOP_N_PATTERN = re.compile(r"\btop\s+(\d+|" + "|".join(NUMBER_WORDS) + r")\b", re.IGNORECASE)
 
-@lru_cache(maxsize=32)
-def llm_reply(user_text):
-    """Enhanced LLM fallback with caching"""
+def extract_top_n_from_text(text):
+    """How many scorers were asked for ("top 5", "top three"), default 1"""
+    match = TOP_N_PATTERN.search(text or "")
+    if not match:
+        return 1
+    value = match.group(1).lower()
+    return max(1, int(NUMBER_WORDS.get(value, value)))
+
+def handle_league_top_scorer_intent(text=""):
+    """Handle top scorer queries, optionally scoped to a tournament and season"""
+    tournaments = gazetteer.get().tournament_names(text)
+    tournament = tournaments[0] if tournaments else None
+    season = extract_season_from_text(text)
+    n = min(extract_top_n_from_text(text), LEADERBOARD_SIZE)
+
+    top = leaderboard.get().top(n, tournament, season)
+    scope = " ".join(part for part in (tournament, season) if part)
+    scope = f" in {scope}" if scope else ""
+    if not top:
+        return f"No top scorer information available{scope}."
+    if n == 1:
+        best = top[0]
+        return f"{best['name']} ({best['team']}) is the current top scorer{scope} with {best['goals']} goals"
+    ranking = ", ".join(f"{i}. {p['name']} ({p['team']}) - {p['goals']}" for i, p in enumerate(top, 1))
+    return f"Top {len(top)} scorers{scope}: {ranking}"
+
+LLM_FALLBACK_REPLY = "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
+LLM_SYSTEM_PROMPT = "You are a helpful sports chatbot. Provide brief, accurate responses about sports. If you don't know something, say so briefly."
+
+# LLM replies persist on disk so restarts and other workers skip the API call;
+# keyed on the normalized prompt, the model (intent slot) and the system prompt
+llm_cache = create_cache(max_size=20000, ttl_seconds=7 * 24 * 3600, backend="sqlite",
+                         path=os.environ.get("LLM_CACHE_PATH"), table="llm_cache")
+
+llm_flights = SingleFlight()
+
+# one keep-alive session for every fallback; retries stay within the budget and
+# the circuit breaker answers with the canned reply while OpenRouter struggles
+llm_client = LLMClient(OPENROUTER_API_KEY, OPENROUTER_MODEL, url=OPENROUTER_URL,
+                       read_timeout=10, budget_seconds=12, slow_seconds=LLM_SLOW_SECONDS)
+
+# LLM calls run on their own small pool; once it and its queue are full,
+# fallbacks are turned away at once, so a burst of off-topic questions holds
+# at most LLM_WORKERS + LLM_QUEUE_LIMIT request threads and structured
+# answers keep the rest (keep the sum below the server's thread count)
+llm_executor = BoundedExecutor(workers=int(os.environ.get("LLM_WORKERS", 4)),
+                               max_queue=int(os.environ.get("LLM_QUEUE_LIMIT", 16)), name="llm")
+
+# paraphrased fallback questions reuse the reply of the closest cached one
+semantic_cache = None
+if intent_model is not None:
+    try:
+        semantic_cache = SemanticCache.from_pipeline(
+            intent_model, threshold=float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", 0.85)))
+    except ValueError as e:
+        print(f"⚠️ Semantic cache disabled: {e}")
+
+def llm_messages(user_text):
+    return [
+        {"role": "system", "content": LLM_SYSTEM_PROMPT},
+        {"role": "user", "content": user_text}
+    ]
+
+def cached_llm_reply(user_text):
+    """Stored reply to the question or a paraphrase of it, or None"""
+    cached = llm_cache.get(user_text, OPENROUTER_MODEL, version=LLM_SYSTEM_PROMPT)
+    if cached is not None:
+        return cached
+    similar = semantic_cache.get(user_text) if semantic_cache else None
+    if similar is not None:
+        print(f"🧠 Reusing the reply to a similar question (similarity {similar[1]:.2f})")
+        return similar[0]
+    return None
+
+def remember_llm_reply(user_text, reply):
+    llm_cache.set(user_text, reply, OPENROUTER_MODEL, version=LLM_SYSTEM_PROMPT)
+    if semantic_cache:
+        semantic_cache.set(user_text, reply)
+
+def llm_reply(user_text, deadline=None):
+    """Enhanced LLM fallback with a persistent cache; deadline is a time.monotonic() value"""
     if not OPENROUTER_API_KEY:
-        return "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
-    
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": OPENROUTER_MODEL,
-        "messages": [
-            {"role": "system", "content": "You are a helpful sports chatbot. Provide brief, accurate responses about sports. If you don't know something, say so briefly."},
-            {"role": "user", "content": user_text}
-        ],
-        "max_tokens": 150,
-        "temperature": 0.7
-    }
+        return LLM_FALLBACK_REPLY
+    
+    cached = cached_llm_reply(user_text)
+    if cached is not None:
+        return cached
     
+    # concurrent fallbacks for the same question share one upstream call
+    return llm_flights.do((normalize(user_text), OPENROUTER_MODEL), queued_llm_reply, user_text, deadline)
+
+def queued_llm_reply(user_text, deadline=None):
+    """fetch_llm_reply on the LLM executor; raises QueueFullError when it is full"""
+    future = llm_executor.submit(fetch_llm_reply, user_text, deadline)
     try:
-        response = requests.post(OPENROUTER_URL, headers=headers, json=data, timeout=10)
-        if response.status_code == 200:
-            result = response.json()
-            if 'choices' in result and len(result['choices']) > 0:
-                reply = result['choices'][0]['message']['content'].strip()
-                return reply if reply else "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
-            return "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
-        else:
-            print(f"LLM API error: {response.status_code}")
-            return "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
-    except Exception as e:
+        return future.result(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+    except FutureTimeoutError:
+        print("⏱️ LLM fallback missed the request deadline")
+        return LLM_FALLBACK_REPLY
+
+def fetch_llm_reply(user_text, deadline=None):
+    """Ask OpenRouter and cache the reply"""
+    try:
+        reply = llm_client.chat(llm_messages(user_text), max_tokens=150, temperature=0.7, deadline=deadline)
+    except LLMError as e:
+        print(f"LLM error: {e}")
+        return LLM_FALLBACK_REPLY
+    if not reply:
+        return LLM_FALLBACK_REPLY
+    remember_llm_reply(user_text, reply)
+    return reply
+
+def stream_llm_reply(user_text, deadline=None):
+    """Yield the fallback reply: stored replies whole, fresh ones as OpenRouter streams them"""
+    response = response_cache.get(user_text, "llm")
+    if response is None and OPENROUTER_API_KEY:
+        response = cached_llm_reply(user_text)
+    if response is not None:
+        yield response, True
+        return
+    if not OPENROUTER_API_KEY:
+        yield LLM_FALLBACK_REPLY, False
+        return
+    
+    parts = []
+    try:
+        for text in queued_llm_stream(user_text, deadline):
+            parts.append(text)
+            yield text, False
+    except QueueFullError:
+        print("🚦 LLM queue full, answering with the canned reply")
+        yield LLM_FALLBACK_REPLY, False
+        return
+    except LLMError as e:
         print(f"LLM error: {e}")
-        return "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
+        if not parts:
+            yield LLM_FALLBACK_REPLY, False
+        return
+    reply = "".join(parts).strip()
+    if not reply:
+        yield LLM_FALLBACK_REPLY, False
+        return
+    remember_llm_reply(user_text, reply)
+    response_cache.set(user_text, reply, "llm")
+
+def queued_llm_stream(user_text, deadline=None):
+    """llm_client.stream_chat run on the LLM executor, its text handed over as it arrives"""
+    pieces = queue.Queue()
+    
+    def produce():
+        try:
+            for text in llm_client.stream_chat(llm_messages(user_text), max_tokens=150, temperature=0.7,
+                                               deadline=deadline):
+                pieces.put(text)
+        except LLMError as e:
+            pieces.put(e)
+        finally:
+            pieces.put(None)
+    
+    llm_executor.submit(produce)
+    first = True
+    while True:
+        try:
+            # once it starts, the stream is bounded by the client's read timeout
+            item = pieces.get(timeout=None if deadline is None or not first
+                              else max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            raise LLMError("request deadline passed while queued")
+        first = False
+        if item is None:
+            return
+        if isinstance(item, LLMError):
+            raise item
+        yield item
+
+def resolve_entities(text):
+    """(kind, id) of every known entity in the text, used in response cache keys"""
+    return tuple((m.kind, m.entity_id) for m in gazetteer.get().find(text))
+
+# Answers built offline by backend/precompute.py after each data load; used
+# only while they match the data being served
+precomputed = precompute.PrecomputedAnswers(
+    os.environ.get("PRECOMPUTED_ANSWERS", precompute.default_answers_path(DB_PATH)), get_conn, data_version)
+
+def precomputed_answer(intent, kind, names, season=None):
+    """Answer from the precomputed table, or None to run the handler"""
+    if not names:
+        return None
+    g = gazetteer.get()
+    return precomputed.get(precompute.answer_key(intent, [g.entity_id(kind, n) for n in names], season))
+
+def answer_intent(intent, message):
+    """Structured answer for a classified question"""
+    # "top 5 scorers" is a leaderboard question whichever scorer intent it got
+    if intent == 'scorers' and TOP_N_PATTERN.search(message) and len(extract_teams_from_text(message)) < 2:
+        intent = 'league_top_scorer'
+    
+    if intent in ['score', 'stadium', 'scorers', 'date', 'tournament', 'head_to_head']:
+        teams = extract_teams_from_text(message)
+        season = extract_season_from_text(message) if intent == 'head_to_head' else None
+        response = precomputed_answer(intent, "team", teams[:2] if len(teams) >= 2 else [], season)
+        if response is not None:
+            return response
+        
+        if intent == 'score':
+            return handle_score_intent(teams)
+        elif intent == 'stadium':
+            return handle_stadium_intent(teams)
+        elif intent == 'scorers':
+            return handle_scorers_intent(teams)
+        elif intent == 'date':
+            return handle_date_intent(teams)
+        elif intent == 'tournament':
+            return handle_tournament_intent(teams)
+        else:
+            return handle_head_to_head_intent(teams, message)
+    
+    elif intent in ['team_ranking', 'next_match']:
+        teams = extract_teams_from_text(message)
+        response = precomputed_answer(intent, "team", teams[:1])
+        if response is not None:
+            return response
+        
+        if intent == 'team_ranking':
+            return handle_team_ranking_intent(teams)
+        else:
+            return handle_next_match_intent(teams)
+    
+    elif intent == 'player_stats':
+        player = gazetteer.get().player_names(message)[:1]
+        response = precomputed_answer(intent, "player", player)
+        if response is not None:
+            return response
+        return handle_player_stats_intent(message)
+    
+    elif intent == 'league_top_scorer':
+        return handle_league_top_scorer_intent(message)
+    
+    return f"I recognize this as a {intent} question, but I need more specific information to help you."
 
 # --- ROUTES ---
 
 @app.route('/health')
 def health():
-    model_status = "✅ Enhanced model loaded" if intent_model else "⚠️ No model"
+    model_status = "✅ Enhanced model loaded" if intent_model else "⚠️ No model, keyword rules only"
     db_status = "✅ Connected"
     
     try:
-        with closing(get_conn()) as conn:
+        with get_conn() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM matches")
             match_count = cursor.fetchone()[0]
@@ -386,8 +617,29 @@ def health():
         "version": "enhanced_v2.0"
     })
 
+@app.route('/metrics')
+def metrics():
+    """Runtime metrics for the serving components"""
+    return jsonify({
+        "db_pool": db_pool.stats(),
+        "match_facts": match_facts.stats(),
+        "leaderboard": leaderboard.stats(),
+        "snapshot": snapshot.stats() if snapshot else None,
+        "response_cache": response_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "llm_single_flight": llm_flights.stats(),
+        "llm_client": llm_client.stats(),
+        "llm_executor": llm_executor.stats(),
+        "intent_batcher": intent_batcher.stats(),
+        "intent_cache": dict(intent_cache.stats(), model_version=INTENT_MODEL_VERSION),
+        "intent_cascade": intent_cascade.stats(),
+        "precomputed": precomputed.stats(),
+    })
+
 @app.route('/ask', methods=['POST'])
 def ask():
+    deadline = time.monotonic() + REQUEST_DEADLINE_SECONDS
     data = request.get_json()
     message = data.get('message', '').strip()
     
@@ -395,64 +647,107 @@ def ask():
         return jsonify({"error": "No message provided"}), 400
     
     # Get intent prediction
-    intent, confidence = intent_with_conf(message)
+    intent, confidence, stage = intent_with_conf(message)
     print(f"📝 Question: {message}")
     
     if intent and confidence >= CONF_THRESHOLD:
         print(f"🎯 Using structured response for intent: {intent}")
-        
-        # Handle different intents
-        if intent in ['score', 'stadium', 'scorers', 'date', 'tournament']:
-            teams = extract_teams_from_text(message)
-            
-            if intent == 'score':
-                response = handle_score_intent(teams)
-            elif intent == 'stadium':
-                response = handle_stadium_intent(teams)
-            elif intent == 'scorers':
-                response = handle_scorers_intent(teams)
-            elif intent == 'date':
-                response = handle_date_intent(teams)
-            elif intent == 'tournament':
-                response = handle_tournament_intent(teams)
-        
-        elif intent == 'player_stats':
-            response = handle_player_stats_intent(message)
-        
-        elif intent == 'team_ranking':
-            teams = extract_teams_from_text(message)
-            response = handle_team_ranking_intent(teams)
-        
-        elif intent == 'head_to_head':
-            teams = extract_teams_from_text(message)
-            response = handle_head_to_head_intent(teams)
-        
-        elif intent == 'next_match':
-            teams = extract_teams_from_text(message)
-            response = handle_next_match_intent(teams)
-        
-        elif intent == 'league_top_scorer':
-            response = handle_league_top_scorer_intent()
-        
-        else:
-            response = f"I recognize this as a {intent} question, but I need more specific information to help you."
+        response, cached = structured_answer(intent, message)
         
         return jsonify({
             "response": response,
             "intent": intent,
             "confidence": round(confidence, 3),
-            "method": "structured"
+            "method": "structured",
+            "intent_stage": stage,
+            "cached": cached
         })
     else:
         print(f"🤖 Using LLM fallback (confidence: {confidence:.3f})")
-        response = llm_reply(message)
+        response = response_cache.get(message, "llm")
+        cached = response is not None
+        if not cached:
+            try:
+                response = llm_reply(message, deadline)
+            except QueueFullError:
+                print("🚦 LLM queue full, answering with the canned reply")
+                return jsonify({
+                    "response": LLM_FALLBACK_REPLY,
+                    "intent": intent,
+                    "confidence": round(confidence, 3) if confidence else 0,
+                    "method": "llm",
+                    "intent_stage": stage,
+                    "cached": False,
+                    "error": "LLM fallback is busy"
+                }), 503, {"Retry-After": "1"}
+            if response != LLM_FALLBACK_REPLY:
+                response_cache.set(message, response, "llm")
         return jsonify({
             "response": response,
             "intent": intent,
             "confidence": round(confidence, 3) if confidence else 0,
-            "method": "llm"
+            "method": "llm",
+            "intent_stage": stage,
+            "cached": cached
         })
 
+def structured_answer(intent, message):
+    """(answer, cached) for a confidently classified question"""
+    # answers depend on the resolved entities and the data, not just the wording
+    entities = resolve_entities(message)
+    version = data_version.token()
+    response = response_cache.get(message, intent, entities, version)
+    if response is not None:
+        return response, True
+    response = answer_intent(intent, message)
+    response_cache.set(message, response, intent, entities, version)
+    return response, False
+
+def sse(event, data):
+    """One Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Vercel forwards /api/* with the prefix, which is what the frontend calls
+@app.route('/chat/stream', methods=['POST'])
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """/ask as Server-Sent Events: "token" frames while the LLM writes, then one "done" frame.
+
+    Structured and cached answers arrive whole in the "done" frame.
+    """
+    start = time.perf_counter()
+    deadline = time.monotonic() + REQUEST_DEADLINE_SECONDS
+    data = request.get_json(silent=True) or {}
+    message = data.get('message', '').strip()
+    
+    if not message:
+        return jsonify({"error": "No message provided"}), 400
+    
+    intent, confidence, stage = intent_with_conf(message)
+    print(f"📝 Question (stream): {message}")
+    
+    def frames():
+        done = {"intent": intent, "confidence": round(confidence, 3) if confidence else 0, "intent_stage": stage}
+        if intent and confidence >= CONF_THRESHOLD:
+            response, cached = structured_answer(intent, message)
+            yield sse("done", dict(done, response=response, method="structured", cached=cached))
+            return
+        parts, cached = [], False
+        for text, cached in stream_llm_reply(message, deadline):
+            parts.append(text)
+            if not cached:
+                yield sse("token", {"text": text})
+        yield sse("done", dict(done, response="".join(parts).strip(), method="llm", cached=cached))
+    
+    def timed(frames):
+        for i, frame in enumerate(frames):
+            if i == 0:
+                print(f"⏱️ /chat/stream first byte after {(time.perf_counter() - start) * 1000:.1f}ms")
+            yield frame
+    
+    return Response(stream_with_context(timed(frames())), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """Enhanced chat endpoint with better response formatting"""
@@ -460,7 +755,15 @@ def chat():
 
 @app.route('/llm_test', methods=['GET'])
 def llm_test():
-    test_response = llm_reply("Hello, can you tell me about football?")
+    try:
+        test_response = llm_reply("Hello, can you tell me about football?")
+    except QueueFullError:
+        print("🚦 LLM queue full, answering with the canned reply")
+        return jsonify({
+            "test_response": LLM_FALLBACK_REPLY,
+            "configured": bool(OPENROUTER_API_KEY),
+            "error": "LLM fallback is busy"
+        }), 503, {"Retry-After": "1"}
     return jsonify({"test_response": test_response, "configured": bool(OPENROUTER_API_KEY)})
 
 if __name__ == '__main__':
@@ -1,14 +1,21 @@
 # Enhanced Backend with New Intents and Optimizations
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import sqlite3, re, joblib, os, requests
-from contextlib import closing
+import sqlite3, re, joblib, os, sys
 from random import choice
 from dotenv import load_dotenv
 from functools import lru_cache
 import json
 from datetime import datetime
 
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.db_pool import ConnectionPool
+from backend.llm_client import LLMClient, LLMError
+
 # --- CONFIG ---
 DB_PATH = "db.sqlite3"
 import os
@@ -37,16 +44,12 @@ except Exception as e:
         print("❌ No model found!")
         intent_model = None
 
+# One persistent read-only connection per worker thread
+db_pool = ConnectionPool(DB_PATH)
+
 def get_conn():
-    """Cached database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-def get_conn():
-    """Always return a fresh database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """This thread's pooled database connection"""
+    return db_pool.connection()
 
 def intent_with_conf(text):
     """Get intent prediction with confidence score"""
@@ -67,7 +70,7 @@ def intent_with_conf(text):
 def extract_teams_from_text(text):
     """Enhanced team extraction with caching"""
     teams = []
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM teams")
         all_teams = [row[0] for row in cursor.fetchall()]
@@ -82,7 +85,7 @@ def extract_teams_from_text(text):
 
 def extract_player_from_text(text):
     """Extract player name from text"""
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM players")
         all_players = [row[0] for row in cursor.fetchall()]
@@ -103,7 +106,7 @@ def handle_score_intent(teams):
     
     team1, team2 = teams[0], teams[1]
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT t1.name as home_team, t2.name as away_team, 
@@ -129,7 +132,7 @@ def handle_stadium_intent(teams):
     
     team1, team2 = teams[0], teams[1]
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT m.stadium, t1.name as home_team, t2.name as away_team
@@ -153,7 +156,7 @@ def handle_scorers_intent(teams):
     
     team1, team2 = teams[0], teams[1]
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT p.name, s.minute, t.name as team_name
@@ -181,7 +184,7 @@ def handle_date_intent(teams):
     
     team1, team2 = teams[0], teams[1]
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT m.match_date, t1.name as home_team, t2.name as away_team
@@ -205,7 +208,7 @@ def handle_tournament_intent(teams):
     
     team1, team2 = teams[0], teams[1]
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT tourn.name as tournament, t1.name as home_team, t2.name as away_team
@@ -231,7 +234,7 @@ def handle_player_stats_intent(text):
     if not player_name:
         return "Please specify a player name to get their statistics."
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT p.name, p.goals, p.appearances, p.position, t.name as team_name
@@ -253,7 +256,7 @@ def handle_team_ranking_intent(teams):
     
     team_name = teams[0]
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT ts.position, ts.points, ts.matches_played, ts.wins, ts.draws, ts.losses,
@@ -278,7 +281,7 @@ def handle_head_to_head_intent(teams):
     
     team1, team2 = teams[0], teams[1]
     
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT 
@@ -312,7 +315,7 @@ def handle_next_match_intent(teams):
 
 def handle_league_top_scorer_intent():
     """Handle top scorer queries"""
-    with closing(get_conn()) as conn:
+    with get_conn() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT p.name, p.goals, t.name as team_name, p.position
@@ -329,41 +332,28 @@ def handle_league_top_scorer_intent():
         else:
             return "No top scorer information available."
 
+LLM_FALLBACK_REPLY = "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
+
+# one keep-alive session for every fallback; retries stay within the budget
+llm_client = LLMClient(OPENROUTER_API_KEY, OPENROUTER_MODEL, url=OPENROUTER_URL,
+                       read_timeout=10, budget_seconds=12)
+
 @lru_cache(maxsize=32)
 def llm_reply(user_text):
     """Enhanced LLM fallback with caching"""
     if not OPENROUTER_API_KEY:
-        return "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
-    
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": OPENROUTER_MODEL,
-        "messages": [
-            {"role": "system", "content": "You are a helpful sports chatbot. Provide brief, accurate responses about sports. If you don't know something, say so briefly."},
-            {"role": "user", "content": user_text}
-        ],
-        "max_tokens": 150,
-        "temperature": 0.7
-    }
+        return LLM_FALLBACK_REPLY
     
+    messages = [
+        {"role": "system", "content": "You are a helpful sports chatbot. Provide brief, accurate responses about sports. If you don't know something, say so briefly."},
+        {"role": "user", "content": user_text}
+    ]
     try:
-        response = requests.post(OPENROUTER_URL, headers=headers, json=data, timeout=10)
-        if response.status_code == 200:
-            result = response.json()
-            if 'choices' in result and len(result['choices']) > 0:
-                reply = result['choices'][0]['message']['content'].strip()
-                return reply if reply else "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
-            return "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
-        else:
-            print(f"LLM API error: {response.status_code}")
-            return "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
-    except Exception as e:
+        reply = llm_client.chat(messages, max_tokens=150, temperature=0.7)
+    except LLMError as e:
         print(f"LLM error: {e}")
-        return "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
+        return LLM_FALLBACK_REPLY
+    return reply if reply else LLM_FALLBACK_REPLY
 
 # --- ROUTES ---
 
@@ -373,7 +363,7 @@ def health():
     db_status = "✅ Connected"
     
     try:
-        with closing(get_conn()) as conn:
+        with get_conn() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM matches")
             match_count = cursor.fetchone()[0]
@@ -388,6 +378,7 @@ def health():
         "model": model_status,
         "database": db_status,
         "llm_configured": bool(OPENROUTER_API_KEY),
+        "llm_client": llm_client.stats(),
         "version": "enhanced_v2.0"
     })
 
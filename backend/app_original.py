@@ -1,10 +1,17 @@
 ﻿from flask import Flask, request, jsonify
 from flask_cors import CORS
-import sqlite3, re, joblib, os, requests
+import sqlite3, re, joblib, os, sys
 from contextlib import closing
 from random import choice
 from dotenv import load_dotenv
 
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.llm_client import LLMClient, LLMError
+
 # --- CONFIG ---
 DB_PATH = "db.sqlite3"
 MODEL_PATH = "../nlp/artifacts/intent_model.pkl"
@@ -20,6 +27,10 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 app = Flask(__name__)
 CORS(app)
 
+# one keep-alive session for every LLM call; retries stay within the budget
+llm_client = LLMClient(OPENROUTER_API_KEY, OPENROUTER_MODEL, url=OPENROUTER_URL,
+                       read_timeout=25, budget_seconds=30)
+
 # --- INTENT MODEL ---
 intent_model = joblib.load(MODEL_PATH)
 
@@ -69,27 +80,15 @@ def intent_with_conf(text: str):
 def llm_reply(history, sys_prompt="You are a friendly sports assistant. Keep replies concise. If user asks about our demo teams (Alpha FC, Beta United, etc.), answer naturally using generic phrasing. If you don't know, say so briefly."):
     if not OPENROUTER_API_KEY:
         return "LLM not configured. Ask about score, stadium, scorers, date or tournament for our demo matches."
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        # Use model configured by OPENROUTER_MODEL (defaults to tngtech/deepseek-r1t2-chimera:free)
-        "model": OPENROUTER_MODEL,
-        "messages": [{"role":"system","content":sys_prompt}] + history,
-        "max_tokens": 180,
-        "temperature": 0.7
-    }
     try:
-        r = requests.post(OPENROUTER_URL, headers=headers, json=payload, timeout=25)
-        r.raise_for_status()
-        data = r.json()
-        reply = data["choices"][0]["message"]["content"].strip()
+        # Use model configured by OPENROUTER_MODEL (defaults to tngtech/deepseek-r1t2-chimera:free)
+        reply = llm_client.chat([{"role":"system","content":sys_prompt}] + history,
+                                max_tokens=180, temperature=0.7)
         # Handle empty responses from free models
         if not reply:
             return "I understand your question, but I'm not sure how to respond right now. Try asking about specific match details!"
         return reply
-    except Exception as e:
+    except LLMError as e:
         return "Sorry, I couldn't think of a good answer right now."
 
 
@@ -103,34 +102,14 @@ def llm_test():
     if not OPENROUTER_API_KEY:
         return jsonify({"ok": False, "error": "OPENROUTER_API_KEY not set locally"}), 400
 
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
     test_prompt = "Please reply with a very short yes/no acknowledgement so we can test connectivity."
-    payload = {
-        "model": OPENROUTER_MODEL,
-        "messages": [{"role": "system", "content": "Connectivity test"}, {"role": "user", "content": test_prompt}],
-        "max_tokens": 16,
-        "temperature": 0.0,
-    }
+    messages = [{"role": "system", "content": "Connectivity test"}, {"role": "user", "content": test_prompt}]
     try:
-        r = requests.post(OPENROUTER_URL, headers=headers, json=payload, timeout=12)
-        r.raise_for_status()
-        data = r.json()
-        # Try to extract a short text reply safely
-        reply = None
-        try:
-            reply = data["choices"][0]["message"]["content"].strip()
-        except Exception:
-            # Fallback to raw repr (not including API key)
-            reply = str(data)[:250]
-
-        return jsonify({"ok": True, "model": OPENROUTER_MODEL, "reply": reply})
-    except requests.exceptions.RequestException as e:
+        # a single attempt: this checks connectivity, not resilience
+        reply = llm_client.chat(messages, max_tokens=16, temperature=0.0, budget_seconds=12, retries=0)
+        return jsonify({"ok": True, "model": OPENROUTER_MODEL, "reply": reply, "timing": llm_client.stats()["last"]})
+    except LLMError as e:
         return jsonify({"ok": False, "error": "Request failed", "detail": str(e)}), 502
-    except Exception as e:
-        return jsonify({"ok": False, "error": "Unexpected error", "detail": str(e)}), 500
 
 @app.get("/")
 def index():
@@ -141,7 +120,7 @@ def index():
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "llm_client": llm_client.stats()}
 
 # Legacy structured endpoint (kept)
 @app.post("/ask")
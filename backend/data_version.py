@@ -0,0 +1,97 @@
+# Cheap change detection for the SQLite database file
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class DataVersion:
+    """Track commits made to an SQLite file by any other connection.
+
+    ``PRAGMA data_version`` only changes when *another* connection commits, and
+    its value is private to the connection that reads it, so the watcher keeps
+    one dedicated connection for the check.  The file is re-opened when it is
+    replaced on disk (e.g. by a setup script).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = None
+        self._file_id = None
+        self._last_version = None
+        self._generation = 0
+        self._token = None
+        self._token_generation = None
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.db_path)
+            return (st.st_dev, st.st_ino)
+        except OSError:
+            return None
+
+    def generation(self):
+        """Return a counter that increases every time the database changes"""
+        with self._lock:
+            file_id = self._stat()
+            if file_id != self._file_id:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+                self._file_id = file_id
+                self._last_version = None
+                self._generation += 1
+            if file_id is None:
+                return self._generation
+            if self._conn is None:
+                uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+                self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._last_version:
+                if self._last_version is not None:
+                    self._generation += 1
+                self._last_version = version
+            return self._generation
+
+    def token(self):
+        """Name the current database state in a way every process agrees on.
+
+        ``generation()`` counts changes seen by this process only, so caches
+        shared between workers key on this instead: the identity, size and
+        mtime of the file and its WAL, re-read whenever the generation moves.
+        """
+        generation = self.generation()
+        with self._lock:
+            if generation != self._token_generation:
+                parts = []
+                for path in (self.db_path, self.db_path + "-wal"):
+                    try:
+                        st = os.stat(path)
+                        parts.append(f"{st.st_ino}.{st.st_size}.{st.st_mtime_ns}")
+                    except OSError:
+                        parts.append("-")
+                self._token = ":".join(parts)
+                self._token_generation = generation
+            return self._token
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def change_counter(conn, name):
+    """Value of a trigger-maintained counter in change_counters (see
+    migrations.change_counter), or None when the database does not keep it.
+
+    Unlike the generation, it only moves when the rows it watches change,
+    including updates in place that keep every count and max id the same.
+    """
+    try:
+        row = conn.execute("SELECT version FROM change_counters WHERE name = ?", (name,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
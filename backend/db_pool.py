@@ -0,0 +1,156 @@
+# Persistent per-thread SQLite connections for the serving path
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from pathlib import Path
+
+
+def sqlite_uri(db_path, **params):
+    """Build a file: URI for db_path with the given query parameters"""
+    uri = Path(db_path).resolve().as_uri()
+    if params:
+        uri += "?" + "&".join(f"{k}={v}" for k, v in params.items())
+    return uri
+
+
+def enable_wal(db_path):
+    """Switch the database file to WAL so readers never block on writers.
+
+    journal_mode=WAL is persistent, so this only needs a writable connection
+    once.  Read-only deployments (e.g. a bundled DB on serverless) skip it.
+    """
+    if not os.path.exists(db_path) or not os.access(os.path.dirname(os.path.abspath(db_path)), os.W_OK):
+        return None
+    try:
+        conn = sqlite3.connect(db_path, timeout=5)
+        try:
+            return conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not enable WAL on {db_path}: {e}")
+        return None
+
+
+class _ThreadConnection:
+    """Holder for one thread's connection; freed when the thread goes away"""
+
+    __slots__ = ("conn", "generation", "__weakref__")
+
+    def __init__(self, conn, generation):
+        self.conn = conn
+        self.generation = generation
+
+    def __del__(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """One long-lived, read-only connection per worker thread.
+
+    Connections are opened in URI mode with ``mode=ro``, a tuned page cache and
+    a large prepared-statement cache, and are reused for every query the
+    thread makes.  ``reset()`` makes every thread reconnect on its next
+    checkout, e.g. after the target database was swapped.
+    """
+
+    def __init__(self, db_path, cache_size_kib=16384, cached_statements=256,
+                 mmap_size=64 * 1024 * 1024, wal=True, uri=None):
+        self.db_path = db_path
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self.mmap_size = mmap_size
+        self.wal = wal
+        self._uri = uri
+        self._local = threading.local()
+        self._holders = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._wal_checked = False
+        self.journal_mode = None
+
+        # metrics
+        self.checkouts = 0
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.connect_time = 0.0
+
+    @property
+    def uri(self):
+        return self._uri or sqlite_uri(self.db_path, mode="ro")
+
+    def _open(self):
+        if self.wal and not self._wal_checked:
+            with self._lock:
+                if not self._wal_checked:
+                    self.journal_mode = enable_wal(self.db_path)
+                    self._wal_checked = True
+
+        start = time.perf_counter()
+        # check_same_thread is off only so close_all() can close other threads'
+        # connections; each connection is still used by a single thread
+        conn = sqlite3.connect(self.uri, uri=True, cached_statements=self.cached_statements,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA query_only = 1")
+        with self._lock:
+            self.connections_opened += 1
+            self.connect_time += time.perf_counter() - start
+        return conn
+
+    def connection(self):
+        """Return this thread's connection, opening it on first use"""
+        holder = getattr(self._local, "holder", None)
+        if holder is None or holder.generation != self._generation:
+            if holder is not None:
+                holder.conn.close()
+                with self._lock:
+                    self.reconnects += 1
+            holder = _ThreadConnection(self._open(), self._generation)
+            self._local.holder = holder
+            with self._lock:
+                self._holders.add(holder)
+        with self._lock:
+            self.checkouts += 1
+        return holder.conn
+
+    def reset(self, uri=None):
+        """Make every thread reconnect (optionally to a new URI) on next use"""
+        with self._lock:
+            if uri is not None:
+                self._uri = uri
+            self._generation += 1
+
+    def close_all(self):
+        """Close every open connection; threads reconnect lazily"""
+        with self._lock:
+            holders = list(self._holders)
+            self._generation += 1
+        for holder in holders:
+            holder.conn.close()
+
+    def stats(self):
+        """Pool metrics for /metrics"""
+        with self._lock:
+            opened, checkouts = self.connections_opened, self.checkouts
+            reconnects, connect_time = self.reconnects, self.connect_time
+            open_connections = len(self._holders)
+        return {
+            "open_connections": open_connections,
+            "connections_opened": opened,
+            "reconnects": reconnects,
+            "checkouts": checkouts,
+            "reuse_ratio": round(1 - opened / checkouts, 4) if checkouts else 0.0,
+            "avg_connect_ms": round(connect_time / opened * 1000, 3) if opened else 0.0,
+            "journal_mode": self.journal_mode,
+            "cache_size_kib": self.cache_size_kib,
+            "cached_statements": self.cached_statements,
+        }
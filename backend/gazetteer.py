@@ -0,0 +1,276 @@
+# Entity Gazetteer - single-pass Aho-Corasick matching of team and player names
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import deque, namedtuple
+
+from backend.data_version import DataVersion, change_counter
+
+EntityMatch = namedtuple("EntityMatch", ["start", "end", "kind", "name", "entity_id"])
+
+# Trailing words that are commonly dropped when people name a club
+TEAM_SUFFIXES = {
+    "fc", "sc", "afc", "cf", "united", "city", "town", "rovers", "athletic",
+    "rangers", "sports", "wanderers", "albion", "county",
+}
+MIN_ALIAS_LENGTH = 4
+
+
+def normalize_with_offsets(text):
+    """Case-fold text, turn punctuation into spaces and collapse whitespace.
+
+    Returns the normalized string and, for every normalized character, its
+    index in the original text so matches can be mapped back to spans.
+    """
+    chars, offsets = [], []
+    pending_space = False
+    for i, ch in enumerate(text):
+        if ch.isalnum():
+            if pending_space and chars:
+                chars.append(" ")
+                offsets.append(i - 1)
+            pending_space = False
+            folded = ch.lower()
+            chars.append(folded if len(folded) == 1 else ch)
+            offsets.append(i)
+        else:
+            pending_space = True
+    return "".join(chars), offsets
+
+
+def normalize(text):
+    """Normalize a name or message for matching"""
+    return normalize_with_offsets(text)[0]
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton over normalized patterns"""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._built = False
+
+    def add(self, pattern, payload):
+        """Register a pattern; call build() once all patterns are added"""
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), payload))
+        self._built = False
+
+    def build(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+
+    def iter_matches(self, text):
+        """Yield (start, end, payload) for every pattern occurrence in text"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in out[state]:
+                yield i + 1 - length, i + 1, payload
+
+
+def _has_table(conn, name):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+def _derived_aliases(kind, name):
+    """Generate the short forms people commonly use for an entity"""
+    tokens = normalize(name).split()
+    if kind == "team":
+        while len(tokens) > 1 and tokens[-1] in TEAM_SUFFIXES:
+            tokens = tokens[:-1]
+    elif kind == "player":
+        # "R. Kumar" -> "kumar", "Smith K" -> "smith"
+        tokens = [t for t in tokens if len(t) > 1]
+    alias = " ".join(tokens)
+    if alias and alias != normalize(name) and len(alias) >= MIN_ALIAS_LENGTH:
+        return [alias]
+    return []
+
+
+class Gazetteer:
+    """Precompiled dictionary of known entities and their aliases"""
+
+    def __init__(self, entities):
+        """entities: iterable of (kind, entity_id, name)"""
+        entities = list(entities)
+        self.names = {}
+        self.ids = ids_by_name = {}
+        patterns = {}
+        alias_owners = {}
+
+        for kind, entity_id, name in entities:
+            self.names[(kind, entity_id)] = name
+            ids_by_name.setdefault((kind, name), entity_id)
+            key = normalize(name)
+            if key:
+                patterns.setdefault((kind, key), (kind, name, entity_id))
+
+        # Aliases only survive when they are unambiguous within their kind
+        for kind, entity_id, name in entities:
+            for alias in _derived_aliases(kind, name):
+                alias_owners.setdefault((kind, alias), set()).add(name)
+        for (kind, alias), owners in alias_owners.items():
+            if len(owners) == 1 and (kind, alias) not in patterns:
+                owner = next(iter(owners))
+                patterns[(kind, alias)] = (kind, owner, ids_by_name[(kind, owner)])
+
+        self.automaton = AhoCorasick()
+        for (kind, key), payload in patterns.items():
+            self.automaton.add(key, payload)
+        self.automaton.build()
+        self.pattern_count = len(patterns)
+
+    @classmethod
+    def from_db(cls, conn):
+        """Build the gazetteer from the teams, players and tournaments tables"""
+        rows = [("team", r[0], r[1]) for r in conn.execute("SELECT id, name FROM teams")]
+        rows += [("player", r[0], r[1]) for r in conn.execute("SELECT id, name FROM players")]
+        if _has_table(conn, "tournaments"):
+            # one entry per competition name; its seasons share the name
+            rows += [("tournament", r[0], r[1])
+                     for r in conn.execute("SELECT MIN(id), name FROM tournaments GROUP BY name")]
+        return cls(rows)
+
+    def find(self, text, kind=None):
+        """Return every entity span in text, preferring the longest match.
+
+        Overlapping candidates are resolved longest-first; the result is in
+        the order the entities appear in the message.
+        """
+        norm, offsets = normalize_with_offsets(text)
+        candidates = []
+        for start, end, (entity_kind, name, entity_id) in self.automaton.iter_matches(norm):
+            if kind and entity_kind != kind:
+                continue
+            # Whole words only, so "Hall" does not match inside "shall"
+            if start > 0 and norm[start - 1] != " ":
+                continue
+            if end < len(norm) and norm[end] != " ":
+                continue
+            candidates.append((start, end, entity_kind, name, entity_id))
+
+        candidates.sort(key=lambda c: (-(c[1] - c[0]), c[0]))
+        taken = []
+        for cand in candidates:
+            if all(cand[1] <= s or cand[0] >= e for s, e, *_ in taken):
+                taken.append(cand)
+        taken.sort()
+
+        return [
+            EntityMatch(offsets[s], offsets[e - 1] + 1, k, name, entity_id)
+            for s, e, k, name, entity_id in taken
+        ]
+
+    def entity_id(self, kind, name):
+        """Resolve a canonical name to its database id (None if unknown)"""
+        return self.ids.get((kind, name))
+
+    def _unique_names(self, text, kind):
+        names = []
+        for match in self.find(text, kind):
+            if match.name not in names:
+                names.append(match.name)
+        return names
+
+    def team_names(self, text):
+        return self._unique_names(text, "team")
+
+    def player_names(self, text):
+        return self._unique_names(text, "player")
+
+    def tournament_names(self, text):
+        return self._unique_names(text, "tournament")
+
+
+class LiveGazetteer:
+    """Gazetteer that is rebuilt only when the entity names change.
+
+    The check runs when the database generation moves. It reads the
+    entity_names change counter that migrations install, or on a database
+    without it, a checksum of every entity id and name. ``connect`` opens
+    the connection to read from (e.g. SnapshotServer.connect), db_path by
+    default.
+    """
+
+    def __init__(self, db_path, version=None, connect=None):
+        self.db_path = db_path
+        self.version = version or DataVersion(db_path)
+        self.connect = connect or (lambda: sqlite3.connect(self.db_path))
+        self._gazetteer = None
+        self._generation = None
+        self._fingerprint = None
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def _connect(self):
+        conn = self.connect()
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _fingerprint_of(self, conn):
+        st = os.stat(self.db_path)
+        counter = change_counter(conn, "entity_names")
+        if counter is not None:
+            return st.st_dev, st.st_ino, counter
+        digest = hashlib.sha1()
+        tables = ["teams", "players"] + (["tournaments"] if _has_table(conn, "tournaments") else [])
+        for table in tables:
+            digest.update(table.encode())
+            for entity_id, name in conn.execute(f"SELECT id, name FROM {table} ORDER BY id"):
+                digest.update(f"{entity_id}\0{name}\0".encode())
+        return st.st_dev, st.st_ino, digest.hexdigest()
+
+    def get(self):
+        """Return the current gazetteer, rebuilding it if the data changed"""
+        generation = self.version.generation()
+        if self._gazetteer is not None and generation == self._generation:
+            return self._gazetteer
+
+        with self._lock:
+            if self._gazetteer is not None and generation == self._generation:
+                return self._gazetteer
+            conn = self._connect()
+            try:
+                fingerprint = self._fingerprint_of(conn)
+                if self._gazetteer is None or fingerprint != self._fingerprint:
+                    self._gazetteer = Gazetteer.from_db(conn)
+                    self._fingerprint = fingerprint
+                    self.rebuilds += 1
+                    print(f"📚 Gazetteer built with {self._gazetteer.pattern_count} names and aliases")
+            finally:
+                conn.close()
+            self._generation = generation
+            return self._gazetteer
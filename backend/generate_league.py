@@ -0,0 +1,348 @@
+# Synthetic League Generator - seeded, batched database builder for load testing
+import argparse
+import bisect
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.migrations import apply_migrations
+from backend.schema import create_schema
+
+# goals: mean goals per team per match; positions: (name, squad share, scoring weight)
+SPORTS = {
+    "football": {
+        "goals": 1.35, "home_advantage": 0.25, "minutes": 90,
+        "suffixes": ["FC", "United", "Rovers", "Athletic", "City", "Wanderers", "Albion"],
+        "positions": [("Forward", 0.2, 6.0), ("Midfielder", 0.35, 2.0),
+                      ("Defender", 0.35, 0.5), ("Goalkeeper", 0.1, 0.01)],
+    },
+    "hockey": {
+        "goals": 2.9, "home_advantage": 0.2, "minutes": 60,
+        "suffixes": ["Hawks", "Bears", "Kings", "Blades", "Storm"],
+        "positions": [("Forward", 0.5, 4.0), ("Defender", 0.35, 1.0), ("Goalkeeper", 0.15, 0.01)],
+    },
+    "futsal": {
+        "goals": 2.6, "home_advantage": 0.2, "minutes": 40,
+        "suffixes": ["Futsal", "Stars", "Sala", "Five"],
+        "positions": [("Pivot", 0.25, 4.0), ("Winger", 0.35, 3.0),
+                      ("Defender", 0.25, 1.0), ("Goalkeeper", 0.15, 0.05)],
+    },
+}
+
+REGIONS = ["Premier", "Northern", "Southern", "Eastern", "Western", "Central", "Coastal",
+           "Highland", "Metropolitan", "Continental", "Island", "Valley", "Capital", "Frontier"]
+CITY_PARTS = ["Ash", "Bel", "Cor", "Dun", "El", "Fair", "Glen", "Hart", "Ives", "Kings",
+              "Lin", "Mar", "North", "Ox", "Pen", "Queens", "Ros", "Stan", "Tor", "Wes"]
+CITY_ENDS = ["ford", "ton", "bury", "field", "port", "wick", "dale", "mouth", "ham", "ley"]
+FIRST_NAMES = ["Alex", "Ben", "Carlos", "Daniel", "Emil", "Felix", "Gabriel", "Hugo", "Ivan",
+               "Jonas", "Kai", "Luca", "Mateo", "Noah", "Oscar", "Pablo", "Rafael", "Samir",
+               "Tomas", "Victor", "William", "Yusuf", "Ze", "Arjun", "Kenji"]
+LAST_NAMES = ["Rodriguez", "Smith", "Johnson", "Kumar", "Muller", "Rossi", "Silva", "Novak",
+              "Kowalski", "Larsen", "Okafor", "Tanaka", "Dubois", "Jansen", "Costa", "Hansen",
+              "Moreno", "Fischer", "Petrov", "Nakamura", "Mensah", "Reyes", "Lindqvist", "Bauer"]
+
+BULK_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",
+]
+
+INSERTS = {
+    "tournaments": "INSERT INTO tournaments (id, name, season, start_date, end_date) VALUES (?, ?, ?, ?, ?)",
+    "teams": "INSERT INTO teams (id, name, city, founded_year, stadium, capacity) VALUES (?, ?, ?, ?, ?, ?)",
+    "players": "INSERT INTO players (id, name, team_id, position, goals, appearances) VALUES (?, ?, ?, ?, ?, ?)",
+    "matches": ("INSERT INTO matches (id, home_team_id, away_team_id, home_score, away_score, "
+                "match_date, stadium, tournament_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"),
+    "scorers": "INSERT INTO scorers (id, match_id, player_id, minute) VALUES (?, ?, ?, ?)",
+    "team_standings": ("INSERT INTO team_standings (team_id, tournament_id, position, points, matches_played, "
+                       "wins, draws, losses, goals_for, goals_against) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"),
+}
+
+
+def poisson_table(mean, limit=30):
+    """Cumulative Poisson probabilities, for sampling with one random() and a bisect"""
+    cumulative, total, p = [], 0.0, math.exp(-mean)
+    for k in range(limit):
+        total += p
+        cumulative.append(total)
+        p *= mean / (k + 1)
+    return cumulative
+
+
+def round_robin(team_ids):
+    """Circle-method rounds where every team meets every other once"""
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    half = len(teams) // 2
+    for _ in range(len(teams) - 1):
+        yield [(teams[i], teams[-1 - i]) for i in range(half)
+               if teams[i] is not None and teams[-1 - i] is not None]
+        teams.insert(1, teams.pop())
+
+
+class BatchWriter:
+    """Buffer rows per table and flush them with executemany"""
+
+    def __init__(self, conn, batch_size):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.buffers = {table: [] for table in INSERTS}
+        self.counts = dict.fromkeys(INSERTS, 0)
+
+    def add(self, table, row):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(table)
+
+    def flush(self, table=None):
+        for name in [table] if table else list(self.buffers):
+            rows = self.buffers[name]
+            if rows:
+                self.conn.executemany(INSERTS[name], rows)
+                self.counts[name] += len(rows)
+                rows.clear()
+
+
+class LeagueGenerator:
+    """Deterministic (for a given seed) sports data at any scale"""
+
+    def __init__(self, sports=("football",), leagues=2, seasons=1, teams=20, squad=25,
+                 matches=None, last_season=2024, seed=42):
+        unknown = [s for s in sports if s not in SPORTS]
+        if unknown:
+            raise ValueError(f"Unknown sport(s): {', '.join(unknown)} (choose from {', '.join(SPORTS)})")
+        if teams < 2:
+            raise ValueError("A league needs at least two teams")
+        self.sports = list(sports)
+        self.leagues = leagues
+        self.seasons = seasons
+        self.teams = teams
+        self.squad = squad
+        self.matches = matches
+        self.last_season = last_season
+        self.rng = random.Random(seed)
+        self.ids = dict.fromkeys(("tournaments", "teams", "players", "matches", "scorers"), 0)
+        self._city_names = set()
+
+    def _next_id(self, table):
+        self.ids[table] += 1
+        return self.ids[table]
+
+    def _city(self):
+        rng = self.rng
+        for attempt in range(100):
+            name = rng.choice(CITY_PARTS) + rng.choice(CITY_ENDS)
+            if attempt > 10:
+                name += f" {rng.choice(CITY_PARTS)}"
+            if attempt > 50:
+                name += f" {len(self._city_names)}"
+            if name not in self._city_names:
+                self._city_names.add(name)
+                return name
+        raise RuntimeError("Could not generate a unique city name")
+
+    def _league_name(self, sport, index):
+        region = REGIONS[index % len(REGIONS)]
+        tier = index // len(REGIONS)
+        name = f"{region} {sport.title()} League"
+        return f"{name} {tier + 1}" if tier else name
+
+    def _create_team(self, writer, sport):
+        rng = self.rng
+        config = SPORTS[sport]
+        team_id = self._next_id("teams")
+        city = self._city()
+        writer.add("teams", (team_id, f"{city} {rng.choice(config['suffixes'])}", city,
+                             rng.randint(1870, 1990), f"{city} Stadium", rng.randrange(5000, 80000, 500)))
+
+        # squad, plus cumulative scoring weights so each goal is one bisect
+        players, weights = [], []
+        for position, share, weight in config["positions"]:
+            for _ in range(max(1, round(self.squad * share))):
+                player_id = self._next_id("players")
+                players.append([player_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                                team_id, position, 0, 0])
+                weights.append(weight * rng.uniform(0.5, 1.5))
+        cumulative, total = [], 0.0
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return {"id": team_id, "stadium": f"{city} Stadium", "players": players, "cum_weights": cumulative}
+
+    def _fixtures(self, team_ids):
+        """Double round robin (home and away), truncated or repeated to the match budget"""
+        first_leg = list(round_robin(team_ids))
+        rounds = first_leg + [[(away, home) for home, away in r] for r in first_leg]
+        wanted = self.matches or sum(len(r) for r in rounds)
+        produced = 0
+        while produced < wanted:
+            for fixtures in rounds:
+                fixtures = fixtures[:wanted - produced]
+                if not fixtures:
+                    return
+                yield fixtures
+                produced += len(fixtures)
+
+    def _goals(self, table):
+        return bisect.bisect_left(table, self.rng.random() * table[-1])
+
+    def _scorers(self, writer, match_id, team, goals, minutes):
+        rng = self.rng
+        players = team["players"]
+        scorers = rng.choices(players, cum_weights=team["cum_weights"], k=goals)
+        for player, minute in zip(scorers, sorted(rng.randint(1, minutes) for _ in range(goals))):
+            player[4] += 1
+            writer.add("scorers", (self._next_id("scorers"), match_id, player[0], minute))
+
+    def _season(self, writer, sport, league_name, clubs, year):
+        rng = self.rng
+        config = SPORTS[sport]
+        home_goals = poisson_table(config["goals"] + config["home_advantage"])
+        away_goals = poisson_table(config["goals"])
+        start = date(year, 8, 1) + timedelta(days=rng.randint(0, 20))
+        tournament_id = self._next_id("tournaments")
+        table = {team_id: [0, 0, 0, 0, 0, 0] for team_id in clubs}  # played, w, d, l, gf, ga
+
+        day = start
+        for fixtures in self._fixtures(list(clubs)):
+            for home_id, away_id in fixtures:
+                home, away = clubs[home_id], clubs[away_id]
+                home_score, away_score = self._goals(home_goals), self._goals(away_goals)
+                match_id = self._next_id("matches")
+                writer.add("matches", (match_id, home_id, away_id, home_score, away_score,
+                                       (day + timedelta(days=rng.randint(0, 2))).isoformat(),
+                                       home["stadium"], tournament_id))
+                self._scorers(writer, match_id, home, home_score, config["minutes"])
+                self._scorers(writer, match_id, away, away_score, config["minutes"])
+
+                for team_id, scored, conceded in ((home_id, home_score, away_score),
+                                                  (away_id, away_score, home_score)):
+                    row = table[team_id]
+                    row[0] += 1
+                    row[1 + (0 if scored > conceded else 1 if scored == conceded else 2)] += 1
+                    row[4] += scored
+                    row[5] += conceded
+            day += timedelta(days=7)
+
+        writer.add("tournaments", (tournament_id, league_name, f"{year}/{year + 1}",
+                                   start.isoformat(), day.isoformat()))
+        ranked = sorted(table.items(), key=lambda item: (-(item[1][1] * 3 + item[1][2]),
+                                                        -(item[1][4] - item[1][5]), -item[1][4], item[0]))
+        for position, (team_id, (played, wins, draws, losses, gf, ga)) in enumerate(ranked, 1):
+            writer.add("team_standings", (team_id, tournament_id, position, wins * 3 + draws,
+                                          played, wins, draws, losses, gf, ga))
+            for player in clubs[team_id]["players"]:
+                player[5] += played
+
+    def write(self, conn, batch_size=50000, progress=True):
+        """Generate everything into conn; returns row counts per table"""
+        writer = BatchWriter(conn, batch_size)
+        for sport in self.sports:
+            for league in range(self.leagues):
+                league_name = self._league_name(sport, league)
+                clubs = {}
+                for _ in range(self.teams):
+                    team = self._create_team(writer, sport)
+                    clubs[team["id"]] = team
+                for season in range(self.seasons):
+                    self._season(writer, sport, league_name, clubs, self.last_season - self.seasons + 1 + season)
+                    writer.flush()
+                    conn.commit()
+                for team in clubs.values():
+                    for player in team["players"]:
+                        writer.add("players", tuple(player))
+                writer.flush()
+                conn.commit()
+                if progress:
+                    print(f"⚽ {league_name}: {self.seasons} season(s), "
+                          f"{writer.counts['matches']:,} matches and {writer.counts['scorers']:,} scorers so far")
+        return writer.counts
+
+
+def generate(db_path, overwrite=False, batch_size=50000, migrate=True, progress=True, **options):
+    """Build a fresh database at db_path; returns row counts per table"""
+    if os.path.exists(db_path):
+        if not overwrite:
+            raise FileExistsError(f"{db_path} already exists (use --overwrite to replace it)")
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    generator = LeagueGenerator(**options)
+    conn = sqlite3.connect(db_path)
+    try:
+        for pragma in BULK_PRAGMAS:
+            conn.execute(pragma)
+        create_schema(conn)
+        counts = generator.write(conn, batch_size=batch_size, progress=progress)
+    finally:
+        conn.close()
+
+    # indexes, generated columns, triggers and summary tables are built once
+    # after the bulk load instead of being maintained row by row
+    if migrate:
+        apply_migrations(db_path)
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("ANALYZE")
+        finally:
+            conn.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic sports database for load testing")
+    parser.add_argument("--db", default="league.sqlite3", help="output SQLite file")
+    parser.add_argument("--sports", default="football",
+                        help=f"comma-separated sports ({', '.join(SPORTS)})")
+    parser.add_argument("--leagues", type=int, default=2, help="leagues per sport")
+    parser.add_argument("--seasons", type=int, default=1, help="seasons per league")
+    parser.add_argument("--teams", type=int, default=20, help="teams per league")
+    parser.add_argument("--squad", type=int, default=25, help="players per team")
+    parser.add_argument("--matches", type=int, default=None,
+                        help="matches per league season (default: full home-and-away round robin)")
+    parser.add_argument("--last-season", type=int, default=2024, help="year the latest season starts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=50000, help="rows per executemany call")
+    parser.add_argument("--overwrite", action="store_true", help="replace an existing database")
+    parser.add_argument("--no-migrate", action="store_true", help="skip building indexes and triggers")
+    parser.add_argument("--precompute", action="store_true", help="build the precomputed answer table after")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        counts = generate(
+            args.db, overwrite=args.overwrite, batch_size=args.batch_size, migrate=not args.no_migrate,
+            sports=[s.strip() for s in args.sports.split(",") if s.strip()], leagues=args.leagues,
+            seasons=args.seasons, teams=args.teams, squad=args.squad, matches=args.matches,
+            last_season=args.last_season, seed=args.seed,
+        )
+    except (ValueError, FileExistsError) as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    print(f"✅ Generated {args.db} in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    for table, count in counts.items():
+        print(f"- {count:,} {table}")
+    if args.precompute:
+        from backend.precompute import run_build
+        return run_build(args.db)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# Head-to-Head - per team pair summary kept current by triggers on matches and tournaments
+import argparse
+import os
+import sqlite3
+import sys
+
+# Rows are keyed by the canonical (pair_lo, pair_hi) team-id pair plus a
+# scope: tournament_id 0 and season '' mark the all-time row, a real
+# tournament_id the per-tournament row and a real season the per-season row.
+# lo_* / hi_* columns are from the point of view of pair_lo / pair_hi.
+TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS head_to_head (
+        pair_lo INTEGER NOT NULL,
+        pair_hi INTEGER NOT NULL,
+        tournament_id INTEGER NOT NULL DEFAULT 0,
+        season TEXT NOT NULL DEFAULT '',
+        matches INTEGER NOT NULL DEFAULT 0,
+        lo_wins INTEGER NOT NULL DEFAULT 0,
+        hi_wins INTEGER NOT NULL DEFAULT 0,
+        draws INTEGER NOT NULL DEFAULT 0,
+        lo_goals INTEGER NOT NULL DEFAULT 0,
+        hi_goals INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (pair_lo, pair_hi, tournament_id, season)
+    ) WITHOUT ROWID
+"""
+
+COLUMNS = ("pair_lo", "pair_hi", "tournament_id", "season",
+           "matches", "lo_wins", "hi_wins", "draws", "lo_goals", "hi_goals")
+
+# Only played matches count; fixtures without a score are ignored.
+EXPECTED_SQL = """
+    WITH played AS (
+        SELECT m.pair_lo, m.pair_hi, m.tournament_id, t.season,
+               CASE WHEN m.home_team_id = m.pair_lo THEN m.home_score ELSE m.away_score END AS lo,
+               CASE WHEN m.home_team_id = m.pair_lo THEN m.away_score ELSE m.home_score END AS hi
+        FROM matches m
+        LEFT JOIN tournaments t ON t.id = m.tournament_id
+        WHERE m.pair_lo IS NOT NULL AND m.home_score IS NOT NULL AND m.away_score IS NOT NULL
+    )
+    SELECT pair_lo, pair_hi, 0, '', COUNT(*), SUM(lo > hi), SUM(hi > lo), SUM(lo = hi), SUM(lo), SUM(hi)
+    FROM played GROUP BY pair_lo, pair_hi
+    UNION ALL
+    SELECT pair_lo, pair_hi, tournament_id, '', COUNT(*), SUM(lo > hi), SUM(hi > lo), SUM(lo = hi), SUM(lo), SUM(hi)
+    FROM played WHERE tournament_id IS NOT NULL GROUP BY pair_lo, pair_hi, tournament_id
+    UNION ALL
+    SELECT pair_lo, pair_hi, 0, season, COUNT(*), SUM(lo > hi), SUM(hi > lo), SUM(lo = hi), SUM(lo), SUM(hi)
+    FROM played WHERE season IS NOT NULL GROUP BY pair_lo, pair_hi, season
+"""
+
+
+def _delta(alias, sign):
+    """UPSERT adding (sign=+1) or removing (sign=-1) one match from every scope"""
+    lo = f"(CASE WHEN {alias}.home_team_id = {alias}.pair_lo THEN {alias}.home_score ELSE {alias}.away_score END)"
+    hi = f"(CASE WHEN {alias}.home_team_id = {alias}.pair_lo THEN {alias}.away_score ELSE {alias}.home_score END)"
+    return (
+        f"INSERT INTO head_to_head ({', '.join(COLUMNS)}) "
+        f"SELECT {alias}.pair_lo, {alias}.pair_hi, scope.tournament_id, scope.season, {sign}, "
+        f"{sign} * ({lo} > {hi}), {sign} * ({hi} > {lo}), {sign} * ({lo} = {hi}), {sign} * {lo}, {sign} * {hi} "
+        f"FROM (SELECT 0 AS tournament_id, '' AS season "
+        f"UNION ALL SELECT {alias}.tournament_id, '' WHERE {alias}.tournament_id IS NOT NULL "
+        f"UNION ALL SELECT 0, season FROM tournaments WHERE id = {alias}.tournament_id) AS scope "
+        f"WHERE {alias}.pair_lo IS NOT NULL AND {alias}.home_score IS NOT NULL AND {alias}.away_score IS NOT NULL "
+        f"ON CONFLICT (pair_lo, pair_hi, tournament_id, season) DO UPDATE SET "
+        f"matches = matches + excluded.matches, lo_wins = lo_wins + excluded.lo_wins, "
+        f"hi_wins = hi_wins + excluded.hi_wins, draws = draws + excluded.draws, "
+        f"lo_goals = lo_goals + excluded.lo_goals, hi_goals = hi_goals + excluded.hi_goals;"
+    )
+
+
+def _prune(alias):
+    return (f"DELETE FROM head_to_head WHERE pair_lo = {alias}.pair_lo "
+            f"AND pair_hi = {alias}.pair_hi AND matches <= 0;")
+
+
+def _season_delta(alias, sign):
+    """UPSERT adding (sign=+1) or removing (sign=-1) every match of tournament
+    alias from the per-season rows of alias.season"""
+    lo = "(CASE WHEN m.home_team_id = m.pair_lo THEN m.home_score ELSE m.away_score END)"
+    hi = "(CASE WHEN m.home_team_id = m.pair_lo THEN m.away_score ELSE m.home_score END)"
+    return (
+        f"INSERT INTO head_to_head ({', '.join(COLUMNS)}) "
+        f"SELECT m.pair_lo, m.pair_hi, 0, {alias}.season, {sign} * COUNT(*), {sign} * SUM({lo} > {hi}), "
+        f"{sign} * SUM({hi} > {lo}), {sign} * SUM({lo} = {hi}), {sign} * SUM({lo}), {sign} * SUM({hi}) "
+        f"FROM matches m WHERE m.tournament_id = {alias}.id AND {alias}.season IS NOT NULL "
+        f"AND m.pair_lo IS NOT NULL AND m.home_score IS NOT NULL AND m.away_score IS NOT NULL "
+        f"GROUP BY m.pair_lo, m.pair_hi "
+        f"ON CONFLICT (pair_lo, pair_hi, tournament_id, season) DO UPDATE SET "
+        f"matches = matches + excluded.matches, lo_wins = lo_wins + excluded.lo_wins, "
+        f"hi_wins = hi_wins + excluded.hi_wins, draws = draws + excluded.draws, "
+        f"lo_goals = lo_goals + excluded.lo_goals, hi_goals = hi_goals + excluded.hi_goals;"
+    )
+
+
+def _prune_season(alias):
+    return f"DELETE FROM head_to_head WHERE tournament_id = 0 AND season = {alias}.season AND matches <= 0;"
+
+
+TRIGGERS = {
+    "trg_head_to_head_insert": ("AFTER INSERT ON matches", [_delta("NEW", 1)]),
+    "trg_head_to_head_update": (
+        "AFTER UPDATE OF home_team_id, away_team_id, home_score, away_score, tournament_id ON matches",
+        [_delta("OLD", -1), _delta("NEW", 1), _prune("OLD")]),
+    "trg_head_to_head_delete": ("AFTER DELETE ON matches", [_delta("OLD", -1), _prune("OLD")]),
+    # a tournament's matches move between per-season rows with its season
+    "trg_head_to_head_season_insert": ("AFTER INSERT ON tournaments", [_season_delta("NEW", 1)]),
+    "trg_head_to_head_season_update": (
+        "AFTER UPDATE OF season ON tournaments WHEN OLD.season IS NOT NEW.season",
+        [_season_delta("OLD", -1), _season_delta("NEW", 1), _prune_season("OLD")]),
+    "trg_head_to_head_season_delete": ("AFTER DELETE ON tournaments",
+                                       [_season_delta("OLD", -1), _prune_season("OLD")]),
+}
+
+
+def create_triggers(conn):
+    for name, (event, body) in TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {' '.join(body)} END")
+
+
+def create_head_to_head(conn):
+    """Create the table and its triggers, then fill it from matches"""
+    conn.execute(TABLE_SQL)
+    create_triggers(conn)
+    rebuild(conn)
+
+
+def rebuild(conn):
+    """Recompute every row from matches; returns the number of rows written"""
+    conn.execute("DELETE FROM head_to_head")
+    cursor = conn.execute(f"INSERT INTO head_to_head ({', '.join(COLUMNS)}) {EXPECTED_SQL}")
+    return cursor.rowcount
+
+
+def verify(conn):
+    """Compare the table with a fresh aggregate over matches.
+
+    Returns (key, stored, expected) for every row that differs, where key is
+    (pair_lo, pair_hi, tournament_id, season) and a missing row is None.
+    """
+    expected = {tuple(r[:4]): tuple(r[4:]) for r in conn.execute(EXPECTED_SQL)}
+    stored = {tuple(r[:4]): tuple(r[4:])
+              for r in conn.execute(f"SELECT {', '.join(COLUMNS)} FROM head_to_head")}
+    return [(key, stored.get(key), expected.get(key))
+            for key in sorted(set(expected) | set(stored), key=str)
+            if stored.get(key) != expected.get(key)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild or verify the head_to_head summary table")
+    parser.add_argument("--db", default="db.sqlite3", help="path to the SQLite database")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the table from matches")
+    args = parser.parse_args(argv)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    from backend.migrations import apply_migrations
+
+    apply_migrations(args.db)
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.rebuild:
+            with conn:
+                rows = rebuild(conn)
+            print(f"✅ Rebuilt head_to_head: {rows} row(s)")
+        problems = verify(conn)
+        for key, stored, expected in problems[:20]:
+            print(f"❌ {key}: stored {stored}, expected {expected}")
+        if problems:
+            print(f"❌ {len(problems)} head_to_head row(s) out of date, run with --rebuild")
+            return 1
+        print("✅ head_to_head matches the matches table")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# Inference Batcher - gather concurrent classification requests into one vectorized call
+import os
+import queue
+import threading
+import time
+
+
+class _Request:
+    __slots__ = ("item", "enqueued", "done", "result", "error")
+
+    def __init__(self, item):
+        self.item = item
+        self.enqueued = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Runs func over batches of concurrent calls.
+
+    func takes a list of items and returns one result per item. Callers of
+    submit() block while a dispatcher thread collects requests, starting
+    from the first one waiting, for up to window_seconds or max_batch items,
+    then runs func once over all of them. A window of 0 calls func directly
+    with a batch of one. The dispatcher starts on first use, so processes
+    forked after import get their own.
+    """
+
+    def __init__(self, func, max_batch=64, window_seconds=0.002, name="batcher"):
+        self.func = func
+        self.max_batch = max_batch
+        self.window_seconds = window_seconds
+        self.name = name
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self.batches = 0
+        self.items = 0
+        self.largest = 0
+        self.wait_seconds = 0.0
+
+    def submit(self, item):
+        """func's result for item; re-raises what func raised for its batch"""
+        if self.window_seconds <= 0:
+            return self.func([item])[0]
+        if self._pid != os.getpid():
+            self._start()
+        request = _Request(item)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _start(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._dispatch, name=self.name, daemon=True).start()
+                self._pid = os.getpid()
+
+    def _dispatch(self):
+        while True:
+            batch = [self._queue.get()]
+            closes = batch[0].enqueued + self.window_seconds
+            while len(batch) < self.max_batch:
+                remaining = closes - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch):
+        started = time.monotonic()
+        try:
+            results = self.func([request.item for request in batch])
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        else:
+            for request, result in zip(batch, results):
+                request.result = result
+        self.batches += 1
+        self.items += len(batch)
+        self.largest = max(self.largest, len(batch))
+        self.wait_seconds += sum(started - request.enqueued for request in batch)
+        for request in batch:
+            request.done.set()
+
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "window_ms": self.window_seconds * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest,
+            "avg_wait_ms": round(self.wait_seconds / self.items * 1000, 3) if self.items else 0.0,
+        }
@@ -0,0 +1,433 @@
+# Streaming Ingestion - load match feeds (NDJSON, JSON array, CSV) in bounded memory
+import argparse
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import time
+
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend import head_to_head
+from backend.migrations import (PAIR_VERSION_TRIGGERS, apply_migrations, bump_all_pair_versions,
+                                pair_version_triggers)
+from backend.schema import create_schema
+
+READ_SIZE = 1 << 16
+# characters a single JSON array element may span before it is given up on
+MAX_RECORD_SIZE = 1 << 24
+# a decode error further than this from the end of the buffer is not a
+# number or literal cut off by the chunk boundary ("-Infinity" is 9 long)
+_TAIL = 16
+
+
+def open_feed(path):
+    """Open a feed as text; .gz files are decompressed on the fly"""
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    return open(path, "r", encoding="utf-8-sig", newline="")
+
+
+def _lines(fh, initial):
+    """Iterate fh's lines with already-read characters put back in front"""
+    if not initial:
+        return iter(fh)
+    return itertools.chain([initial + fh.readline()], fh)
+
+
+def iter_ndjson(fh, initial=""):
+    for line_no, line in enumerate(_lines(fh, initial), 1):
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {line_no}: {e}") from None
+
+
+def iter_json_array(fh, initial="", read_size=READ_SIZE, max_record_size=MAX_RECORD_SIZE):
+    """Yield the elements of a top-level JSON array one at a time.
+
+    Only the current element plus one read chunk is held in memory, so a
+    multi-gigabyte array streams like NDJSON. A malformed element raises as
+    soon as the error is clear of the buffer's end; one that cannot be
+    decoded within max_record_size characters (e.g. an unterminated string)
+    raises then, rather than buffering the rest of the feed.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, started, eof = initial, 0, False, False
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if not started and pos < len(buffer):
+            if buffer[pos] != "[":
+                raise ValueError("expected a JSON array")
+            started, pos = True, pos + 1
+            continue
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            if pos >= len(buffer):
+                raise ValueError("need more input")
+            item, end = decoder.raw_decode(buffer, pos)
+            # a number or literal may continue in the next chunk
+            if end == len(buffer) and not eof:
+                raise ValueError("need more input")
+        except ValueError as e:
+            # an unterminated string is reported where it starts, so more input may still close it
+            malformed = (isinstance(e, json.JSONDecodeError) and e.pos + _TAIL < len(buffer)
+                         and not e.msg.startswith("Unterminated string"))
+            if malformed or len(buffer) - pos > max_record_size:
+                near = e.pos if isinstance(e, json.JSONDecodeError) else pos
+                raise ValueError(f"invalid JSON ({e}) near: {buffer[near:near + 80]!r}") from None
+            if eof:
+                if pos >= len(buffer):
+                    return
+                raise ValueError(f"truncated or invalid JSON near: {buffer[pos:pos + 80]!r}") from None
+            chunk = fh.read(read_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+
+
+def _parse_scorers(value):
+    """CSV scorers cell: a JSON array, or 'name|team|minute' entries separated by ';'"""
+    value = (value or "").strip()
+    if not value:
+        return []
+    if value.startswith("["):
+        return json.loads(value)
+    scorers = []
+    for entry in value.split(";"):
+        parts = [p.strip() for p in entry.split("|")]
+        if parts and parts[0]:
+            scorers.append({"name": parts[0],
+                            "team": parts[1] if len(parts) > 1 and parts[1] else None,
+                            "minute": parts[2] if len(parts) > 2 and parts[2] else None})
+    return scorers
+
+
+def iter_csv(fh, initial=""):
+    for row in csv.DictReader(_lines(fh, initial)):
+        row["scorers"] = _parse_scorers(row.get("scorers"))
+        yield row
+
+
+def detect_format(path, fh):
+    """Pick a reader from the extension, else from the first non-blank character.
+
+    Returns (format, characters consumed while sniffing) so the reader can
+    start from them.
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".csv"):
+        return "csv", ""
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson", ""
+    initial = fh.read(1)
+    while initial and initial.isspace():
+        initial = fh.read(1)
+    return ("json" if initial == "[" else "ndjson"), initial
+
+
+READERS = {"ndjson": iter_ndjson, "json": iter_json_array, "csv": iter_csv}
+
+
+def _int(value):
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _minute(value):
+    """Goal minute from 34, "34" or "90+2'" (stoppage time is added on)"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        return sum(int(part) for part in value.strip().rstrip("'").split("+"))
+    return int(value)
+
+
+def season_for(record):
+    """Season label for a record: explicit 'season', else derived from the date"""
+    if record.get("season"):
+        return str(record["season"])
+    match_date = record.get("date") or record.get("match_date")
+    if not match_date:
+        return "unknown"
+    year, month = int(match_date[:4]), int(match_date[5:7])
+    start = year if month >= 7 else year - 1
+    return f"{start}/{start + 1}"
+
+
+class Ingestor:
+    """Upsert feed records into the enhanced schema by natural key.
+
+    Natural keys: tournaments (name, season), teams (name), players
+    (name, team), matches (home team, away team, date).  A match's scorers
+    are replaced as a set, and only when they differ, so re-loading the same
+    feed writes nothing and leaves the incremental caches alone.
+    """
+
+    def __init__(self, conn, chunk_size=5000):
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.teams = {name: id_ for id_, name in conn.execute("SELECT id, name FROM teams")}
+        self.players = {(name, team_id): id_ for id_, name, team_id
+                        in conn.execute("SELECT id, name, team_id FROM players")}
+        self.tournaments = {(name, season): id_ for id_, name, season
+                            in conn.execute("SELECT id, name, season FROM tournaments")}
+        self.counts = dict.fromkeys(("records", "inserted", "updated", "unchanged",
+                                     "scorers", "skipped"), 0)
+        self.errors = []
+        self._added = []  # (cache, key) created by the current record
+
+    def _team(self, name):
+        team_id = self.teams.get(name)
+        if team_id is None:
+            team_id = self.conn.execute("INSERT INTO teams (name) VALUES (?)", (name,)).lastrowid
+            self.teams[name] = team_id
+            self._added.append((self.teams, name))
+        return team_id
+
+    def _player(self, name, team_id):
+        key = (name, team_id)
+        player_id = self.players.get(key)
+        if player_id is None:
+            player_id = self.conn.execute("INSERT INTO players (name, team_id) VALUES (?, ?)",
+                                          key).lastrowid
+            self.players[key] = player_id
+            self._added.append((self.players, key))
+        return player_id
+
+    def _tournament(self, name, season):
+        if not name:
+            return None
+        key = (name, season)
+        tournament_id = self.tournaments.get(key)
+        if tournament_id is None:
+            tournament_id = self.conn.execute("INSERT INTO tournaments (name, season) VALUES (?, ?)",
+                                              key).lastrowid
+            self.tournaments[key] = tournament_id
+            self._added.append((self.tournaments, key))
+        return tournament_id
+
+    def _match(self, home_id, away_id, match_date, values):
+        row = self.conn.execute("""
+            SELECT id, home_score, away_score, stadium, tournament_id FROM matches
+            WHERE pair_lo = ? AND pair_hi = ? AND match_date IS ? AND home_team_id = ?
+        """, (min(home_id, away_id), max(home_id, away_id), match_date, home_id)).fetchone()
+        if row is None:
+            match_id = self.conn.execute(
+                "INSERT INTO matches (home_team_id, away_team_id, match_date, home_score, away_score, "
+                "stadium, tournament_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (home_id, away_id, match_date) + values).lastrowid
+            self.counts["inserted"] += 1
+            return match_id, True
+        if tuple(row[1:]) != values:
+            self.conn.execute(
+                "UPDATE matches SET home_score = ?, away_score = ?, stadium = ?, tournament_id = ? "
+                "WHERE id = ?", values + (row[0],))
+            self.counts["updated"] += 1
+        else:
+            self.counts["unchanged"] += 1
+        return row[0], False
+
+    def _scorers(self, match_id, scorers, new_match):
+        wanted = []
+        for scorer in scorers:
+            name = (scorer.get("name") or "").strip()
+            if not name:
+                continue
+            team = scorer.get("team")
+            team_id = self._team(team) if team else None
+            wanted.append((self._player(name, team_id), _minute(scorer.get("minute"))))
+        existing = [] if new_match else self.conn.execute(
+            "SELECT player_id, minute FROM scorers WHERE match_id = ? ORDER BY id", (match_id,)).fetchall()
+        if [tuple(r) for r in existing] == wanted:
+            return
+        if existing:
+            self.conn.execute("DELETE FROM scorers WHERE match_id = ?", (match_id,))
+        self.conn.executemany("INSERT INTO scorers (match_id, player_id, minute) VALUES (?, ?, ?)",
+                              [(match_id,) + s for s in wanted])
+        self.counts["scorers"] += len(wanted)
+
+    def add(self, record):
+        """Upsert one feed record (the seed_matches.json shape)"""
+        home, away = record.get("home_team"), record.get("away_team")
+        if not home or not away:
+            raise ValueError("home_team and away_team are required")
+        home_id, away_id = self._team(home.strip()), self._team(away.strip())
+        tournament_id = self._tournament(record.get("tournament"), season_for(record))
+        values = (_int(record.get("home_score")), _int(record.get("away_score")),
+                  record.get("stadium") or None, tournament_id)
+        match_date = record.get("date") or record.get("match_date") or None
+        match_id, new_match = self._match(home_id, away_id, match_date, values)
+        self._scorers(match_id, record.get("scorers") or [], new_match)
+
+    def run(self, records, progress_every=100000):
+        """Ingest an iterable of records in chunked transactions"""
+        start = time.perf_counter()
+        self.conn.execute("BEGIN")
+        try:
+            for record in records:
+                self.counts["records"] += 1
+                self.conn.execute("SAVEPOINT record")
+                self._added.clear()
+                before = dict(self.counts)
+                try:
+                    self.add(record)
+                    self.conn.execute("RELEASE record")
+                except (ValueError, TypeError, AttributeError) as e:
+                    self.conn.execute("ROLLBACK TO record")
+                    self.conn.execute("RELEASE record")
+                    # rows inserted for this record are gone, so forget their ids
+                    for cache, key in self._added:
+                        cache.pop(key, None)
+                    self.counts.update(before)
+                    self.counts["skipped"] += 1
+                    if len(self.errors) < 10:
+                        self.errors.append(f"record {self.counts['records']}: {e}")
+                if self.counts["records"] % self.chunk_size == 0:
+                    self.conn.execute("COMMIT")
+                    self.conn.execute("BEGIN")
+                if progress_every and self.counts["records"] % progress_every == 0:
+                    rate = self.counts["records"] / (time.perf_counter() - start)
+                    print(f"📥 {self.counts['records']:,} records ({rate:,.0f}/s)")
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.elapsed = time.perf_counter() - start
+        return self.counts
+
+
+SUMMARY_TRIGGERS = set(PAIR_VERSION_TRIGGERS) | set(head_to_head.TRIGGERS)
+
+
+def _summary_triggers(conn):
+    existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    return sorted(existing & SUMMARY_TRIGGERS)
+
+
+def suspend_summary_triggers(conn):
+    """Drop the per-row summary triggers for a bulk load"""
+    for name in _summary_triggers(conn):
+        conn.execute(f"DROP TRIGGER {name}")
+
+
+def restore_summaries(conn):
+    """Recreate the summary triggers and recompute what they would have maintained"""
+    pair_version_triggers(conn)
+    head_to_head.create_triggers(conn)
+    rows = head_to_head.rebuild(conn)
+    bump_all_pair_versions(conn)
+    print(f"🔁 Rebuilt head_to_head ({rows:,} rows) and re-armed summary triggers")
+
+
+def ingest(db_path, path, fmt=None, chunk_size=5000, progress_every=100000, bulk=False):
+    """Stream one feed file into db_path; returns the Ingestor with its counters.
+
+    With bulk=True the summary triggers are dropped for the load and the
+    summaries rebuilt once at the end, which is much faster for big dumps.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        create_schema(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    # pair keys and the maintenance triggers must exist before loading
+    apply_migrations(db_path)
+
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA cache_size = -65536")
+        has_summaries = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'head_to_head'").fetchone()
+        if has_summaries and len(_summary_triggers(conn)) < len(SUMMARY_TRIGGERS):
+            # an earlier bulk load was interrupted before re-arming them
+            with _transaction(conn):
+                restore_summaries(conn)
+        bulk = bulk and has_summaries
+        if bulk:
+            with _transaction(conn):
+                suspend_summary_triggers(conn)
+        try:
+            ingestor = Ingestor(conn, chunk_size)
+            with open_feed(path) as fh:
+                initial = ""
+                if fmt is None:
+                    fmt, initial = detect_format(path, fh)
+                ingestor.run(READERS[fmt](fh, initial), progress_every)
+        finally:
+            if bulk:
+                with _transaction(conn):
+                    restore_summaries(conn)
+    finally:
+        conn.close()
+    return ingestor
+
+
+class _transaction:
+    """BEGIN IMMEDIATE ... COMMIT (or ROLLBACK) on an autocommit connection"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream match feeds into the enhanced database")
+    parser.add_argument("feeds", nargs="+", help="NDJSON, JSON array or CSV files (.gz ok, - for stdin)")
+    parser.add_argument("--db", default="db.sqlite3", help="target SQLite database")
+    parser.add_argument("--format", choices=sorted(READERS), help="override format detection")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="records per transaction")
+    parser.add_argument("--bulk", action="store_true",
+                        help="suspend summary triggers during the load and rebuild summaries after")
+    parser.add_argument("--precompute", action="store_true",
+                        help="rebuild the precomputed answer table after loading")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.feeds:
+        try:
+            ingestor = ingest(args.db, path, args.format, args.chunk_size, bulk=args.bulk)
+        except (OSError, ValueError) as e:
+            print(f"❌ {path}: {e}")
+            status = 1
+            continue
+        c = ingestor.counts
+        rate = c["records"] / ingestor.elapsed if ingestor.elapsed else 0.0
+        print(f"✅ {path}: {c['records']:,} records in {ingestor.elapsed:.2f}s ({rate:,.0f} rows/s) - "
+              f"{c['inserted']:,} new, {c['updated']:,} updated, {c['unchanged']:,} unchanged matches, "
+              f"{c['scorers']:,} scorers written, {c['skipped']:,} skipped")
+        for error in ingestor.errors:
+            print(f"⚠️ {error}")
+    if args.precompute:
+        from backend.precompute import run_build
+        status = run_build(args.db) or status
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# Intent Rules - keyword rules in front of the intent model, and in place of it when it is missing
+import re
+import threading
+import time
+from collections import deque
+
+from backend.gazetteer import normalize
+
+COUNT_WORDS = r"(?:\d+|one|two|three|four|five|six|seven|eight|nine|ten)"
+
+# Phrases that name one intent and no other, matched as whole words on the
+# normalized text ("Alpha's next match?" -> "alpha s next match"). A question
+# matching the rules of two intents is left to the model. Words that are just
+# as common outside football questions ("stats", "when was", "stadium") only
+# count next to a player, league or team anchor (see TEAMS_NEEDED); bare,
+# they are KEYWORD_RULES.
+PRECISE_RULES = {
+    "league_top_scorer": [rf"(?:top|best) (?:{COUNT_WORDS} )?(?:goal ?)?scorers?", r"leading (?:goal ?)?scorers?",
+                          r"highest (?:goal ?)?scorers?",
+                          r"most goals (?:this season|in the (?:league|tournament|competition))", r"golden boot",
+                          r"scoring charts?"],
+    "head_to_head": [r"head to head", r"all time record", r"historical (?:record|results)", r"previous meetings",
+                     r"past (?:matches|results)", r"history between", r"overall record"],
+    "next_match": [r"next (?:match|game|fixture)", r"upcoming (?:match|game|fixture)", r"play(?:s|ing)? next",
+                   r"play again"],
+    "team_ranking": [r"league position", r"position in the (?:league|table|standings)", r"league table",
+                     r"league standings", r"(?:league|table) rank(?:ing)?", r"where (?:is|are) .+ ranked",
+                     r"what place (?:is|are) .+ in the (?:league|table|standings)"],
+    "player_stats": [r"(?:player|season|career|scoring|goal) (?:stats|statistics)", r"s (?:stats|statistics)",
+                     r"goal (?:record|count)", r"how many goals (?:has|have|did)"],
+    "scorers": [r"who scored", r"goal ?scorers", r"found the net"],
+    "stadium": [r"stadium", r"venue", r"(?:which|what|the) ground", r"ground for",
+                r"where (?:was|were|is) .+ played", r"where did .+ play"],
+    "date": [r"when (?:was|did)", r"match date", r"what date", r"date (?:of|for)"],
+    "tournament": [r"tournament", r"competition", r"(?:what|which) league"],
+    "score": [r"final score", r"score (?:of|for|in)", r"what was the score", r"scoreline", r"final result",
+              r"result (?:of|between|for)", r"who won (?:the )?(?:match|game|final|tie|derby)",
+              r"who won .+ (?:vs|v|versus|against) .+", r"who won between"],
+}
+
+# Teams a question must name before a rule may answer it with that intent:
+# these handlers answer about one team or a pair, so without them a rule
+# would turn a general question into "please specify two teams". With a team
+# lookup (IntentRules(teams=...)) the teams must resolve; without one, a pair
+# must at least be written as one ("X vs Y", "between X and Y").
+TEAMS_NEEDED = {
+    "score": 2, "stadium": 2, "scorers": 2, "date": 2, "tournament": 2, "head_to_head": 2,
+    "team_ranking": 1, "next_match": 1,
+}
+PAIR_PATTERN = re.compile(r"\b(?:vs|v|versus|against|between)\b")
+
+# A top scorer question usually names its scope too ("top 5 scorers in the
+# tournament", "top scorer standings"), so these intents give way to it
+OUTRANKED_BY = {
+    "scorers": "league_top_scorer",
+    "tournament": "league_top_scorer",
+    "team_ranking": "league_top_scorer",
+}
+
+# Broad keywords of api/app.py's classify_intent, first match wins (top
+# scorer goes first, "score" would swallow it). Only used when there is no
+# model to ask, where a rough answer beats none.
+KEYWORD_RULES = [
+    ("league_top_scorer", ["top scorer", "leading scorer", "most goals", "highest scorer"]),
+    ("player_stats", ["stats", "statistics"]),
+    ("score", ["score", "result", "final", "scoreline", "won", "beat", "defeat", "win", "lose", "lost"]),
+    ("stadium", ["stadium", "venue", "ground", "where played", "location", "arena"]),
+    ("scorers", ["scorer", "goal", "who scored", "goalscorer", "scored by"]),
+    ("date", ["date", "when", "day", "time", "played on"]),
+    ("tournament", ["tournament", "competition", "league", "cup", "championship"]),
+    ("team_ranking", ["ranking", "position", "table", "standing", "rank"]),
+]
+
+RULE_CONFIDENCE = 0.95
+KEYWORD_CONFIDENCE = 0.95
+VERSUS_CONFIDENCE = 0.8
+UNKNOWN_CONFIDENCE = 0.2
+
+CASCADE_MODES = ("first", "fallback", "off")
+
+
+class IntentRules:
+    """Compiled keyword rules over normalized text.
+
+    teams is an optional callable text -> team names found in it, used to
+    check the TEAMS_NEEDED anchors.
+    """
+
+    def __init__(self, rules=None, keywords=None, teams=None):
+        rules = PRECISE_RULES if rules is None else rules
+        self.patterns = {intent: re.compile(r"\b(?:%s)\b" % "|".join(phrases))
+                         for intent, phrases in rules.items()}
+        self.keywords = KEYWORD_RULES if keywords is None else keywords
+        self.teams = teams
+
+    def match(self, text):
+        """(intent, confidence) when exactly one anchored intent's rules match, else None"""
+        normalized = normalize(text)
+        intents = [intent for intent, pattern in self.patterns.items() if pattern.search(normalized)]
+        if any(intent in TEAMS_NEEDED for intent in intents):
+            named = self._teams_named(text, normalized)
+            intents = [intent for intent in intents if named >= TEAMS_NEEDED.get(intent, 0)]
+        if len(intents) > 1:
+            intents = [intent for intent in intents if OUTRANKED_BY.get(intent) not in intents]
+        return (intents[0], RULE_CONFIDENCE) if len(intents) == 1 else None
+
+    def _teams_named(self, text, normalized):
+        if self.teams is not None:
+            return len(self.teams(text))
+        return 2 if PAIR_PATTERN.search(normalized) else 1
+
+    def classify(self, text):
+        """(intent, confidence) for any text: the precise rules, then the broad keywords"""
+        matched = self.match(text)
+        if matched:
+            return matched
+        text_lower = text.lower()
+        for intent, words in self.keywords:
+            if any(word in text_lower for word in words):
+                return intent, KEYWORD_CONFIDENCE
+        # team vs team questions are usually about the score
+        if " vs " in text_lower or " against " in text_lower or " v " in text_lower:
+            return "score", VERSUS_CONFIDENCE
+        return "general", UNKNOWN_CONFIDENCE
+
+
+class IntentCascade:
+    """Classifies with the rules first and the model only when no rule fires.
+
+    model is a callable text -> (intent, confidence), or None when no model
+    could be loaded; the rules then answer every question the model cannot
+    (degraded mode).
+    mode "first" runs the rules ahead of the model, "fallback" uses them only
+    without a model, "off" never does. classify() also returns the stage that
+    answered: "rules", "model", "degraded" or "none".
+
+    Time saved is estimated as the model's average latency for every
+    question the rules answered, less what the rules cost on all questions.
+    """
+
+    def __init__(self, rules, model=None, mode="first"):
+        if mode not in CASCADE_MODES:
+            raise ValueError(f"mode must be one of {', '.join(CASCADE_MODES)}")
+        self.rules = rules
+        self.model = model
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._model_seconds = deque(maxlen=1000)
+        self.stages = {"rules": 0, "model": 0, "degraded": 0, "none": 0}
+        self.rule_seconds = 0.0
+
+    def classify(self, text):
+        """(intent, confidence, stage)"""
+        if self.model is not None:
+            if self.mode == "first":
+                start = time.perf_counter()
+                matched = self.rules.match(text)
+                with self._lock:
+                    self.rule_seconds += time.perf_counter() - start
+                if matched:
+                    return self._answered(*matched, "rules")
+            start = time.perf_counter()
+            try:
+                intent, confidence = self.model(text)
+            except Exception as e:
+                print(f"⚠️ Intent model failed, answering from the rules: {e}")
+            else:
+                with self._lock:
+                    self._model_seconds.append(time.perf_counter() - start)
+                return self._answered(intent, confidence, "model")
+        if self.mode == "off":
+            return self._answered(None, 0.0, "none")
+        intent, confidence = self.rules.classify(text)
+        return self._answered(intent, confidence, "degraded")
+
+    def _answered(self, intent, confidence, stage):
+        with self._lock:
+            self.stages[stage] += 1
+        return intent, confidence, stage
+
+    def stats(self):
+        with self._lock:
+            total = sum(self.stages.values())
+            model_avg = sum(self._model_seconds) / len(self._model_seconds) if self._model_seconds else 0.0
+            saved = self.stages["rules"] * model_avg - self.rule_seconds
+            return {
+                "mode": self.mode,
+                "degraded": self.model is None,
+                "stages": dict(self.stages),
+                "rule_hit_rate": round(self.stages["rules"] / total, 4) if total else 0.0,
+                "avg_model_ms": round(model_avg * 1000, 3),
+                "rule_ms": round(self.rule_seconds * 1000, 3),
+                "saved_ms": round(max(saved, 0.0) * 1000, 3),
+            }
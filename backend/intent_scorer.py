@@ -0,0 +1,255 @@
+# Intent Scorer - NumPy-only predict_proba for the compiled TF-IDF + LogisticRegression model
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+
+FORMAT_VERSION = 2
+
+# coefficient storage: int8 keeps one float scale per class
+DTYPES = ("float64", "float32", "int8")
+
+
+def term_hash(term):
+    """Stable 64-bit hash of a vocabulary term"""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _compile(model, dtype):
+    """(arrays, settings) describing a fitted TF-IDF + LogisticRegression pipeline"""
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {', '.join(DTYPES)}")
+    vectorizer, clf = model.steps[0][1], model.steps[-1][1]
+    if len(model.steps) != 2 or not hasattr(vectorizer, "idf_") or not hasattr(clf, "coef_"):
+        raise ValueError("expected a fitted TfidfVectorizer + LogisticRegression pipeline")
+    if (vectorizer.analyzer != "word" or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None
+            or vectorizer.strip_accents is not None or vectorizer.binary or not vectorizer.use_idf
+            or vectorizer.norm not in ("l1", "l2", None)):
+        raise ValueError("TfidfVectorizer settings not supported by the compiled scorer")
+    if getattr(clf, "multi_class", "auto") == "ovr" or clf.solver == "liblinear":
+        mode = "ovr"
+    else:
+        mode = "binary" if clf.coef_.shape[0] == 1 else "softmax"
+
+    terms = sorted(vectorizer.vocabulary_.items(), key=lambda item: item[1])
+    hashes = np.array([term_hash(term) for term, _ in terms], dtype=np.uint64)
+    order = np.argsort(hashes)
+    if len(np.unique(hashes)) != len(hashes):
+        raise ValueError("vocabulary hash collision, cannot compile")
+
+    coef = np.ascontiguousarray(clf.coef_.T, dtype=np.float64)
+    arrays = {
+        "vocab_hashes": hashes[order],
+        "vocab_features": np.array([feature for _, feature in terms], dtype=np.int32)[order],
+        "idf": np.asarray(vectorizer.idf_, dtype=np.float64 if dtype == "float64" else np.float32),
+        "intercept": np.asarray(clf.intercept_, dtype=np.float64),
+    }
+    if dtype == "int8":
+        scale = np.abs(coef).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        arrays["coef"] = np.round(coef / scale).astype(np.int8)
+        arrays["coef_scale"] = scale
+    else:
+        arrays["coef"] = coef.astype(dtype)
+    settings = {
+        "format_version": FORMAT_VERSION,
+        "dtype": dtype,
+        "classes": np.asarray(clf.classes_).astype(str).tolist(),
+        "stop_words": sorted(vectorizer.get_stop_words() or ()),
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range": list(vectorizer.ngram_range),
+        "lowercase": bool(vectorizer.lowercase),
+        "sublinear_tf": bool(vectorizer.sublinear_tf),
+        "norm": vectorizer.norm or "",
+        "mode": mode,
+    }
+    return arrays, settings
+
+
+def compile_pipeline(model, path, dtype="float64"):
+    """Write a fitted TF-IDF + LogisticRegression pipeline as plain arrays.
+
+    The vocabulary becomes a table of 64-bit term hashes sorted for binary
+    search, so no strings are needed at serving time. A path ending in .npz
+    gets a single file; any other path becomes a directory of raw .npy files
+    plus settings.json, which CompiledIntentModel maps read-only so every
+    worker on the host shares one page-cache copy. Coefficients are stored
+    as float64, float32 or int8. Only the settings the scorer reproduces are
+    accepted; anything else raises ValueError. Returns the feature count.
+    """
+    arrays, settings = _compile(model, dtype)
+    path = os.fspath(path)
+    if path.endswith(".npz"):
+        np.savez(path, settings=np.array(json.dumps(settings)), **arrays)
+        return len(arrays["vocab_hashes"])
+
+    # files mapped by running workers must never be rewritten in place, so
+    # a new directory is built aside and swapped in
+    tmp_path, old_path = f"{path}.tmp{os.getpid()}", f"{path}.old{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+    with open(os.path.join(tmp_path, "settings.json"), "w", encoding="utf-8") as f:
+        json.dump(settings, f)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return len(arrays["vocab_hashes"])
+
+
+def artifact_version(path):
+    """Short digest of a model artifact's content (a file or a compiled directory)"""
+    digest = hashlib.sha1()
+    names = sorted(os.listdir(path)) if os.path.isdir(path) else [None]
+    for name in names:
+        file_path = os.path.join(path, name) if name else path
+        digest.update(f"{name}\0".encode())
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def compiled_size(path):
+    """Bytes the compiled artifact takes on disk"""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+class _HashedVocabulary:
+    """vocabulary_.get() over the hash table, for code written against TfidfVectorizer"""
+
+    def __init__(self, scorer):
+        self.scorer = scorer
+
+    def get(self, term, default=None):
+        key = np.uint64(term_hash(term))
+        pos = int(np.searchsorted(self.scorer.keys, key))
+        if pos < len(self.scorer.keys) and self.scorer.keys[pos] == key:
+            return int(self.scorer.features[pos])
+        return default
+
+    def __len__(self):
+        return len(self.scorer.keys)
+
+
+def _row_starts(rows):
+    """Offsets where each run of equal values in the sorted rows begins"""
+    if not len(rows):
+        return rows
+    return np.concatenate(([0], np.flatnonzero(rows[1:] != rows[:-1]) + 1))
+
+
+class CompiledIntentModel:
+    """predict_proba / predict / classes_ of the pipeline compile_pipeline() wrote.
+
+    Text is analyzed like TfidfVectorizer does (lowercase, token pattern,
+    stop words, word n-grams), terms are looked up by hash, and the linear
+    model runs on the handful of features a question has.
+    """
+
+    def __init__(self, path, mmap=True):
+        if os.path.isdir(path):
+            with open(os.path.join(path, "settings.json"), encoding="utf-8") as f:
+                settings = json.load(f)
+            arrays = {name[:-4]: np.load(os.path.join(path, name), mmap_mode="r" if mmap else None)
+                      for name in os.listdir(path) if name.endswith(".npy")}
+        else:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            settings = json.loads(str(arrays.pop("settings"))) if "settings" in arrays else {}
+        if settings.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported compiled model format, compile it again")
+        self.keys = arrays["vocab_hashes"]
+        self.features = arrays["vocab_features"]
+        self.idf_ = arrays["idf"]
+        self.coef = arrays["coef"]
+        self.coef_scale = arrays.get("coef_scale")
+        self.intercept = arrays["intercept"]
+        self.classes_ = np.array(settings["classes"])
+        self.stop_words = frozenset(settings["stop_words"])
+        self.token_pattern = re.compile(settings["token_pattern"])
+        self.min_n, self.max_n = settings["ngram_range"]
+        self.lowercase = settings["lowercase"]
+        self.sublinear_tf = settings["sublinear_tf"]
+        self.norm = settings["norm"]
+        self.mode = settings["mode"]
+        self.dtype = settings["dtype"]
+        self.path = path
+        self.vocabulary_ = _HashedVocabulary(self)
+
+    def analyze(self, text):
+        """Terms of text, as TfidfVectorizer's word analyzer yields them"""
+        if self.lowercase:
+            text = text.lower()
+        tokens = [t for t in self.token_pattern.findall(text) if t not in self.stop_words]
+        if self.max_n == 1:
+            return tokens
+        terms = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), min(self.max_n, len(tokens)) + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def build_analyzer(self):
+        return self.analyze
+
+    def _vectors(self, texts):
+        """(rows, row starts, features, weights) of the batch's normalized
+        TF-IDF matrix, sorted by row then feature; texts without a known term
+        have no entries
+        """
+        terms = [self.analyze(text) for text in texts]
+        hashes = np.fromiter((term_hash(term) for row in terms for term in row), dtype=np.uint64,
+                             count=sum(map(len, terms)))
+        rows = np.repeat(np.arange(len(texts)), [len(row) for row in terms])
+        pos = np.minimum(np.searchsorted(self.keys, hashes), len(self.keys) - 1)
+        known = self.keys[pos] == hashes
+        n_features = len(self.idf_)
+        cells, counts = np.unique(rows[known] * n_features + self.features[pos[known]], return_counts=True)
+        rows, features = np.divmod(cells, n_features)
+        tf = counts.astype(np.float64)
+        if self.sublinear_tf:
+            tf = np.log(tf) + 1.0
+        weights = tf * self.idf_[features]
+        starts = _row_starts(rows)
+        if self.norm is not None and len(rows):
+            if self.norm == "l2":
+                lengths = np.sqrt(np.add.reduceat(weights * weights, starts))
+            else:
+                lengths = np.add.reduceat(np.abs(weights), starts)
+            row_lengths = np.ones(len(texts))
+            row_lengths[rows[starts]] = lengths
+            weights /= row_lengths[rows]
+        return rows, starts, features, weights
+
+    def decision_function(self, texts):
+        """Scores of the whole batch from one sparse x dense product"""
+        scores = np.tile(self.intercept, (len(texts), 1))
+        rows, starts, features, weights = self._vectors(texts)
+        if not len(rows):
+            return scores
+        products = np.add.reduceat(self.coef[features] * weights[:, None], starts, axis=0)
+        if self.coef_scale is not None:
+            products *= self.coef_scale
+        scores[rows[starts]] += products
+        return scores
+
+    def predict_proba(self, texts):
+        scores = self.decision_function(texts)
+        if self.mode == "softmax":
+            scores -= scores.max(axis=1, keepdims=True)
+            np.exp(scores, out=scores)
+            return scores / scores.sum(axis=1, keepdims=True)
+        positive = 1.0 / (1.0 + np.exp(-scores))
+        if self.mode == "binary":
+            return np.hstack([1.0 - positive, positive])
+        return positive / positive.sum(axis=1, keepdims=True)
+
+    def predict(self, texts):
+        return self.classes_[self.predict_proba(texts).argmax(axis=1)]
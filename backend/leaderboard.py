@@ -0,0 +1,208 @@
+# Leaderboard - bounded top-K scorers per tournament scope, fed from scorers
+import bisect
+import heapq
+import sqlite3
+import threading
+
+from backend.data_version import change_counter
+
+# Goals per (player, tournament edition) for scorer rows past a high-water mark
+GOALS_SINCE_SQL = """
+    SELECT s.player_id, tourn.name, tourn.season, COUNT(*) AS goals, MAX(s.id) AS last_id
+    FROM scorers s
+    LEFT JOIN matches m ON s.match_id = m.id
+    LEFT JOIN tournaments tourn ON m.tournament_id = tourn.id
+    WHERE s.id > ? AND s.player_id IS NOT NULL
+    GROUP BY s.player_id, m.tournament_id
+"""
+
+PLAYERS_SQL = """
+    SELECT p.id, p.name, t.name AS team_name
+    FROM players p
+    LEFT JOIN teams t ON p.team_id = t.id
+"""
+
+
+class ScopeBoard:
+    """Goal totals for one scope plus its best k players, kept sorted.
+
+    top is replaced rather than edited, so readers never see it half updated.
+    """
+
+    __slots__ = ("k", "goals", "top")
+
+    def __init__(self, k):
+        self.k = k
+        self.goals = {}  # player_id -> goals
+        self.top = []    # [(-goals, player_id)], best first, at most k entries
+
+    def add(self, player_id, goals):
+        old = self.goals.get(player_id, 0)
+        total = old + goals
+        if total > 0:
+            self.goals[player_id] = total
+        else:
+            self.goals.pop(player_id, None)
+
+        top = list(self.top)
+        old_key = (-old, player_id)
+        i = bisect.bisect_left(top, old_key)
+        was_top = i < len(top) and top[i] == old_key
+        if goals < 0 and was_top:
+            # someone outside the top k may now rank higher
+            self.top = heapq.nsmallest(self.k, ((-g, p) for p, g in self.goals.items()))
+            return
+        if was_top:
+            del top[i]
+        key = (-total, player_id)
+        if total > 0 and (len(top) < self.k or key < top[-1]):
+            bisect.insort(top, key)
+            del top[self.k:]
+        self.top = top
+
+
+class Leaderboard:
+    """Top scorers overall, per competition, per season and per edition.
+
+    Scopes are (tournament name, season) with None as a wildcard, so
+    (None, None) is the all-time board and ("Premier League", None) spans
+    every season of that competition. Each scope keeps its k best players
+    in sorted order, so reading the top n is a slice.
+    """
+
+    def __init__(self, k=10):
+        self.k = k
+        self.scopes = {}
+        self.players = {}  # player_id -> (name, team name)
+        self.last_scorer_id = 0
+        self.scorer_rows = 0
+        self.counter = None  # scorer_credits when the board was built
+
+    def add_goals(self, player_id, tournament=None, season=None, goals=1):
+        """Credit (or with negative goals, take back) goals in every matching scope"""
+        scopes = [(None, None)]
+        if tournament is not None:
+            scopes.append((tournament, None))
+        if season is not None:
+            scopes.append((None, season))
+        if tournament is not None and season is not None:
+            scopes.append((tournament, season))
+        for scope in scopes:
+            board = self.scopes.get(scope)
+            if board is None:
+                board = self.scopes[scope] = ScopeBoard(self.k)
+            board.add(player_id, goals)
+
+    def top(self, n=1, tournament=None, season=None):
+        """The n best scorers of a scope as dicts, best first (n is capped at k)"""
+        board = self.scopes.get((tournament, season))
+        if board is None:
+            return []
+        result = []
+        for neg_goals, player_id in board.top[:n]:
+            name, team = self.players.get(player_id, (f"Player {player_id}", None))
+            result.append({"player_id": player_id, "name": name, "team": team, "goals": -neg_goals})
+        return result
+
+    def _load_players(self, conn, ids=None):
+        if ids is None:
+            rows = conn.execute(PLAYERS_SQL).fetchall()
+        else:
+            marks = ",".join("?" * len(ids))
+            rows = conn.execute(f"{PLAYERS_SQL} WHERE p.id IN ({marks})", list(ids)).fetchall()
+        for player_id, name, team in rows:
+            self.players[player_id] = (name, team)
+
+    def is_stale(self, conn):
+        """Whether goals already credited may have changed since the board was built.
+
+        The scorer_credits change counter (see migrations) moves on updates
+        and deletes of scorers, and on changes to a match's tournament, a
+        tournament's name or season, and a player's or team's name or team.
+        Without it every check says stale.
+        """
+        counter = change_counter(conn, "scorer_credits")
+        return counter is None or counter != self.counter
+
+    def catch_up(self, conn):
+        """Fold in scorer rows added since the last call.
+
+        Only new rows are read; use is_stale() to find out whether the board
+        has to be built again instead. Returns the number of goals applied.
+        """
+        if self.counter is None:
+            # read before the rows, so a change made in between shows next time
+            self.counter = change_counter(conn, "scorer_credits")
+        if not self.players:
+            self._load_players(conn)
+
+        applied = 0
+        last_id = self.last_scorer_id
+        new_players = set()
+        for player_id, tournament, season, goals, max_id in conn.execute(GOALS_SINCE_SQL, (self.last_scorer_id,)):
+            self.add_goals(player_id, tournament, season, goals)
+            applied += goals
+            last_id = max(last_id, max_id)
+            if player_id not in self.players:
+                new_players.add(player_id)
+        if new_players:
+            self._load_players(conn, new_players)
+        self.last_scorer_id = last_id
+        self.scorer_rows += applied
+        return applied
+
+    @classmethod
+    def from_db(cls, conn, k=10):
+        board = cls(k)
+        board.catch_up(conn)
+        return board
+
+
+class LiveLeaderboard:
+    """Leaderboard that folds in new scorer rows whenever the database changes.
+
+    When credited goals changed, a new board is built and swapped in, so
+    readers keep a complete board at all times. ``connect`` opens the
+    connection to read from, db_path by default.
+    """
+
+    def __init__(self, db_path, version, k=10, connect=None):
+        self.db_path = db_path
+        self.version = version
+        self.connect = connect or (lambda: sqlite3.connect(self.db_path))
+        self.leaderboard = Leaderboard(k)
+        self._generation = None
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def get(self):
+        generation = self.version.generation()
+        if generation == self._generation:
+            return self.leaderboard
+        with self._lock:
+            if generation != self._generation:
+                conn = self.connect()
+                try:
+                    board = self.leaderboard
+                    if board.is_stale(conn):
+                        self.leaderboard = Leaderboard.from_db(conn, board.k)
+                        self.rebuilds += 1
+                        print(f"🏅 Leaderboard built from {self.leaderboard.scorer_rows} goal(s)")
+                    else:
+                        applied = board.catch_up(conn)
+                        if applied:
+                            print(f"🏅 Leaderboard caught up with {applied} goal(s)")
+                finally:
+                    conn.close()
+                self._generation = generation
+            return self.leaderboard
+
+    def stats(self):
+        board = self.leaderboard
+        return {
+            "k": board.k,
+            "scopes": len(board.scopes),
+            "scorer_rows": board.scorer_rows,
+            "last_scorer_id": board.last_scorer_id,
+            "rebuilds": self.rebuilds,
+        }
@@ -0,0 +1,315 @@
+# LLM Client - pooled, retrying OpenRouter client shared by every entry point
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# worth another attempt: rate limiting and upstream hiccups
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+class LLMError(Exception):
+    """No reply could be fetched within the latency budget"""
+
+
+class CircuitOpenError(LLMError):
+    """The breaker is open, the upstream was not called"""
+
+
+class DeadlineError(LLMError):
+    """Too little of the request's time is left to try the upstream"""
+
+
+def _percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))] if samples else 0.0
+
+
+class CircuitBreaker:
+    """Stops calling an upstream that keeps failing or answering slowly.
+
+    The outcome of the last `window` calls is kept; once at least
+    `min_calls` are in and the share of errors or of calls slower than
+    `slow_seconds` reaches its limit, the breaker opens and callers are
+    turned away without waiting. After `open_seconds` one probe call is let
+    through (half-open): a fast success closes the breaker, anything else
+    opens it again. allow() hands the probe a ticket to pass back to
+    record(); while half-open, results of calls let through before the
+    breaker opened are ignored, so only the probe decides.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, window=20, min_calls=5, error_rate=0.5, slow_seconds=5.0, slow_rate=0.5,
+                 open_seconds=30.0):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)  # (failed, slow)
+        self._opened_at = 0.0
+        self._probe_at = None
+        self._probe = None
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        """A truthy ticket when a call may go upstream now, False otherwise"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self._opened_at >= self.open_seconds:
+                self.state = self.HALF_OPEN
+                self._probe_at = self._probe = None
+            # one probe at a time; a probe that never reported is replaced
+            if self.state == self.HALF_OPEN and (self._probe_at is None
+                                                 or now - self._probe_at >= self.open_seconds):
+                self._probe_at = now
+                self._probe = object()
+                return self._probe
+            self.rejected += 1
+            return False
+
+    def record(self, failed, seconds, ticket=None):
+        slow = seconds >= self.slow_seconds
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                if ticket is None or ticket is not self._probe:
+                    return
+                self._probe = None
+                if failed or slow:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                return
+            if self.state == self.OPEN:
+                return
+            self._outcomes.append((failed, slow))
+            calls = len(self._outcomes)
+            if calls >= self.min_calls:
+                errors = sum(f for f, _ in self._outcomes)
+                slows = sum(s for _, s in self._outcomes)
+                if errors / calls >= self.error_rate or slows / calls >= self.slow_rate:
+                    self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+        print(f"⚡ LLM circuit breaker opened, retrying upstream in {self.open_seconds:.0f}s")
+
+    def stats(self):
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "recent_calls": calls,
+                "error_rate": round(sum(f for f, _ in self._outcomes) / calls, 3) if calls else 0.0,
+                "slow_rate": round(sum(s for _, s in self._outcomes) / calls, 3) if calls else 0.0,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class LLMClient:
+    """Chat completions over one keep-alive session.
+
+    Connections are pooled per host, so only the first fallback pays the TCP
+    and TLS handshake. Connect and read timeouts are separate, and failed
+    attempts (connection errors, timeouts, 429/5xx) are retried with full
+    jitter until the retries or the overall budget run out, whichever comes
+    first. The read timeout applies per socket read, so the budget is also
+    used to shorten each attempt's timeouts.
+
+    Calls fail fast with CircuitOpenError while the breaker is open, and
+    with DeadlineError when the caller's deadline (a time.monotonic()
+    value) leaves less than min_seconds for the upstream. Without a breaker,
+    calls slower than slow_seconds (default 0.8 x the read timeout) count
+    against the default one.
+    """
+
+    def __init__(self, api_key, model, url=OPENROUTER_URL, connect_timeout=3.05, read_timeout=10.0,
+                 budget_seconds=12.0, retries=2, backoff=0.25, pool_size=None, breaker=None,
+                 min_seconds=1.0, slow_seconds=None):
+        self.api_key = api_key
+        self.model = model
+        self.url = url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.budget_seconds = budget_seconds
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker(slow_seconds=slow_seconds or read_timeout * 0.8)
+        self.min_seconds = min_seconds
+        pool_size = pool_size or int(os.environ.get("LLM_POOL_SIZE", 10))
+        self.session = requests.Session()
+        # retries are ours, so they respect the budget
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._first_tokens = deque(maxlen=1000)  # streamed calls only
+        self.calls = 0
+        self.failures = 0
+        self.attempts = 0
+        self.retried = 0
+        self.skipped = 0
+        self.last = None
+
+    def chat(self, messages, max_tokens=150, temperature=0.7, budget_seconds=None, retries=None, deadline=None):
+        """Reply text of the first choice (may be empty); raises LLMError"""
+        payload = {"model": self.model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+        start, deadline, ticket = self._admit(budget_seconds, deadline)
+        response, attempt_start, retried = self._send(payload, start, deadline, ticket, retries)
+        try:
+            reply = (response.json()["choices"][0]["message"]["content"] or "").strip()
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self._record(start, attempt_start, retried, f"malformed reply: {e}", ticket=ticket)
+            raise LLMError(f"malformed reply: {e}")
+        self._record(start, attempt_start, retried, None, ticket=ticket)
+        return reply
+
+    def stream_chat(self, messages, max_tokens=150, temperature=0.7, budget_seconds=None, retries=None,
+                    deadline=None):
+        """Yield reply text as the server streams it; raises LLMError.
+
+        Attempts are retried only until the response starts, so no text is
+        ever sent twice, and the budget bounds the wait for the first token.
+        """
+        payload = {"model": self.model, "messages": messages, "max_tokens": max_tokens,
+                   "temperature": temperature, "stream": True}
+        start, deadline, ticket = self._admit(budget_seconds, deadline)
+        response, attempt_start, retried = self._send(payload, start, deadline, ticket, retries, stream=True)
+        first_token = error = None
+        try:
+            # OpenRouter sends "data: {chunk}" lines, ": comment" keep-alives
+            # while the model is queued, and "data: [DONE]" at the end
+            for line in response.iter_lines(decode_unicode=True):
+                if first_token is None and time.monotonic() > deadline:
+                    error = "no tokens within the budget"
+                    raise LLMError(error)
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError:
+                    continue
+                if "error" in chunk:
+                    error = f"stream error: {chunk['error']}"
+                    raise LLMError(error)
+                try:
+                    text = chunk["choices"][0]["delta"].get("content")
+                except (KeyError, IndexError, TypeError, AttributeError):
+                    continue
+                if text:
+                    if first_token is None:
+                        first_token = time.monotonic() - start
+                    yield text
+        except requests.exceptions.RequestException as e:
+            error = f"stream interrupted: {type(e).__name__}: {e}"
+            raise LLMError(error)
+        finally:
+            response.close()
+            self._record(start, attempt_start, retried, error, first_token, ticket)
+
+    def _admit(self, budget_seconds, deadline):
+        """(start, deadline, breaker ticket) of a call allowed to go upstream; raises LLMError otherwise"""
+        start = time.monotonic()
+        end = start + (budget_seconds or self.budget_seconds)
+        if deadline is not None and deadline < end:
+            end = deadline
+        if end - start < self.min_seconds:
+            with self._lock:
+                self.skipped += 1
+            raise DeadlineError(f"only {max(end - start, 0.0):.2f}s left for the LLM")
+        ticket = self.breaker.allow()
+        if not ticket:
+            raise CircuitOpenError("circuit breaker open")
+        return start, end, ticket
+
+    def _send(self, payload, start, deadline, ticket, retries=None, stream=False):
+        """(response, attempt start, retries used) of the first 200 answer"""
+        retries = self.retries if retries is None else retries
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            timeout = (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+            attempt_start = time.monotonic()
+            retry_after = None
+            try:
+                response = self.session.post(self.url, json=payload, timeout=timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error, retryable = f"{type(e).__name__}: {e}", True
+            except requests.exceptions.RequestException as e:
+                error, retryable = f"{type(e).__name__}: {e}", False
+            else:
+                if response.status_code == 200:
+                    return response, attempt_start, attempt
+                error, retryable = f"HTTP {response.status_code}", response.status_code in RETRY_STATUSES
+                retry_after = response.headers.get("Retry-After")
+                response.close()
+
+            attempt += 1
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            if not retryable or attempt > retries or time.monotonic() + delay >= deadline:
+                self._record(start, attempt_start, attempt - 1, error, ticket=ticket)
+                raise LLMError(f"{error} after {attempt} attempt(s)")
+            time.sleep(delay)
+
+    def _record(self, start, attempt_start, retries, error, first_token=None, ticket=None):
+        now = time.monotonic()
+        # a stream is judged by how soon it starts, not by how long the reply is
+        self.breaker.record(error is not None, first_token if first_token is not None else now - start, ticket)
+        with self._lock:
+            self.calls += 1
+            self.attempts += retries + 1
+            self.retried += retries
+            self.failures += error is not None
+            self._latencies.append(now - start)
+            if first_token is not None:
+                self._first_tokens.append(first_token)
+            self.last = {"total_ms": round((now - start) * 1000, 1),
+                         "last_attempt_ms": round((now - attempt_start) * 1000, 1),
+                         "first_token_ms": round(first_token * 1000, 1) if first_token is not None else None,
+                         "attempts": retries + 1, "error": error}
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            first_tokens = list(self._first_tokens)
+            return {
+                "model": self.model,
+                "calls": self.calls,
+                "failures": self.failures,
+                "attempts": self.attempts,
+                "retries": self.retried,
+                "skipped_for_deadline": self.skipped,
+                "avg_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+                "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+                "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+                "first_token_p50_ms": round(_percentile(first_tokens, 50) * 1000, 1),
+                "first_token_p95_ms": round(_percentile(first_tokens, 95) * 1000, 1),
+                "last": self.last,
+                "breaker": self.breaker.stats(),
+            }
@@ -0,0 +1,103 @@
+# Match Facts - one cached record per team pair shared by the match intents
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.queries import LATEST_MATCH_FACTS, MATCH_PAIR_VERSION
+
+MATCH_FIELDS = ("match_id", "home_team", "away_team", "home_score", "away_score",
+                "match_date", "stadium", "tournament", "season")
+
+
+class MatchFactsService:
+    """Load the latest match for a team pair once and serve every intent from it.
+
+    Entries are tagged with the pair's row in match_pair_versions, which the
+    migration-4 triggers bump whenever that pair's matches or scorers change.
+    While the database is untouched a hit costs no query at all; after any
+    commit, each pair re-checks its version with one primary-key lookup and
+    reloads only if its own matches changed.
+    """
+
+    def __init__(self, get_conn, data_version, max_pairs=4096):
+        self.get_conn = get_conn
+        self.data_version = data_version
+        self.max_pairs = max_pairs
+        self._entries = OrderedDict()  # pair -> [facts, pair_version, generation]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def _pair_version(self, conn, pair):
+        try:
+            row = conn.execute(MATCH_PAIR_VERSION, pair).fetchone()
+        except sqlite3.OperationalError:
+            return None  # unmigrated database: reload on every data change
+        return row[0] if row else 0
+
+    def _load(self, conn, pair):
+        rows = conn.execute(LATEST_MATCH_FACTS, pair).fetchall()
+        if not rows:
+            return None
+        facts = {field: rows[0][field] for field in MATCH_FIELDS}
+        facts["scorers"] = [
+            {"name": r["scorer"], "minute": r["minute"], "team": r["scorer_team"]}
+            for r in rows if r["scorer"] is not None
+        ]
+        return facts
+
+    def latest(self, pair):
+        """Facts for the most recent match of a canonical (lo, hi) pair, or None"""
+        generation = self.data_version.generation()
+        with self._lock:
+            entry = self._entries.get(pair)
+            if entry is not None:
+                self._entries.move_to_end(pair)
+                if entry[2] == generation:
+                    self.hits += 1
+                    return entry[0]
+
+        conn = self.get_conn()
+        version = self._pair_version(conn, pair)
+        if entry is not None and version is not None and entry[1] == version:
+            with self._lock:
+                entry[2] = generation
+                self.revalidations += 1
+                self.hits += 1
+            return entry[0]
+
+        facts = self._load(conn, pair)
+        with self._lock:
+            self.misses += 1
+            self._entries[pair] = [facts, version, generation]
+            self._entries.move_to_end(pair)
+            while len(self._entries) > self.max_pairs:
+                self._entries.popitem(last=False)
+        return facts
+
+    def invalidate_pair(self, pair):
+        with self._lock:
+            self._entries.pop(pair, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "pairs_cached": len(self._entries),
+            "max_pairs": self.max_pairs,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
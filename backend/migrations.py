@@ -0,0 +1,377 @@
+# Versioned schema migrations, applied automatically on backend startup
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.head_to_head import create_head_to_head
+from backend.head_to_head import create_triggers as create_head_to_head_triggers
+from backend.head_to_head import rebuild as rebuild_head_to_head
+from backend.queries import HOT_QUERIES
+
+
+def _columns(conn, table):
+    # table_xinfo also lists generated columns
+    return {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+
+
+def _skipped(message):
+    """Report a step whose prerequisites are missing; its migration stays pending"""
+    print(f"⚠️ Skipping {message}")
+    return False
+
+
+def create_index(name, table, columns, unique=False):
+    """Migration step that creates an index if its table and columns exist.
+
+    Older databases in the wild do not all have the full enhanced schema, so
+    an index over missing columns is skipped rather than failing startup.
+    """
+    def step(conn):
+        existing = _columns(conn, table)
+        needed = [c.split()[0] for c in columns]
+        missing = [c for c in needed if c not in existing]
+        if missing:
+            return _skipped(f"{name}: {table} has no column(s) {', '.join(missing)}")
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        conn.execute(f"CREATE {kind} IF NOT EXISTS {name} ON {table}({', '.join(columns)})")
+    step.__doc__ = f"index {name}"
+    return step
+
+
+def add_generated_column(table, column, expression, requires):
+    """Migration step that adds a VIRTUAL generated column if it is missing"""
+    def step(conn):
+        existing = _columns(conn, table)
+        if column in existing:
+            return
+        missing = [c for c in requires if c not in existing]
+        if missing:
+            return _skipped(f"{table}.{column}: {table} has no column(s) {', '.join(missing)}")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER "
+                     f"GENERATED ALWAYS AS ({expression}) VIRTUAL")
+    step.__doc__ = f"column {table}.{column}"
+    return step
+
+
+def drop_index(name):
+    def step(conn):
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    step.__doc__ = f"drop {name}"
+    return step
+
+
+def _bump_pair(alias):
+    return (f"INSERT INTO match_pair_versions (pair_lo, pair_hi, version) "
+            f"SELECT {alias}.pair_lo, {alias}.pair_hi, 1 WHERE {alias}.pair_lo IS NOT NULL "
+            f"ON CONFLICT (pair_lo, pair_hi) DO UPDATE SET version = version + 1;")
+
+
+def _bump_pair_of_match(alias):
+    return (f"INSERT INTO match_pair_versions (pair_lo, pair_hi, version) "
+            f"SELECT pair_lo, pair_hi, 1 FROM matches "
+            f"WHERE id = {alias}.match_id AND pair_lo IS NOT NULL "
+            f"ON CONFLICT (pair_lo, pair_hi) DO UPDATE SET version = version + 1;")
+
+
+PAIR_VERSION_TRIGGERS = {
+    "trg_pair_version_match_insert": ("AFTER INSERT ON matches",
+                                      [_bump_pair("NEW")]),
+    "trg_pair_version_match_update": ("AFTER UPDATE ON matches",
+                                      [_bump_pair("OLD"), _bump_pair("NEW")]),
+    "trg_pair_version_match_delete": ("AFTER DELETE ON matches",
+                                      [_bump_pair("OLD")]),
+    "trg_pair_version_scorer_insert": ("AFTER INSERT ON scorers",
+                                       [_bump_pair_of_match("NEW")]),
+    "trg_pair_version_scorer_update": ("AFTER UPDATE ON scorers",
+                                       [_bump_pair_of_match("OLD"), _bump_pair_of_match("NEW")]),
+    "trg_pair_version_scorer_delete": ("AFTER DELETE ON scorers",
+                                       [_bump_pair_of_match("OLD")]),
+}
+
+
+def bump_all_pair_versions(conn):
+    """Mark every team pair as changed, e.g. after loading with triggers off"""
+    conn.execute("""
+        INSERT INTO match_pair_versions (pair_lo, pair_hi, version)
+        SELECT DISTINCT pair_lo, pair_hi, 1 FROM matches WHERE pair_lo IS NOT NULL
+        ON CONFLICT (pair_lo, pair_hi) DO UPDATE SET version = version + 1
+    """)
+
+
+def pair_version_triggers(conn):
+    """Per-pair change counter kept current by triggers on matches and scorers"""
+    if "pair_lo" not in _columns(conn, "matches") or not _columns(conn, "scorers"):
+        return _skipped("match_pair_versions: matches has no pair key")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS match_pair_versions (
+            pair_lo INTEGER NOT NULL,
+            pair_hi INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (pair_lo, pair_hi)
+        ) WITHOUT ROWID
+    """)
+    for name, (event, body) in PAIR_VERSION_TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {' '.join(body)} END")
+
+
+def change_counter(counter, events):
+    """Migration step: a row of change_counters bumped by triggers.
+
+    events are (table, event) pairs such as ("teams", "UPDATE OF name"), or
+    (table, event, condition) to bump only when the condition holds;
+    caches read the counter with data_version.change_counter().
+    """
+    def step(conn):
+        missing = sorted({table for table, *_ in events if not _columns(conn, table)})
+        if missing:
+            return _skipped(f"change counter {counter}: no table(s) {', '.join(missing)}")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS change_counters (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+        conn.execute("INSERT OR IGNORE INTO change_counters (name, version) VALUES (?, 0)", (counter,))
+        for table, event, *condition in events:
+            trigger = f"trg_{counter}_{table}_{event.split()[0].lower()}"
+            when = f" WHEN {condition[0]}" if condition else ""
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event} ON {table}{when} BEGIN "
+                         f"UPDATE change_counters SET version = version + 1 WHERE name = '{counter}'; END")
+    step.__doc__ = f"change counter {counter}"
+    return step
+
+
+def head_to_head_table(conn):
+    """Per-pair head-to-head summary maintained by triggers on matches"""
+    if "pair_lo" not in _columns(conn, "matches") or not _columns(conn, "tournaments"):
+        return _skipped("head_to_head: matches has no pair key")
+    create_head_to_head(conn)
+
+
+def head_to_head_season_triggers(conn):
+    """Triggers moving a tournament's matches between season rows, then a
+    rebuild to repair seasons edited before they existed"""
+    if not _columns(conn, "head_to_head"):
+        return _skipped("head_to_head season triggers: no head_to_head table")
+    create_head_to_head_triggers(conn)
+    rebuild_head_to_head(conn)
+
+
+# every table a precomputed answer is read from (see backend/precompute.py)
+ANSWER_INPUT_TABLES = ("teams", "players", "tournaments", "team_standings", "matches", "scorers")
+
+
+# (version, name, steps) - append only, never edit a released migration.
+# Steps must be safe to run again: a step returns False when its tables or
+# columns are missing, and its migration is then retried on the next start.
+MIGRATIONS = [
+    (1, "lookup indexes", [
+        create_index("idx_teams_name", "teams", ["name"]),
+        create_index("idx_matches_teams", "matches", ["home_team_id", "away_team_id"]),
+        create_index("idx_matches_date", "matches", ["match_date"]),
+        create_index("idx_players_team", "players", ["team_id"]),
+        create_index("idx_players_name", "players", ["name"]),
+        create_index("idx_scorers_match", "scorers", ["match_id"]),
+        create_index("idx_scorers_player", "scorers", ["player_id"]),
+        create_index("idx_standings_team", "team_standings", ["team_id"]),
+        create_index("idx_standings_tournament", "team_standings", ["tournament_id"]),
+    ]),
+    (2, "covering indexes for hot handler queries", [
+        # team-pair lookups from either side, answered from the index alone
+        create_index("idx_matches_home_cover", "matches", ["home_team_id", "away_team_id", "match_date"]),
+        create_index("idx_matches_away_cover", "matches", ["away_team_id", "home_team_id", "match_date"]),
+        create_index("idx_scorers_match_cover", "scorers", ["match_id", "minute", "player_id"]),
+        create_index("idx_players_goals_cover", "players", ["goals", "team_id", "name", "position"]),
+        create_index("idx_standings_team_points", "team_standings", ["team_id", "points"]),
+        # superseded by the covering indexes above
+        drop_index("idx_matches_teams"),
+        drop_index("idx_scorers_match"),
+        drop_index("idx_standings_team"),
+    ]),
+    (3, "canonical team-pair key on matches", [
+        # (pair_lo, pair_hi) is the same for A-vs-B and B-vs-A, so a team-pair
+        # lookup is one seek instead of an OR over both orientations
+        add_generated_column("matches", "pair_lo", "MIN(home_team_id, away_team_id)",
+                             requires=["home_team_id", "away_team_id"]),
+        add_generated_column("matches", "pair_hi", "MAX(home_team_id, away_team_id)",
+                             requires=["home_team_id", "away_team_id"]),
+        create_index("idx_matches_pair_date", "matches", ["pair_lo", "pair_hi", "match_date DESC"]),
+        drop_index("idx_matches_home_cover"),
+        drop_index("idx_matches_away_cover"),
+    ]),
+    (4, "per-pair match versions for the match facts cache", [
+        pair_version_triggers,
+    ]),
+    (5, "incrementally maintained head_to_head summary", [
+        head_to_head_table,
+    ]),
+    (6, "change counter for the entity names the gazetteer matches", [
+        change_counter("entity_names", [(table, event) for table in ("teams", "players", "tournaments")
+                                        for event in ("INSERT", "DELETE", "UPDATE OF name")]),
+    ]),
+    (7, "change counter for goals already credited on the leaderboard", [
+        # new scorer rows are folded in incrementally; anything that changes
+        # a credited goal, its scope or the name shown next to it bumps this
+        change_counter("scorer_credits", [
+            ("scorers", "UPDATE"),
+            ("scorers", "DELETE"),
+            ("matches", "UPDATE OF tournament_id", "OLD.tournament_id IS NOT NEW.tournament_id"),
+            ("matches", "DELETE"),
+            ("tournaments", "UPDATE OF name, season", "OLD.name IS NOT NEW.name OR OLD.season IS NOT NEW.season"),
+            ("tournaments", "DELETE"),
+            ("players", "UPDATE OF name, team_id", "OLD.name IS NOT NEW.name OR OLD.team_id IS NOT NEW.team_id"),
+            ("players", "DELETE"),
+            ("teams", "UPDATE OF name", "OLD.name IS NOT NEW.name"),
+        ]),
+    ]),
+    (8, "change counter for the data precomputed answers are built from", [
+        change_counter("answer_inputs", [(table, event) for table in ANSWER_INPUT_TABLES
+                                         for event in ("INSERT", "UPDATE", "DELETE")]),
+    ]),
+    (9, "head_to_head follows tournament season edits", [
+        head_to_head_season_triggers,
+    ]),
+]
+
+LATEST_VERSION = max(version for version, _, _ in MIGRATIONS)
+
+
+def applied_versions(conn):
+    """Versions recorded in schema_migrations"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    return {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def pending_versions(conn, migrations=MIGRATIONS):
+    """Versions of migrations not (fully) applied yet"""
+    applied = applied_versions(conn)
+    return [version for version, _, _ in sorted(migrations, key=lambda m: m[0]) if version not in applied]
+
+
+def apply_migrations(db_path, migrations=MIGRATIONS):
+    """Apply every missing migration; safe to call on every startup.
+
+    Each migration runs in its own BEGIN IMMEDIATE transaction, so several
+    workers starting at once serialize and only the first one does the work.
+    A migration is recorded only when every step ran; one with skipped steps
+    keeps what it could do and stays pending, so it is finished on a later
+    start once the missing tables exist. user_version is the highest
+    version up to which every migration is applied.
+    Returns the list of versions applied by this call.
+    """
+    if not os.path.exists(db_path):
+        print(f"⚠️ Database {db_path} not found, skipping migrations")
+        return []
+
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    applied_now = []
+    try:
+        applied_versions(conn)
+        for version, name, steps in sorted(migrations, key=lambda m: m[0]):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if version in applied_versions(conn):
+                    conn.execute("COMMIT")
+                    continue
+                complete = True
+                for step in steps:
+                    if callable(step):
+                        complete = step(conn) is not False and complete
+                    else:
+                        conn.execute(step)
+                if complete:
+                    conn.execute(
+                        "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                        (version, name, datetime.now().isoformat(timespec="seconds")),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if complete:
+                applied_now.append(version)
+                print(f"✅ Applied migration {version}: {name}")
+            else:
+                print(f"⏳ Migration {version} ({name}) left pending until its tables exist")
+        applied = applied_versions(conn)
+        current = 0
+        while current + 1 in applied:
+            current += 1
+        conn.execute(f"PRAGMA user_version = {current}")
+    finally:
+        conn.close()
+    return applied_now
+
+
+def schema_version(conn):
+    """Highest applied migration version (0 for an unmigrated database)"""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def check_query_plans(conn, queries=None):
+    """EXPLAIN QUERY PLAN every hot query and report table scans.
+
+    Returns a list of (query name, plan detail) for each step that scans a
+    table or fails to prepare; an empty list means every lookup is an index
+    or primary-key search.
+    """
+    problems = []
+    for name, (sql, params) in (queries or HOT_QUERIES).items():
+        try:
+            plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        except sqlite3.Error as e:
+            problems.append((name, f"error: {e}"))
+            continue
+        for row in plan:
+            detail = row[-1]
+            if detail.startswith("SCAN"):
+                problems.append((name, detail))
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply schema migrations and check query plans")
+    parser.add_argument("--db", default="db.sqlite3", help="path to the SQLite database")
+    parser.add_argument("--check", action="store_true",
+                        help="fail if any hot handler query falls back to a table scan")
+    args = parser.parse_args(argv)
+
+    applied = apply_migrations(args.db)
+    conn = sqlite3.connect(args.db)
+    try:
+        print(f"🗃️ Schema version {schema_version(conn)} ({len(applied)} migration(s) applied now)")
+        pending = pending_versions(conn)
+        if pending:
+            print(f"⏳ Pending migration(s): {', '.join(map(str, pending))}")
+        if args.check:
+            problems = check_query_plans(conn)
+            problems += [(f"migration {version}", "pending") for version in pending]
+            for name, detail in problems:
+                print(f"❌ {name}: {detail}")
+            if problems:
+                return 1
+            print(f"✅ All {len(HOT_QUERIES)} hot queries use index lookups")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,80 +1,380 @@
 # Performance Optimization and Caching Implementation
+import os
+import sys
 import time
 import json
 import hashlib
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from datetime import datetime, timedelta
 
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.gazetteer import normalize
+
+# "memory" keeps a cache per process; "sqlite" shares one file between every
+# worker on the host
+CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+SHARED_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH",
+                                   os.path.join(tempfile.gettempdir(), "sports_chatbot_cache.sqlite3"))
+
+def estimate_size(obj):
+    """Rough deep size in bytes of a cached key or value"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in obj)
+    return size
+
+
 class ResponseCache:
-    """Simple in-memory cache for API responses"""
+    """In-memory LRU cache with a TTL, O(1) per get/set.
+
+    Keys combine the normalized text with whatever else decides the answer
+    (intent, resolved entities, the database generation), so a new data load
+    simply makes old entries unreachable until they age out.
+    """
     
     def __init__(self, max_size=1000, ttl_seconds=3600):
-        self.cache = {}
+        self.cache = OrderedDict()  # key -> (response, expires_at, size), oldest first
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
-        self.access_times = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bytes = 0
     
-    def _generate_key(self, text, intent=None):
+    def _generate_key(self, text, intent=None, entities=(), version=None):
         """Generate cache key from input"""
-        key_data = f"{text.lower().strip()}{intent or ''}"
+        key_data = json.dumps([normalize(text), intent, list(entities), version], default=str)
         return hashlib.md5(key_data.encode()).hexdigest()
     
-    def get(self, text, intent=None):
-        """Get cached response"""
-        key = self._generate_key(text, intent)
-        
-        if key in self.cache:
-            cached_item = self.cache[key]
-            
-            # Check if expired
-            if datetime.now() - cached_item['timestamp'] < timedelta(seconds=self.ttl_seconds):
-                self.access_times[key] = datetime.now()
-                print(f"💾 Cache HIT for: {text[:30]}...")
-                return cached_item['response']
-            else:
-                # Expired
-                del self.cache[key]
-                if key in self.access_times:
-                    del self.access_times[key]
-        
-        print(f"💾 Cache MISS for: {text[:30]}...")
-        return None
+    def _drop(self, key):
+        _, _, size = self.cache.pop(key)
+        self.bytes -= size
     
-    def set(self, text, response, intent=None):
-        """Cache response"""
-        key = self._generate_key(text, intent)
-        
-        # Implement LRU eviction if cache is full
-        if len(self.cache) >= self.max_size:
-            # Remove oldest accessed item
-            oldest_key = min(self.access_times.keys(), 
-                           key=lambda k: self.access_times[k])
-            del self.cache[oldest_key]
-            del self.access_times[oldest_key]
-        
-        self.cache[key] = {
-            'response': response,
-            'timestamp': datetime.now()
-        }
-        self.access_times[key] = datetime.now()
-        print(f"💾 Cached response for: {text[:30]}...")
+    def get(self, text, intent=None, entities=(), version=None):
+        """Get cached response (None on a miss)"""
+        key = self._generate_key(text, intent, entities, version)
+        now = time.monotonic()
+        with self._lock:
+            item = self.cache.get(key)
+            if item is not None:
+                if item[1] > now:
+                    self.cache.move_to_end(key)
+                    self.hits += 1
+                    return item[0]
+                self._drop(key)
+                self.expirations += 1
+            self.misses += 1
+            return None
+    
+    def set(self, text, response, intent=None, entities=(), version=None, ttl_seconds=None):
+        """Cache response, evicting the least recently used entry when full"""
+        key = self._generate_key(text, intent, entities, version)
+        size = estimate_size(key) + estimate_size(response)
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if key in self.cache:
+                self._drop(key)
+            self.cache[key] = (response, time.monotonic() + ttl, size)
+            self.bytes += size
+            while len(self.cache) > self.max_size:
+                oldest = next(iter(self.cache))
+                self._drop(oldest)
+                self.evictions += 1
+    
+    def _entries(self, conn):
+        return conn.execute(f"SELECT entries FROM {self.table}_size").fetchone()[0]
     
     def clear(self):
         """Clear all cache"""
-        self.cache.clear()
-        self.access_times.clear()
+        with self._lock:
+            self.cache.clear()
+            self.bytes = 0
         print("💾 Cache cleared")
     
     def stats(self):
         """Get cache statistics"""
+        lookups = self.hits + self.misses
         return {
             'size': len(self.cache),
             'max_size': self.max_size,
-            'ttl_seconds': self.ttl_seconds
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'memory_bytes': self.bytes,
+            'backend': 'memory',
         }
 
+class SharedResponseCache(ResponseCache):
+    """ResponseCache stored in an SQLite file that several processes share.
+
+    Values must be JSON-serializable. Entries carry their expiry and last-use
+    time; when a write takes the table over max_size, expired entries go
+    first and then the least recently used ones. The entry count that check
+    reads is kept by triggers in a one-row {table}_size table, so writes
+    never count the table. Hit and miss counters are per process, size and
+    memory figures describe the shared file.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS {table} (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            size INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_{table}_last_used ON {table} (last_used);
+        CREATE TABLE IF NOT EXISTS {table}_size (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            entries INTEGER NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_size_insert AFTER INSERT ON {table}
+        BEGIN UPDATE {table}_size SET entries = entries + 1; END;
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_size_delete AFTER DELETE ON {table}
+        BEGIN UPDATE {table}_size SET entries = entries - 1; END;
+    """
+    
+    def __init__(self, path, max_size=1000, ttl_seconds=3600, table="response_cache"):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        self._connect()
+    
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # the count is seeded once, in the transaction that adds its triggers
+            conn.executescript(f"""
+                BEGIN IMMEDIATE;
+                {self.SCHEMA.format(table=self.table)}
+                INSERT OR IGNORE INTO {self.table}_size (id, entries) SELECT 0, COUNT(*) FROM {self.table};
+                COMMIT;
+            """)
+            self._local.conn = conn
+        return conn
+    
+    def get(self, text, intent=None, entities=(), version=None):
+        """Get cached response (None on a miss)"""
+        key = self._generate_key(text, intent, entities, version)
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(f"SELECT value, expires_at, last_used FROM {self.table} WHERE key = ?",
+                           (key,)).fetchone()
+        if row is not None:
+            value, expires_at, last_used = row
+            if expires_at > now:
+                # recency only matters at eviction, so refresh it coarsely
+                if now - last_used > 1.0:
+                    conn.execute(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return json.loads(value)
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ? AND expires_at <= ?", (key, now))
+            self.expirations += 1
+        self.misses += 1
+        return None
+    
+    def set(self, text, response, intent=None, entities=(), version=None, ttl_seconds=None):
+        """Cache response, evicting expired then least recently used entries when full"""
+        key = self._generate_key(text, intent, entities, version)
+        value = json.dumps(response)
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # an upsert, not INSERT OR REPLACE: replacing would skip the delete trigger
+            conn.execute(f"INSERT INTO {self.table} (key, value, expires_at, last_used, size) "
+                         "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+                         "expires_at = excluded.expires_at, last_used = excluded.last_used, size = excluded.size",
+                         (key, value, now + ttl, now, len(key) + len(value)))
+            excess = self._entries(conn) - self.max_size
+            if excess > 0:
+                self.expirations += conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,)).rowcount
+                excess = self._entries(conn) - self.max_size
+            if excess > 0:
+                self.evictions += conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY last_used LIMIT ?)", (excess,)).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _entries(self, conn):
+        return conn.execute(f"SELECT entries FROM {self.table}_size").fetchone()[0]
+    
+    def clear(self):
+        """Clear all cache"""
+        self._connect().execute(f"DELETE FROM {self.table}")
+        print("💾 Cache cleared")
+    
+    def stats(self):
+        """Get cache statistics"""
+        stats = super().stats()
+        size, nbytes = self._connect().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        stats.update({'backend': 'sqlite', 'path': self.path, 'size': size, 'memory_bytes': nbytes})
+        return stats
+
+
+def create_cache(max_size, ttl_seconds, backend=None, path=None, table="response_cache"):
+    """Build the cache selected by RESPONSE_CACHE_BACKEND (or backend)"""
+    backend = backend or CACHE_BACKEND
+    if backend == "sqlite":
+        try:
+            return SharedResponseCache(path or SHARED_CACHE_PATH, max_size, ttl_seconds, table)
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not open shared cache at {path or SHARED_CACHE_PATH}, using memory: {e}")
+    elif backend != "memory":
+        print(f"⚠️ Unknown cache backend {backend!r}, using memory")
+    return ResponseCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for it and get the same result (or exception).
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        self.coalesced = 0
+    
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = func(*args, **kwargs)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+    
+    def stats(self):
+        return {
+            'upstream_calls': self.calls,
+            'saved_calls': self.coalesced,
+            'in_flight': len(self._flights),
+        }
+
+class QueueFullError(RuntimeError):
+    """The executor's queue is at its limit"""
+
+
+class BoundedExecutor:
+    """Thread pool with a capped queue for slow calls made on behalf of requests.
+
+    At most `workers` calls run at once and `max_queue` more may wait; past
+    that submit() raises QueueFullError straight away, so a burst of slow
+    work can never hold more than workers + max_queue request threads.
+    """
+    
+    def __init__(self, workers=4, max_queue=16, name="executor"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=1000)
+        self.queued = 0
+        self.running = 0
+        self.submitted = 0
+        self.rejected = 0
+    
+    def submit(self, func, *args, **kwargs):
+        """Future of func(*args, **kwargs); raises QueueFullError when full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise QueueFullError(f"{self.workers} running and {self.max_queue} queued")
+        enqueued = time.monotonic()
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+        
+        def run():
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self._waits.append(time.monotonic() - enqueued)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                self._slots.release()
+        
+        try:
+            return self._pool.submit(run)
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise
+    
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'queue_length': self.queued,
+                'running': self.running,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                'p95_wait_ms': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2) if waits else 0.0,
+                'max_wait_ms': round(waits[-1] * 1000, 2) if waits else 0.0,
+            }
+
 # Global cache instances
-response_cache = ResponseCache(max_size=500, ttl_seconds=1800)  # 30 minutes
+response_cache = create_cache(max_size=500, ttl_seconds=1800)  # 30 minutes
 model_cache = ResponseCache(max_size=200, ttl_seconds=3600)     # 1 hour
 
 def cache_response(cache_type='response'):
@@ -170,45 +470,22 @@ def timed_request(func):
 
 # Database query optimization
 class QueryOptimizer:
-    """Optimize database queries with indexing suggestions"""
+    """Thin wrapper over the versioned migrations in backend/migrations.py"""
     
     @staticmethod
     def suggest_indexes():
-        """Suggest database indexes for better performance"""
-        suggestions = [
-            "CREATE INDEX IF NOT EXISTS idx_matches_teams ON matches(home_team_id, away_team_id);",
-            "CREATE INDEX IF NOT EXISTS idx_matches_date ON matches(match_date);",
-            "CREATE INDEX IF NOT EXISTS idx_players_team ON players(team_id);",
-            "CREATE INDEX IF NOT EXISTS idx_players_name ON players(name);",
-            "CREATE INDEX IF NOT EXISTS idx_scorers_match ON scorers(match_id);",
-            "CREATE INDEX IF NOT EXISTS idx_scorers_player ON scorers(player_id);",
-            "CREATE INDEX IF NOT EXISTS idx_standings_team ON team_standings(team_id);",
-            "CREATE INDEX IF NOT EXISTS idx_standings_tournament ON team_standings(tournament_id);"
-        ]
-        return suggestions
+        """Describe the index migrations that the backend applies on startup"""
+        from backend.migrations import MIGRATIONS
+        return [f"{version}: {name}" for version, name, _ in MIGRATIONS]
     
     @staticmethod
     def apply_indexes(db_path):
-        """Apply suggested indexes to database"""
-        import sqlite3
-        
-        suggestions = QueryOptimizer.suggest_indexes()
+        """Apply any missing index migrations to the database"""
+        from backend.migrations import apply_migrations
         
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            for index_sql in suggestions:
-                try:
-                    cursor.execute(index_sql)
-                    print(f"✅ Applied: {index_sql}")
-                except Exception as e:
-                    print(f"⚠️ Could not apply: {index_sql} - {e}")
-            
-            conn.commit()
-            conn.close()
-            print("🚀 Database optimization completed!")
-            
+            applied = apply_migrations(db_path)
+            print(f"🚀 Database optimization completed! ({len(applied)} migration(s) applied)")
         except Exception as e:
             print(f"❌ Database optimization failed: {e}")
 
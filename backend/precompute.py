@@ -0,0 +1,321 @@
+# Precomputed Answers - structured answers for every known entity, built after each data load
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.data_version import change_counter
+from backend.db_pool import ConnectionPool
+from backend.migrations import ANSWER_INPUT_TABLES
+
+# Intents whose answer depends only on the entities named in the question
+# (plus the season for head_to_head), keyed by the entity ids in mention order
+PAIR_INTENTS = ("score", "stadium", "scorers", "date", "tournament", "head_to_head")
+TEAM_INTENTS = ("team_ranking", "next_match")
+PLAYER_INTENTS = ("player_stats",)
+
+# backend.app handlers taking the list of team names
+TEAM_HANDLERS = {
+    "score": "handle_score_intent",
+    "stadium": "handle_stadium_intent",
+    "scorers": "handle_scorers_intent",
+    "date": "handle_date_intent",
+    "tournament": "handle_tournament_intent",
+    "team_ranking": "handle_team_ranking_intent",
+    "next_match": "handle_next_match_intent",
+}
+
+# small tables are hashed in full; for the big ones the per-pair change
+# counters kept by triggers (migration 4) stand in for their content
+FINGERPRINT_TABLES = ("teams", "players", "tournaments", "team_standings")
+FINGERPRINT_COUNTS = ("matches", "scorers")
+
+SCHEMA = """
+    CREATE TABLE answers (key TEXT PRIMARY KEY, answer TEXT NOT NULL) WITHOUT ROWID;
+    CREATE TABLE build_info (name TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+"""
+
+
+def answer_key(intent, entity_ids, season=None):
+    """Lookup key, e.g. 'head_to_head:3,1:2023/2024'"""
+    return f"{intent}:{','.join(str(i) for i in entity_ids)}:{season or ''}"
+
+
+def default_answers_path(db_path):
+    return os.path.splitext(db_path)[0] + ".answers.sqlite3"
+
+
+def _tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def data_fingerprint(conn):
+    """Digest of the database content the precomputed answers depend on"""
+    digest = hashlib.sha1()
+    tables = _tables(conn)
+    for table in FINGERPRINT_TABLES:
+        if table in tables:
+            for row in conn.execute(f"SELECT * FROM {table} ORDER BY rowid"):
+                digest.update(repr(tuple(row)).encode())
+        digest.update(f"|{table}|".encode())
+    for table in FINGERPRINT_COUNTS:
+        if table in tables:
+            digest.update(repr(tuple(conn.execute(f"SELECT COUNT(*), MAX(rowid) FROM {table}").fetchone())).encode())
+    if "match_pair_versions" in tables:
+        digest.update(repr(tuple(conn.execute("SELECT COUNT(*), TOTAL(version) FROM match_pair_versions").fetchone())).encode())
+    return digest.hexdigest()
+
+
+def data_token(conn):
+    """Cheap name for the data state: the answer_inputs change counter plus
+    each input table's highest rowid, or None on a database without the
+    counter. The serving side compares this; the full fingerprint is only
+    computed by the offline build.
+    """
+    counter = change_counter(conn, "answer_inputs")
+    if counter is None:
+        return None
+    tables = _tables(conn)
+    max_ids = [conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] if table in tables else None
+               for table in ANSWER_INPUT_TABLES]
+    return f"{counter}:{','.join(str(i or 0) for i in max_ids)}"
+
+
+def plan_tasks(conn):
+    """(intent, entity ids, names, season) for every answer worth precomputing.
+
+    Team pairs are the ones that have met, in both orders since answers name
+    the teams as asked; pairs that never met answer from SQL just as fast.
+    """
+    tables = _tables(conn)
+    teams = dict(conn.execute("SELECT id, name FROM teams"))
+    tasks = []
+    if "pair_lo" in {row[1] for row in conn.execute("PRAGMA table_xinfo(matches)")}:
+        seasons = {}
+        if "head_to_head" in tables:
+            for lo, hi, season in conn.execute("SELECT pair_lo, pair_hi, season FROM head_to_head WHERE season != ''"):
+                seasons.setdefault((lo, hi), []).append(season)
+        for lo, hi in conn.execute("SELECT DISTINCT pair_lo, pair_hi FROM matches WHERE pair_lo IS NOT NULL"):
+            if lo not in teams or hi not in teams:
+                continue
+            for ids in ((lo, hi), (hi, lo)):
+                names = [teams[i] for i in ids]
+                for intent in PAIR_INTENTS:
+                    tasks.append((intent, ids, names, None))
+                for season in seasons.get((lo, hi), ()):
+                    tasks.append(("head_to_head", ids, names, season))
+    for team_id, name in teams.items():
+        for intent in TEAM_INTENTS:
+            tasks.append((intent, (team_id,), [name], None))
+    for player_id, name in conn.execute("SELECT id, name FROM players"):
+        for intent in PLAYER_INTENTS:
+            tasks.append((intent, (player_id,), [name], None))
+    return tasks
+
+
+_app = None
+
+
+def _init_worker(db_path):
+    """Load the serving app once per build process, quietly"""
+    global _app
+    os.environ["DB_PATH"] = db_path
+    os.environ["SERVING_MODE"] = "file"
+    sys.stdout = open(os.devnull, "w")
+    import backend.app as app
+    _app = app
+
+
+def _answer(app, intent, names, season):
+    if intent == "player_stats":
+        return app.handle_player_stats_intent(names[0])
+    if intent == "head_to_head":
+        return app.handle_head_to_head_intent(names, season or "")
+    return getattr(app, TEAM_HANDLERS[intent])(names)
+
+
+def _answer_chunk(tasks):
+    """([(key, answer)], failures) from the same handlers /ask uses"""
+    app = _app
+    results, failures = [], 0
+    for intent, ids, names, season in tasks:
+        key_season = None
+        if season:
+            # keyed by the season as /ask reads it from the question
+            key_season = app.extract_season_from_text(season)
+            if key_season is None:
+                continue
+        try:
+            answer = _answer(app, intent, names, season)
+        except sqlite3.Error:
+            # left to the handler at request time
+            failures += 1
+            continue
+        results.append((answer_key(intent, ids, key_season), answer))
+    return results, failures
+
+
+def build(db_path, out_path=None, workers=None, chunk_size=500):
+    """Answer every planned key with the serving handlers and write the table.
+
+    The table is written next to out_path and swapped in atomically.
+    Returns a dict with the key count, timings, the data fingerprint and
+    the data token the serving side checks.
+    """
+    out_path = out_path or default_answers_path(db_path)
+    db_path = os.path.abspath(db_path)
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    try:
+        token = data_token(conn)
+        fingerprint = data_fingerprint(conn)
+        tasks = plan_tasks(conn)
+    finally:
+        conn.close()
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+    tmp_path = f"{out_path}.tmp{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    out = sqlite3.connect(tmp_path)
+    keys = failures = 0
+    try:
+        out.executescript(SCHEMA)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path,)) as pool:
+            for results, failed in pool.map(_answer_chunk, chunks):
+                out.executemany("INSERT OR REPLACE INTO answers (key, answer) VALUES (?, ?)", results)
+                keys += len(results)
+                failures += failed
+        conn = sqlite3.connect(db_path)
+        try:
+            if data_fingerprint(conn) != fingerprint or data_token(conn) != token:
+                raise RuntimeError(f"{db_path} changed during the build, run it again")
+        finally:
+            conn.close()
+        elapsed = time.perf_counter() - start
+        info = {"fingerprint": fingerprint, "data_token": token or "", "keys": keys, "failures": failures, "built_at": time.time(),
+                "build_seconds": round(elapsed, 3), "workers": workers or os.cpu_count()}
+        out.executemany("INSERT INTO build_info (name, value) VALUES (?, ?)",
+                        [(name, str(value)) for name, value in info.items()])
+        out.commit()
+        out.close()
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        out.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return info
+
+
+class PrecomputedAnswers:
+    """Serving-side lookups into a table written by build().
+
+    The table is used only while its data token matches the data the app
+    reads, re-checked when data_version moves or the file is replaced. The
+    token costs a few index lookups, so the check stays cheap under
+    continuous ingest; databases without the answer_inputs counter never
+    use the table.
+    """
+
+    def __init__(self, path, get_conn, data_version):
+        self.path = path
+        self.get_conn = get_conn
+        self.data_version = data_version
+        self.pool = ConnectionPool(path, cache_size_kib=2048, wal=False)
+        self._state = None
+        self._valid = False
+        self._file = None
+        self._stat_at = float("-inf")
+        self._keys = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _file_id(self):
+        # a rebuilt table is picked up within a second
+        now = time.monotonic()
+        if now - self._stat_at > 1.0:
+            self._stat_at = now
+            try:
+                st = os.stat(self.path)
+                self._file = (st.st_ino, st.st_mtime_ns)
+            except OSError:
+                self._file = None
+        return self._file
+
+    def _refresh(self):
+        state = (self.data_version.generation(), self._file_id())
+        if state == self._state:
+            return self._valid
+        with self._lock:
+            if state != self._state:
+                valid = False
+                if state[1] is not None:
+                    self.pool.reset()
+                    try:
+                        info = dict(tuple(row) for row in self.pool.connection().execute(
+                            "SELECT name, value FROM build_info"))
+                        token = data_token(self.get_conn())
+                        valid = token is not None and info.get("data_token") == token
+                        self._keys = int(info.get("keys", 0))
+                    except sqlite3.Error as e:
+                        print(f"⚠️ Could not read precomputed answers {self.path}: {e}")
+                    if not valid:
+                        print(f"⚠️ Precomputed answers in {self.path} are out of date, answering from SQL")
+                self._valid = valid
+                self._state = state
+        return self._valid
+
+    def get(self, key):
+        """Stored answer for key, or None when missing or out of date"""
+        if self._refresh():
+            row = self.pool.connection().execute("SELECT answer FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                return row[0]
+        self.misses += 1
+        return None
+
+    def stats(self):
+        return {"path": self.path, "valid": self._valid, "keys": self._keys if self._valid else 0,
+                "hits": self.hits, "misses": self.misses}
+
+
+def run_build(db_path, out_path=None, workers=None, chunk_size=500):
+    """build() with a printed report; returns a process exit status"""
+    try:
+        info = build(db_path, out_path, workers, chunk_size)
+    except (RuntimeError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        return 1
+    rate = info["keys"] / info["build_seconds"] if info["build_seconds"] else 0.0
+    print(f"✅ Precomputed {info['keys']:,} answers in {info['build_seconds']:.2f}s "
+          f"({rate:,.0f} keys/s, {info['workers']} workers) -> {out_path or default_answers_path(db_path)}")
+    if info["failures"]:
+        print(f"⚠️ {info['failures']:,} answer(s) failed and will be computed at request time")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute structured answers for every known entity")
+    parser.add_argument("--db", default="db.sqlite3", help="path to the SQLite database")
+    parser.add_argument("--out", help="answers file (default: <db>.answers.sqlite3)")
+    parser.add_argument("--workers", type=int, help="build processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="answers per task sent to a worker")
+    args = parser.parse_args(argv)
+
+    return run_build(args.db, args.out, args.workers, args.chunk_size)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+# SQL used by the intent handlers in app.py
+# Kept in one place so the migration plan check can EXPLAIN the hot queries.
+
+# Team-pair lookups filter on the canonical (pair_lo, pair_hi) key of two
+# team ids, which idx_matches_pair_date serves with a single index seek.
+# Everything the five match intents need about the latest fixture of a pair,
+# scorers included: one row per goal (or a single row when there were none).
+LATEST_MATCH_FACTS = """
+    SELECT m.id as match_id, t1.name as home_team, t2.name as away_team,
+           m.home_score, m.away_score, m.match_date, m.stadium,
+           tourn.name as tournament, tourn.season,
+           p.name as scorer, s.minute, st.name as scorer_team
+    FROM matches m
+    JOIN teams t1 ON m.home_team_id = t1.id
+    JOIN teams t2 ON m.away_team_id = t2.id
+    LEFT JOIN tournaments tourn ON m.tournament_id = tourn.id
+    LEFT JOIN scorers s ON s.match_id = m.id
+    LEFT JOIN players p ON s.player_id = p.id
+    LEFT JOIN teams st ON p.team_id = st.id
+    WHERE m.id = (
+        SELECT id FROM matches
+        WHERE pair_lo = ? AND pair_hi = ?
+        ORDER BY match_date DESC LIMIT 1
+    )
+    ORDER BY s.minute
+"""
+
+MATCH_PAIR_VERSION = """
+    SELECT version FROM match_pair_versions WHERE pair_lo = ? AND pair_hi = ?
+"""
+
+PLAYER_STATS = """
+    SELECT p.name, p.goals, p.appearances, p.position, t.name as team_name
+    FROM players p
+    JOIN teams t ON p.team_id = t.id
+    WHERE p.id = ?
+"""
+
+TEAM_RANKING = """
+    SELECT ts.position, ts.points, ts.matches_played, ts.wins, ts.draws, ts.losses,
+           t.name as team_name, tourn.name as tournament
+    FROM team_standings ts
+    JOIN teams t ON ts.team_id = t.id
+    JOIN tournaments tourn ON ts.tournament_id = tourn.id
+    WHERE ts.team_id = ?
+    ORDER BY ts.points DESC LIMIT 1
+"""
+
+# One primary-key lookup into the trigger-maintained head_to_head table;
+# tournament_id 0 and season '' select the all-time row.
+HEAD_TO_HEAD = """
+    SELECT matches, lo_wins, hi_wins, draws, lo_goals, hi_goals
+    FROM head_to_head
+    WHERE pair_lo = ? AND pair_hi = ? AND tournament_id = ? AND season = ?
+"""
+
+# name -> (sql, sample parameters) for every query on the request path
+HOT_QUERIES = {
+    "match_facts": (LATEST_MATCH_FACTS, (1, 2)),
+    "match_pair_version": (MATCH_PAIR_VERSION, (1, 2)),
+    "player_stats": (PLAYER_STATS, (1,)),
+    "team_ranking": (TEAM_RANKING, (1,)),
+    "head_to_head": (HEAD_TO_HEAD, (1, 2, 0, "")),
+}
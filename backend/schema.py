@@ -0,0 +1,73 @@
+# Enhanced database schema shared by the setup, generator and test code
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS tournaments (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    season TEXT NOT NULL,
+    start_date DATE,
+    end_date DATE
+);
+
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    city TEXT,
+    founded_year INTEGER,
+    stadium TEXT,
+    capacity INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    team_id INTEGER,
+    position TEXT,
+    goals INTEGER DEFAULT 0,
+    appearances INTEGER DEFAULT 0,
+    FOREIGN KEY (team_id) REFERENCES teams(id)
+);
+
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    home_team_id INTEGER,
+    away_team_id INTEGER,
+    home_score INTEGER,
+    away_score INTEGER,
+    match_date DATE,
+    stadium TEXT,
+    tournament_id INTEGER,
+    FOREIGN KEY (home_team_id) REFERENCES teams(id),
+    FOREIGN KEY (away_team_id) REFERENCES teams(id),
+    FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
+);
+
+CREATE TABLE IF NOT EXISTS scorers (
+    id INTEGER PRIMARY KEY,
+    match_id INTEGER,
+    player_id INTEGER,
+    minute INTEGER,
+    FOREIGN KEY (match_id) REFERENCES matches(id),
+    FOREIGN KEY (player_id) REFERENCES players(id)
+);
+
+CREATE TABLE IF NOT EXISTS team_standings (
+    id INTEGER PRIMARY KEY,
+    team_id INTEGER,
+    tournament_id INTEGER,
+    position INTEGER,
+    points INTEGER,
+    matches_played INTEGER,
+    wins INTEGER,
+    draws INTEGER,
+    losses INTEGER,
+    goals_for INTEGER,
+    goals_against INTEGER,
+    FOREIGN KEY (team_id) REFERENCES teams(id),
+    FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
+);
+"""
+
+
+def create_schema(conn):
+    """Create the enhanced tables if they do not exist yet"""
+    conn.executescript(SCHEMA_SQL)
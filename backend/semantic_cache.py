@@ -0,0 +1,213 @@
+# Semantic Cache - reuse LLM replies for paraphrased fallback questions
+import math
+import threading
+import time
+import zlib
+
+import numpy as np
+
+# words the intent vectorizer has never seen still have to tell prompts apart
+# ("football history" vs "basketball history"), so they get hashed features
+# after the vocabulary, weighted like the rarest known term
+OOV_BUCKETS = 1 << 20
+
+
+class _Array:
+    """Append-only numpy array with amortized O(1) growth"""
+
+    __slots__ = ("data", "size")
+
+    def __init__(self, dtype, capacity=16):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        end = self.size + len(values)
+        if end > len(self.data):
+            grown = np.zeros(max(end, 2 * len(self.data)), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    def view(self):
+        return self.data[:self.size]
+
+
+class SemanticCache:
+    """Nearest-prompt cache over the intent pipeline's TF-IDF features.
+
+    Prompts become L2-normalized sparse vectors kept in flat arrays. Only
+    each vector's prefix is indexed: its rarest features (by how many cached
+    prompts contain them) up to the point where the remaining weight is
+    below the threshold. Two vectors that reach the threshold always share a
+    feature in both prefixes, so a lookup walks only the postings of its own
+    prefix and common terms hardly ever appear in a posting list. The
+    candidates are then scored exactly in one vectorized pass and the
+    closest reply above the threshold wins. Document frequencies move as
+    prompts are added, which can cost an occasional miss but never a wrong
+    hit.
+    """
+
+    def __init__(self, vectorizer, threshold=0.85, max_entries=100000, ttl_seconds=24 * 3600):
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.idf = vectorizer.idf_.tolist()
+        self.oov_weight = max(self.idf)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lookup_seconds = 0.0
+
+    @classmethod
+    def from_pipeline(cls, model, **options):
+        """Build over the TF-IDF step of a fitted intent pipeline (or a compiled model)"""
+        for step in [model] + [step for _, step in getattr(model, "steps", [])]:
+            if hasattr(step, "vocabulary_") and hasattr(step, "idf_"):
+                return cls(step, **options)
+        raise ValueError("intent model has no fitted TF-IDF step")
+
+    def _clear(self):
+        self.postings = {}                  # feature -> _Array of entry ids, prefixes only
+        self.df = {}                        # feature -> cached prompts containing it
+        self.features = _Array(np.int64)    # every entry's features, back to back,
+        self.weights = _Array(np.float32)   # sorted by feature within an entry
+        self.offsets = _Array(np.int64)
+        self.offsets.extend([0])
+        self.expires = _Array(np.float64)   # -inf once evicted
+        self.replies = []
+        self.oldest = 0                     # entries below this id are all evicted
+        self.live = 0
+
+    def vectorize(self, text):
+        """(features, weights) of the L2-normalized vector, sorted by feature"""
+        vector = {}
+        for term in self.analyzer(text):
+            feature = self.vocabulary.get(term)
+            if feature is not None:
+                vector[feature] = vector.get(feature, 0.0) + self.idf[feature]
+            elif " " not in term:
+                feature = len(self.idf) + zlib.crc32(term.encode()) % OOV_BUCKETS
+                vector[feature] = vector.get(feature, 0.0) + self.oov_weight
+        features = sorted(vector)
+        weights = np.array([vector[f] for f in features], dtype=np.float32)
+        return features, weights / np.linalg.norm(weights) if features else weights
+
+    def _prefix(self, features, weights):
+        """Rarest features of a vector until the rest weighs less than the threshold"""
+        order = sorted(range(len(features)), key=lambda i: (self.df.get(features[i], 0), features[i]))
+        rest = 1.0
+        prefix = []
+        for i in order:
+            if math.sqrt(max(rest, 0.0)) < self.threshold:
+                break
+            rest -= float(weights[i]) ** 2
+            prefix.append(features[i])
+        return prefix
+
+    def _candidates(self, features, weights):
+        walked = [self.postings[f].view() for f in self._prefix(features, weights) if f in self.postings]
+        return np.unique(np.concatenate(walked)) if walked else None
+
+    def _lookup(self, features, weights, now):
+        ids = self._candidates(features, weights)
+        if ids is None:
+            return None, 0.0
+        ids = ids[self.expires.data[ids] > now]
+        if not ids.size:
+            return None, 0.0
+        # gather the candidates' features and dot them with the query
+        starts = self.offsets.data[ids]
+        lengths = self.offsets.data[ids + 1] - starts
+        segments = np.cumsum(lengths) - lengths
+        index = np.repeat(starts - segments, lengths) + np.arange(lengths.sum())
+        entry_features = self.features.data[index]
+        query = np.asarray(features, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(query, entry_features), len(query) - 1)
+        products = np.where(query[pos] == entry_features, weights[pos] * self.weights.data[index], 0.0)
+        scores = np.add.reduceat(products, segments)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None, float(scores[best])
+        return int(ids[best]), float(scores[best])
+
+    def get(self, text):
+        """(reply, similarity) of the closest cached prompt, or None"""
+        start = time.perf_counter()
+        features, weights = self.vectorize(text)
+        reply = None
+        if features:
+            with self._lock:
+                best, score = self._lookup(features, weights, time.monotonic())
+                if best is not None:
+                    reply = self.replies[best]
+        self.lookup_seconds += time.perf_counter() - start
+        if reply is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return reply, score
+
+    def set(self, text, reply):
+        """Cache reply for text; prompts without any feature are skipped"""
+        features, weights = self.vectorize(text)
+        if not features:
+            return
+        with self._lock:
+            self._add(features, weights, reply, time.monotonic() + self.ttl_seconds)
+            while self.live > self.max_entries:
+                self._evict_oldest()
+            if len(self.replies) > 2 * self.max_entries:
+                self._compact()
+
+    def _add(self, features, weights, reply, expires):
+        entry_id = len(self.replies)
+        self.features.extend(features)
+        self.weights.extend(weights)
+        self.offsets.extend([self.features.size])
+        self.expires.extend([expires])
+        self.replies.append(reply)
+        for feature in self._prefix(features, weights):
+            postings = self.postings.get(feature)
+            if postings is None:
+                postings = self.postings[feature] = _Array(np.int64, 4)
+            postings.extend([entry_id])
+        for feature in features:
+            self.df[feature] = self.df.get(feature, 0) + 1
+        self.live += 1
+
+    def _evict_oldest(self):
+        while self.replies[self.oldest] is None:
+            self.oldest += 1
+        self.expires.data[self.oldest] = -np.inf
+        self.replies[self.oldest] = None
+        self.live -= 1
+        self.evictions += 1
+
+    def _compact(self):
+        """Rebuild the arrays and index without evicted entries"""
+        features, weights = self.features.view(), self.weights.view()
+        offsets, expires = self.offsets.view(), self.expires.view()
+        entries = [(features[offsets[i]:offsets[i + 1]].tolist(), weights[offsets[i]:offsets[i + 1]].copy(),
+                    reply, expires[i]) for i, reply in enumerate(self.replies) if reply is not None]
+        self._clear()
+        for entry_features, entry_weights, reply, entry_expires in entries:
+            self._add(entry_features, entry_weights, reply, entry_expires)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": self.live,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "avg_lookup_us": round(self.lookup_seconds / lookups * 1e6, 1) if lookups else 0.0,
+        }
@@ -0,0 +1,142 @@
+# Serving Snapshot - read-only in-memory copy of db.sqlite3 for the request path
+import itertools
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# ensure backend modules import the same way whether run as a script or package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.data_version import DataVersion
+from backend.db_pool import sqlite_uri
+
+_snapshot_ids = itertools.count(1)
+
+
+class Snapshot:
+    """One immutable in-memory copy of the database"""
+
+    def __init__(self, uri, keeper, loaded_at, load_ms):
+        self.uri = uri
+        self.keeper = keeper  # holds the shared in-memory database open
+        self.loaded_at = loaded_at
+        self.load_ms = load_ms
+        page_count = keeper.execute("PRAGMA page_count").fetchone()[0]
+        self.nbytes = page_count * keeper.execute("PRAGMA page_size").fetchone()[0]
+
+    def close(self):
+        # connections still reading this snapshot keep it alive until they close
+        self.keeper.close()
+
+
+def load_snapshot(db_path):
+    """Copy db_path, indexes included, into a new shared-cache in-memory database"""
+    start = time.perf_counter()
+    uri = f"file:serving_snapshot_{next(_snapshot_ids)}?mode=memory&cache=shared"
+    keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    source = sqlite3.connect(sqlite_uri(db_path, mode="ro"), uri=True)
+    try:
+        source.backup(keeper)
+    finally:
+        source.close()
+    return Snapshot(uri, keeper, time.time(), (time.perf_counter() - start) * 1000)
+
+
+class SnapshotServer:
+    """Serve reads from an in-memory snapshot that follows the source file.
+
+    A background thread polls the source's data_version (and inode) and, on a
+    change, loads a complete new snapshot before pointing the connection pool
+    at it, so requests see either the old or the new copy, never a mix.
+    ``generation()`` changes on every swap and ``token()`` names the source
+    state that was copied, which lets caches built over the snapshot use it
+    in place of a DataVersion; ``connect()`` gives them their own connection
+    to the snapshot being served.
+    """
+
+    def __init__(self, db_path, pool, interval=2.0):
+        self.db_path = db_path
+        self.pool = pool
+        self.interval = interval
+        self.source_version = DataVersion(db_path)
+        self.swaps = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.current = None
+        self.refresh()
+
+    def refresh(self):
+        """Load a fresh snapshot and swap it in"""
+        with self._lock:
+            source_generation = self.source_version.generation()
+            source_token = self.source_version.token()
+            snapshot = load_snapshot(self.db_path)
+            old, self.current = self.current, snapshot
+            self._source_generation = source_generation
+            self._source_token = source_token
+            self.pool.reset(uri=snapshot.uri)
+            self._generation += 1
+            if old is not None:
+                old.close()
+                self.swaps += 1
+        print(f"📸 Serving snapshot loaded in {snapshot.load_ms:.1f}ms ({snapshot.nbytes / 1e6:.1f} MB)")
+        return snapshot
+
+    def generation(self):
+        return self._generation
+
+    def token(self):
+        """DataVersion.token() of the source as of the serving snapshot"""
+        return self._source_token
+
+    def connect(self):
+        """New read-only connection to the snapshot being served.
+
+        It keeps reading the same snapshot after a swap, until it is closed.
+        """
+        conn = sqlite3.connect(self.current.uri, uri=True)
+        conn.execute("PRAGMA query_only = 1")
+        return conn
+
+    def check(self):
+        """Swap in a new snapshot if the source changed; True if it did"""
+        if self.source_version.generation() == self._source_generation:
+            return False
+        self.refresh()
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Snapshot refresh failed, still serving the previous one: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="snapshot-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        snapshot = self.current
+        return {
+            "uri": snapshot.uri,
+            "generation": self._generation,
+            "swaps": self.swaps,
+            "load_ms": round(snapshot.load_ms, 1),
+            "loaded_at": snapshot.loaded_at,
+            "memory_bytes": snapshot.nbytes,
+        }
@@ -2,6 +2,8 @@
 const _hostname = window.location.hostname || '';
 const isLocalHost = ["localhost", "127.0.0.1", ""].includes(_hostname);
 const API = isLocalHost ? "http://127.0.0.1:5000/api/chat" : "/api/chat";
+// Server-Sent Events version: LLM answers render while they are being written
+const STREAM_API = API + "/stream";
 const chatEl = document.getElementById("chat");
 const typingEl = document.getElementById("typing");
 const inputEl = document.getElementById("userInput");
@@ -16,6 +18,7 @@ function addBubble(text, who="bot"){
   div.textContent = text;
   chatEl.appendChild(div);
   chatEl.scrollTop = chatEl.scrollHeight;
+  return div;
 }
 
 function quickAsk(text){
@@ -23,6 +26,66 @@ function quickAsk(text){
   sendMsg();
 }
 
+// EventSource only does GET, so frames are parsed from the fetch body;
+// calls onEvent(name, data) for every "event: ...\ndata: {...}" frame
+async function readEvents(res, onEvent){
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while(true){
+    const { value, done } = await reader.read();
+    if(done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let end;
+    while((end = buffer.indexOf("\n\n")) >= 0){
+      const frame = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      let event = "message", data = "";
+      for(const line of frame.split("\n")){
+        if(line.startsWith("event:")) event = line.slice(6).trim();
+        else if(line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if(data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
+// streams the answer into a bubble; null when the server has no stream endpoint
+async function askStreaming(msg){
+  const res = await fetch(STREAM_API, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ message: msg, history })
+  });
+  if(!res.ok || !res.body) return null;
+
+  let bubble = null, answer = "";
+  await readEvents(res, (event, data) => {
+    if(event === "token") answer += data.text;
+    else if(event === "done") answer = data.response || answer;
+    else return;
+    if(!bubble){
+      typingEl.style.display = "none";
+      bubble = addBubble("", "bot");
+    }
+    bubble.textContent = answer;
+    chatEl.scrollTop = chatEl.scrollHeight;
+  });
+  return bubble ? answer : null;
+}
+
+async function askOnce(msg){
+  const res = await fetch(API, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ message: msg, history })
+  });
+  const data = await res.json();
+  const answer = data.answer || data.response || "";
+  addBubble(answer, "bot");
+  return answer;
+}
+
 async function sendMsg(){
   const msg = (inputEl.value || "").trim();
   if(!msg) return;
@@ -32,14 +95,8 @@ async function sendMsg(){
   typingEl.style.display = "block";
 
   try {
-    const res = await fetch(API, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ message: msg, history })
-    });
-    const data = await res.json();
-    const answer = data.answer || "";
-    addBubble(answer, "bot");
+    let answer = await askStreaming(msg);
+    if(answer === null) answer = await askOnce(msg);
 
     // update history for next turn
     history.push({ role: "user", content: msg });
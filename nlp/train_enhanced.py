@@ -1,6 +1,8 @@
 # Enhanced NLP Training Script with Model Optimization
 import os
+import sys
 import csv
+import tempfile
 import joblib
 import numpy as np
 import pandas as pd
@@ -18,10 +20,17 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.intent_scorer import DTYPES, CompiledIntentModel, compile_pipeline, compiled_size
+
 class EnhancedIntentTrainer:
-    def __init__(self, data_path="data/questions_enhanced.csv", output_dir="artifacts"):
+    def __init__(self, data_path="data/questions_enhanced.csv", output_dir="artifacts", compiled_dtype="float64"):
         self.data_path = Path(data_path)
         self.output_dir = Path(output_dir)
+        self.compiled_dtype = compiled_dtype
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
         self.models = {
@@ -200,6 +209,8 @@ LOW CONFIDENCE PREDICTIONS ({np.sum(low_conf_mask)} samples):
                 if i < 10:  # Show first 10
                     report_text += f"  - \"{text[:60]}...\" | Pred: {pred} | True: {true} | Conf: {conf:.3f}\n"
         
+        report_text += self.quantization_report(model, X_test, y_test, y_pred_proba, report['accuracy'])
+        
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(report_text)
         
@@ -207,6 +218,39 @@ LOW CONFIDENCE PREDICTIONS ({np.sum(low_conf_mask)} samples):
         
         return report, confidences
     
+    def quantization_report(self, model, X_test, y_test, y_pred_proba, accuracy):
+        """Report section on what each compiled coefficient precision costs in accuracy"""
+        report_text = """
+COMPILED MODEL (NumPy scorer) BY COEFFICIENT PRECISION:
+"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for dtype in DTYPES:
+                path = os.path.join(tmpdir, dtype)
+                try:
+                    compile_pipeline(model, path, dtype=dtype)
+                except ValueError as e:
+                    return report_text + f"- Not compiled: {e}\n"
+                proba = CompiledIntentModel(path, mmap=False).predict_proba(X_test)
+                compiled_accuracy = accuracy_score(y_test, model.classes_[proba.argmax(axis=1)])
+                changed = int((proba.argmax(axis=1) != y_pred_proba.argmax(axis=1)).sum())
+                line = (f"- {dtype}: Accuracy {compiled_accuracy:.3f} (delta {compiled_accuracy - accuracy:+.4f}), "
+                        f"Changed predictions {changed}, Max |dp| {np.abs(proba - y_pred_proba).max():.2e}, "
+                        f"Size {compiled_size(path) / 1024:.1f} KiB")
+                print(line)
+                report_text += line + "\n"
+        return report_text
+    
+    def export_compiled_model(self, model, path=None, dtype=None):
+        """Write the NumPy-only artifact the backend maps without scikit-learn"""
+        path = Path(path) if path else self.output_dir / "intent_model_enhanced.compiled"
+        try:
+            features = compile_pipeline(model, path, dtype=dtype or self.compiled_dtype)
+        except ValueError as e:
+            print(f"⚠️ Compiled model not written: {e}")
+            return None
+        print(f"Compiled model ({features} features, {dtype or self.compiled_dtype}) saved to {path}")
+        return path
+    
     def train_and_evaluate(self):
         """Main training and evaluation pipeline"""
         print("=== Enhanced Intent Model Training ===")
@@ -242,6 +286,7 @@ LOW CONFIDENCE PREDICTIONS ({np.sum(low_conf_mask)} samples):
         model_path = self.output_dir / "intent_model_enhanced.pkl"
         joblib.dump(optimized_model, model_path)
         print(f"\nOptimized model saved to {model_path}")
+        self.export_compiled_model(optimized_model)
         
         # Save model metadata
         metadata = {
@@ -261,6 +306,17 @@ LOW CONFIDENCE PREDICTIONS ({np.sum(low_conf_mask)} samples):
         return optimized_model, final_accuracy
 
 if __name__ == "__main__":
-    trainer = EnhancedIntentTrainer()
-    model, accuracy = trainer.train_and_evaluate()
-    print(f"\n✅ Training completed! Final accuracy: {accuracy:.3f}")
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the enhanced intent model")
+    parser.add_argument("--compile-only", metavar="MODEL_PKL",
+                        help="only export an already trained model to a .compiled directory next to it")
+    parser.add_argument("--dtype", choices=DTYPES, default="float64",
+                        help="coefficient precision of the compiled model (default: float64)")
+    args = parser.parse_args()
+    
+    trainer = EnhancedIntentTrainer(compiled_dtype=args.dtype)
+    if args.compile_only:
+        trainer.export_compiled_model(joblib.load(args.compile_only), Path(args.compile_only).with_suffix(".compiled"))
+    else:
+        model, accuracy = trainer.train_and_evaluate()
+        print(f"\n✅ Training completed! Final accuracy: {accuracy:.3f}")
\ No newline at end of file
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark the compiled NumPy intent scorer against the scikit-learn pipeline.
+
+Cold start is timed in fresh interpreters (imports plus loading the
+artifact); per-query latency and the largest probability difference are
+measured in this process. Compiles the .npz next to the model when missing.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import joblib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.intent_scorer import CompiledIntentModel, compile_pipeline
+from scripts.benchmark_intent_batching import make_queries
+
+COLD_START = {
+    "sklearn": "import time; t = time.perf_counter(); import joblib; m = joblib.load({path!r}); "
+               "m.predict_proba(['warm up']); print(time.perf_counter() - t)",
+    "compiled": "import sys, time; sys.path.insert(0, {root!r}); t = time.perf_counter(); "
+                "from backend.intent_scorer import CompiledIntentModel; m = CompiledIntentModel({path!r}); "
+                "m.predict_proba(['warm up']); print(time.perf_counter() - t)",
+}
+
+
+def cold_start(kind, path, runs):
+    code = COLD_START[kind].format(path=path, root=ROOT)
+    return [float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                 check=True).stdout) for _ in range(runs)]
+
+
+def per_query(model, queries):
+    start = time.perf_counter()
+    for query in queries:
+        model.predict_proba([query])
+    return (time.perf_counter() - start) / len(queries)
+
+
+def run(args):
+    compiled_path = args.compiled or os.path.splitext(args.model)[0] + ".npz"
+    pipeline = joblib.load(args.model)
+    if not os.path.exists(compiled_path):
+        compile_pipeline(pipeline, compiled_path)
+        print(f"🛠️ Compiled {args.model} -> {compiled_path}")
+    compiled = CompiledIntentModel(compiled_path)
+    queries = make_queries(args.queries, args.seed) + ["", "the and of", "completely unknown words"]
+
+    diff = np.abs(pipeline.predict_proba(queries) - compiled.predict_proba(queries)).max()
+    agree = (pipeline.predict(queries) == compiled.predict(queries)).mean()
+    print(f"🎯 max |Δp| {diff:.2e}, same intent on {agree:.1%} of {len(queries):,} queries")
+
+    sklearn_cold = statistics.median(cold_start("sklearn", args.model, args.runs))
+    compiled_cold = statistics.median(cold_start("compiled", compiled_path, args.runs))
+    print(f"🧊 cold start (import + load + first query, median of {args.runs}): "
+          f"sklearn {sklearn_cold * 1000:.0f}ms, compiled {compiled_cold * 1000:.0f}ms "
+          f"({sklearn_cold / compiled_cold:.1f}x)")
+
+    sklearn_query = per_query(pipeline, queries[:args.timed])
+    compiled_query = per_query(compiled, queries[:args.timed])
+    print(f"⚡ per query: sklearn {sklearn_query * 1e6:.0f}µs, compiled {compiled_query * 1e6:.0f}µs "
+          f"({sklearn_query / compiled_query:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(ROOT, "nlp", "artifacts", "intent_model_enhanced.pkl"))
+    parser.add_argument("--compiled", help="compiled .npz (default: next to --model)")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--timed", type=int, default=500, help="queries timed one at a time")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per cold start")
+    parser.add_argument("--seed", type=int, default=42)
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Benchmark micro-batched intent classification.
+
+Times predict_proba over batches of several sizes, then runs concurrent
+clients through backend.inference_batcher with and without a wait window
+to show the throughput gained and the latency each window costs.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import joblib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.inference_batcher import MicroBatcher
+
+TEMPLATES = ["Who won {} vs {}?", "Where was {} vs {} played?", "Who scored in {} vs {}?",
+             "When did {} play {}?", "Head to head {} against {}", "What is {} ranking?",
+             "Tell me about the history of {}", "Top scorers for {}", "next match of {}"]
+TEAMS = ["Alpha FC", "Beta United", "Gamma Rovers", "Delta City", "Epsilon Athletic", "Zeta Town"]
+
+
+def make_queries(count, seed):
+    rng = random.Random(seed)
+    return [rng.choice(TEMPLATES).format(*rng.sample(TEAMS, 2)) for _ in range(count)]
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def bench_batches(model, queries, sizes):
+    print("📦 predict_proba by batch size")
+    for size in sizes:
+        batches = [queries[i:i + size] for i in range(0, len(queries) - size + 1, size)]
+        start = time.perf_counter()
+        for batch in batches:
+            model.predict_proba(batch)
+        elapsed = time.perf_counter() - start
+        items = len(batches) * size
+        print(f"   batch {size:>4}: {items / elapsed:>9,.0f} queries/s, {elapsed / len(batches) * 1000:7.2f}ms per call")
+
+
+def bench_clients(model, queries, clients, window_ms, max_batch, per_client):
+    def predict(texts):
+        probas = model.predict_proba(texts)
+        return list(zip(model.classes_[probas.argmax(axis=1)], probas.max(axis=1)))
+
+    batcher = MicroBatcher(predict, max_batch=max_batch, window_seconds=window_ms / 1000)
+    latencies = [[] for _ in range(clients)]
+
+    def client(i):
+        rng = random.Random(i)
+        for _ in range(per_client):
+            text = rng.choice(queries)
+            t = time.perf_counter()
+            batcher.submit(text)
+            latencies[i].append(time.perf_counter() - t)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    samples = [s for client_samples in latencies for s in client_samples]
+    stats = batcher.stats()
+    print(f"   {clients:>3} clients, window {window_ms:>4}ms: {len(samples) / elapsed:>8,.0f} queries/s, "
+          f"p50 {percentile(samples, 50) * 1000:6.2f}ms, p99 {percentile(samples, 99) * 1000:6.2f}ms, "
+          f"avg batch {stats['avg_batch_size'] or 1:5.1f}")  # window 0 calls predict directly
+
+
+def run(args):
+    model = joblib.load(args.model)
+    queries = make_queries(args.queries, args.seed)
+    model.predict_proba(queries[:8])  # warm up
+
+    bench_batches(model, queries, args.sizes)
+    print(f"🧵 concurrent clients, {args.per_client} queries each (max batch {args.max_batch})")
+    for clients in args.clients:
+        for window_ms in args.windows:
+            bench_clients(model, queries, clients, window_ms, args.max_batch, args.per_client)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(ROOT, "nlp", "artifacts", "intent_model_enhanced.pkl"))
+    parser.add_argument("--queries", type=int, default=4096)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 8, 16, 32, 64, 128])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 1, 2, 5])
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--per-client", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    sys.exit(run(parser.parse_args()))
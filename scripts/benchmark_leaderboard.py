@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark the top-K scorer leaderboard against sorting every player.
+
+Feeds synthetic scorer rows (skewed so a few players score most goals)
+into backend.leaderboard one goal at a time, then times "top N" reads per
+scope. Pass --db to also time a full load from a real database.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.leaderboard import Leaderboard
+
+
+def synthetic_rows(rows, players, tournaments, seasons, seed):
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(players)]
+    picks = rng.choices(range(players), weights=weights, k=rows)
+    for player in picks:
+        yield player, f"Tournament {rng.randrange(tournaments)}", f"{2015 + rng.randrange(seasons)}"
+
+
+def run(args):
+    board = Leaderboard(k=args.k)
+    naive = Counter()
+    feed = list(synthetic_rows(args.rows, args.players, args.tournaments, args.seasons, args.seed))
+
+    start = time.perf_counter()
+    for player, tournament, season in feed:
+        board.add_goals(player, tournament, season)
+    elapsed = time.perf_counter() - start
+    print(f"📥 Ingested {args.rows:,} scorer rows in {elapsed:.2f}s "
+          f"({args.rows / elapsed:,.0f} rows/s, {len(board.scopes)} scopes)")
+
+    for player, _, _ in feed:
+        naive[player] += 1
+
+    reads = 10000
+    start = time.perf_counter()
+    for i in range(reads):
+        board.top(args.k, f"Tournament {i % args.tournaments}")
+    leaderboard_us = (time.perf_counter() - start) / reads * 1e6
+
+    naive_reads = 20
+    start = time.perf_counter()
+    for _ in range(naive_reads):
+        naive.most_common(args.k)
+    naive_us = (time.perf_counter() - start) / naive_reads * 1e6
+    print(f"🏅 top {args.k}: leaderboard {leaderboard_us:.1f}µs, full sort over "
+          f"{len(naive):,} players {naive_us:.1f}µs ({naive_us / leaderboard_us:,.0f}x)")
+
+    expected = [p for p, _ in naive.most_common(args.k)]
+    got = [row["player_id"] for row in board.top(args.k)]
+    if [naive[p] for p in got] != [naive[p] for p in expected]:
+        print("❌ Overall ranking differs from a full sort")
+        return 1
+    print("✅ Overall ranking matches a full sort")
+
+    if args.db:
+        conn = sqlite3.connect(args.db)
+        start = time.perf_counter()
+        loaded = Leaderboard.from_db(conn, k=args.k)
+        print(f"🗃️ Loaded {loaded.scorer_rows:,} goals from {args.db} in "
+              f"{time.perf_counter() - start:.2f}s ({len(loaded.scopes)} scopes)")
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000, help="synthetic scorer rows")
+    parser.add_argument("--players", type=int, default=50_000)
+    parser.add_argument("--tournaments", type=int, default=20)
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="also time Leaderboard.from_db on this database")
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark semantic cache lookups for LLM fallback questions.
+
+Fills backend.semantic_cache with synthetic off-topic prompts built from the
+intent model's vocabulary plus words it has never seen, then times lookups
+of paraphrases (expected hits) and unrelated prompts (expected misses).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import joblib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.semantic_cache import SemanticCache
+
+TEMPLATES = ["tell me about {}", "what is {}", "explain {} to me", "{}?", "can you describe {}",
+             "who is known for {}", "history of {}"]
+
+
+def synthetic_prompts(vocabulary, count, seed):
+    rng = random.Random(seed)
+    known = [term for term in vocabulary if " " not in term]
+    unseen = [f"topic{i}" for i in range(20000)]
+    weights = [1.0 / (rank + 1) for rank in range(len(unseen))]
+    for _ in range(count):
+        words = rng.sample(known, 2) + rng.choices(unseen, weights=weights, k=3)
+        rng.shuffle(words)
+        yield words
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run(args):
+    cache = SemanticCache.from_pipeline(joblib.load(args.model), threshold=args.threshold,
+                                        max_entries=args.entries)
+    rng = random.Random(args.seed)
+    prompts = list(synthetic_prompts(cache.vocabulary, args.entries, args.seed))
+
+    start = time.perf_counter()
+    for words in prompts:
+        cache.set(rng.choice(TEMPLATES).format(" ".join(words)), "reply")
+    elapsed = time.perf_counter() - start
+    print(f"📥 Cached {args.entries:,} prompts in {elapsed:.2f}s ({args.entries / elapsed:,.0f}/s)")
+
+    for label, queries in (
+        ("paraphrase", [rng.choice(TEMPLATES).format(" ".join(rng.sample(w, len(w))))
+                        for w in rng.sample(prompts, args.queries)]),
+        ("unrelated", [rng.choice(TEMPLATES).format(" ".join(w))
+                       for w in synthetic_prompts(cache.vocabulary, args.queries, args.seed + 1)]),
+    ):
+        timings, hits = [], 0
+        for query in queries:
+            t = time.perf_counter()
+            hits += cache.get(query) is not None
+            timings.append(time.perf_counter() - t)
+        print(f"🔎 {label}: {hits / len(queries):.0%} hits, mean {sum(timings) / len(timings) * 1e6:.1f}µs, "
+              f"p99 {percentile(timings, 99) * 1e6:.1f}µs")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(ROOT, "nlp", "artifacts", "intent_model_enhanced.pkl"))
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--seed", type=int, default=42)
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from backend.db_pool import ConnectionPool
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.sqlite3")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE teams (id INTEGER PRIMARY KEY, name TEXT)")
+            conn.execute("INSERT INTO teams (name) VALUES ('Alpha FC')")
+        self.pool = ConnectionPool(self.db_path)
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.tmpdir.cleanup()
+
+    def test_connection_is_reused_within_thread(self):
+        first = self.pool.connection()
+        self.assertIs(self.pool.connection(), first)
+        self.assertEqual(first.execute("SELECT name FROM teams").fetchone()["name"], "Alpha FC")
+        stats = self.pool.stats()
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["journal_mode"], "wal")
+
+    def test_one_connection_per_thread(self):
+        seen = []
+        barrier = threading.Barrier(3)
+
+        def worker():
+            seen.append(id(self.pool.connection()))
+            barrier.wait()  # keep every thread's connection alive
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(set(seen)), 3)
+
+    def test_counters_are_exact_under_concurrency(self):
+        def worker():
+            for _ in range(2000):
+                self.pool.connection()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = self.pool.stats()
+        self.assertEqual(stats["checkouts"], 16000)
+        self.assertEqual(stats["connections_opened"], 8)
+
+    def test_connections_are_read_only(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            self.pool.connection().execute("INSERT INTO teams (name) VALUES ('Beta United')")
+
+    def test_reset_reconnects(self):
+        first = self.pool.connection()
+        self.pool.reset()
+        self.assertIsNot(self.pool.connection(), first)
+        self.assertEqual(self.pool.stats()["reconnects"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from backend.gazetteer import Gazetteer, LiveGazetteer, normalize
+from backend.migrations import apply_migrations
+from backend.schema import create_schema
+
+
+class GazetteerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.gazetteer = Gazetteer([
+            ("team", 1, "Alpha FC"),
+            ("team", 2, "Beta United"),
+            ("team", 3, "Beta"),
+            ("team", 4, "Mu United"),
+            ("player", 1, "Rodriguez"),
+            ("player", 2, "R. Kumar"),
+            ("player", 3, "Hall"),
+        ])
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  Alpha-FC,  vs Beta!"), "alpha fc vs beta")
+
+    def test_teams_in_text_order(self):
+        self.assertEqual(self.gazetteer.team_names("Beta United vs ALPHA FC?"),
+                         ["Beta United", "Alpha FC"])
+
+    def test_longest_match_wins(self):
+        matches = self.gazetteer.find("Who won beta united against alpha", kind="team")
+        self.assertEqual([m.name for m in matches], ["Beta United", "Alpha FC"])
+        self.assertEqual(matches[0].entity_id, 2)
+
+    def test_spans_map_to_original_text(self):
+        text = "Score of Alpha  FC vs Beta United?"
+        for match in self.gazetteer.find(text, kind="team"):
+            self.assertEqual(normalize(text[match.start:match.end]), normalize(match.name))
+
+    def test_short_or_ambiguous_aliases_are_skipped(self):
+        # "mu" is too short to be a safe alias
+        self.assertEqual(self.gazetteer.team_names("how did mu do"), [])
+
+    def test_player_aliases_and_word_boundaries(self):
+        self.assertEqual(self.gazetteer.player_names("goals by kumar"), ["R. Kumar"])
+        self.assertEqual(self.gazetteer.player_names("shall we talk"), [])
+
+
+class LiveGazetteerTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE teams (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+            conn.execute("CREATE TABLE players (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+            conn.execute("INSERT INTO teams (name) VALUES ('Alpha FC')")
+        self.live = LiveGazetteer(self.db_path)
+
+    def tearDown(self):
+        self.live.version.close()
+        os.remove(self.db_path)
+
+    def test_rebuilds_only_when_entities_change(self):
+        self.assertEqual(self.live.get().team_names("Gamma Town vs Alpha FC"), ["Alpha FC"])
+        self.live.get()
+        self.assertEqual(self.live.rebuilds, 1)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE other (x INTEGER)")
+        self.live.get()
+        self.assertEqual(self.live.rebuilds, 1)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO teams (name) VALUES ('Gamma Town')")
+        self.assertEqual(self.live.get().team_names("Gamma Town vs Alpha FC"),
+                         ["Gamma Town", "Alpha FC"])
+        self.assertEqual(self.live.rebuilds, 2)
+
+
+    def rename_alpha(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE teams SET name = 'Omega FC' WHERE name = 'Alpha FC'")
+
+    def test_same_length_rename_rebuilds(self):
+        self.assertEqual(self.live.get().team_names("Alpha FC"), ["Alpha FC"])
+        self.rename_alpha()
+        self.assertEqual(self.live.get().team_names("Alpha FC vs Omega FC"), ["Omega FC"])
+        self.assertEqual(self.live.rebuilds, 2)
+
+    def test_change_counter_of_a_migrated_database(self):
+        with sqlite3.connect(self.db_path) as conn:
+            create_schema(conn)
+        apply_migrations(self.db_path)
+        self.live.get()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO matches (home_team_id, away_team_id) VALUES (1, 1)")
+            conn.execute("INSERT INTO scorers (match_id, player_id, minute) VALUES (1, 1, 10)")
+        self.live.get()
+        self.assertEqual(self.live.rebuilds, 1)
+
+        self.rename_alpha()
+        self.assertEqual(self.live.get().team_names("Alpha FC vs Omega FC"), ["Omega FC"])
+        self.assertEqual(self.live.rebuilds, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from backend.generate_league import generate, round_robin
+from backend.migrations import LATEST_VERSION, schema_version
+
+OPTIONS = dict(sports=["football", "hockey"], leagues=2, seasons=2, teams=6, squad=12, seed=7)
+
+
+class GenerateLeagueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def build(self, name, **overrides):
+        path = os.path.join(self.tmpdir.name, name)
+        counts = generate(path, progress=False, **dict(OPTIONS, **overrides))
+        conn = sqlite3.connect(path)
+        self.addCleanup(conn.close)
+        return counts, conn
+
+    def test_round_robin_pairs_every_team_once(self):
+        pairs = [frozenset(p) for r in round_robin(range(5)) for p in r]
+        self.assertEqual(len(pairs), 10)
+        self.assertEqual(len(set(pairs)), 10)
+
+    def test_generated_data_is_consistent(self):
+        counts, conn = self.build("league.sqlite3")
+        # 4 leagues x 2 seasons x a home-and-away round robin of 6 teams
+        self.assertEqual(counts["matches"], 4 * 2 * 30)
+        self.assertEqual(counts["tournaments"], 8)
+        goals = conn.execute("SELECT SUM(home_score + away_score) FROM matches").fetchone()[0]
+        self.assertEqual(counts["scorers"], goals)
+        self.assertEqual(conn.execute("SELECT SUM(goals) FROM players").fetchone()[0], goals)
+        bad = conn.execute("""
+            SELECT COUNT(*) FROM team_standings
+            WHERE points != wins * 3 + draws OR matches_played != wins + draws + losses
+        """).fetchone()[0]
+        self.assertEqual(bad, 0)
+        self.assertEqual(schema_version(conn), LATEST_VERSION)
+
+    def test_same_seed_same_database(self):
+        checksum = "SELECT SUM(match_id * 31 + player_id * 7 + minute) FROM scorers"
+        _, first = self.build("a.sqlite3")
+        _, second = self.build("b.sqlite3")
+        _, other = self.build("c.sqlite3", seed=8)
+        self.assertEqual(first.execute(checksum).fetchone(), second.execute(checksum).fetchone())
+        self.assertNotEqual(first.execute(checksum).fetchone(), other.execute(checksum).fetchone())
+
+    def test_match_budget_and_existing_file(self):
+        counts, _ = self.build("small.sqlite3", matches=7, leagues=1, seasons=1, sports=["futsal"])
+        self.assertEqual(counts["matches"], 7)
+        with self.assertRaises(FileExistsError):
+            self.build("small.sqlite3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from backend import head_to_head
+from backend.migrations import apply_migrations
+from backend.schema import create_schema
+
+
+class HeadToHeadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.sqlite3")
+        conn = sqlite3.connect(self.db_path)
+        create_schema(conn)
+        conn.executemany("INSERT INTO tournaments (id, name, season) VALUES (?, ?, ?)",
+                         [(1, "League", "2023/2024"), (2, "Cup", "2023/2024"), (3, "League", "2024/2025")])
+        # a match that exists before the migration is picked up by the backfill
+        conn.execute("INSERT INTO matches (home_team_id, away_team_id, home_score, away_score, tournament_id) "
+                     "VALUES (1, 2, 1, 1, 1)")
+        conn.commit()
+        conn.close()
+        apply_migrations(self.db_path)
+        self.conn = sqlite3.connect(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def record(self, tournament_id=0, season=""):
+        return self.conn.execute(
+            "SELECT matches, lo_wins, hi_wins, draws, lo_goals, hi_goals FROM head_to_head "
+            "WHERE pair_lo = 1 AND pair_hi = 2 AND tournament_id = ? AND season = ?",
+            (tournament_id, season)).fetchone()
+
+    def add_match(self, home, away, home_score, away_score, tournament_id):
+        cursor = self.conn.execute(
+            "INSERT INTO matches (home_team_id, away_team_id, home_score, away_score, tournament_id) "
+            "VALUES (?, ?, ?, ?, ?)", (home, away, home_score, away_score, tournament_id))
+        return cursor.lastrowid
+
+    def test_triggers_keep_every_scope_current(self):
+        self.add_match(2, 1, 3, 0, 2)           # team 2 wins at home, in the cup
+        match_id = self.add_match(1, 2, 2, 1, 3)
+        self.add_match(1, 2, None, None, 3)     # unplayed fixture is ignored
+
+        self.assertEqual(self.record(), (3, 1, 1, 1, 3, 5))
+        self.assertEqual(self.record(tournament_id=2), (1, 0, 1, 0, 0, 3))
+        self.assertEqual(self.record(season="2023/2024"), (2, 0, 1, 1, 1, 4))
+        self.assertEqual(self.record(season="2024/2025"), (1, 1, 0, 0, 2, 1))
+
+        self.conn.execute("UPDATE matches SET home_score = 0, away_score = 4 WHERE id = ?", (match_id,))
+        self.assertEqual(self.record(), (3, 0, 2, 1, 1, 8))
+        self.conn.execute("DELETE FROM matches WHERE id = ?", (match_id,))
+        self.assertIsNone(self.record(season="2024/2025"))
+        self.assertEqual(head_to_head.verify(self.conn), [])
+
+    def test_season_edits_move_matches_between_seasons(self):
+        self.add_match(2, 1, 3, 0, 2)
+        self.add_match(1, 2, 2, 1, 3)
+
+        self.conn.execute("UPDATE tournaments SET season = '2024/2025' WHERE id = 2")
+        self.assertEqual(self.record(season="2023/2024"), (1, 0, 0, 1, 1, 1))
+        self.assertEqual(self.record(season="2024/2025"), (2, 1, 1, 0, 2, 4))
+        self.conn.execute("UPDATE tournaments SET season = '2022/2023' WHERE id = 1")
+        self.assertIsNone(self.record(season="2023/2024"))
+        self.conn.execute("DELETE FROM tournaments WHERE id = 3")
+        self.assertEqual(self.record(season="2024/2025"), (1, 0, 1, 0, 0, 3))
+        self.conn.execute("INSERT INTO tournaments (id, name, season) VALUES (3, 'League', '2025/2026')")
+        self.assertEqual(self.record(season="2025/2026"), (1, 1, 0, 0, 2, 1))
+        self.assertEqual(head_to_head.verify(self.conn), [])
+
+    def test_rebuild_repairs_drift(self):
+        self.add_match(1, 2, 2, 0, 1)
+        self.conn.execute("UPDATE head_to_head SET lo_wins = 99")
+        self.assertTrue(head_to_head.verify(self.conn))
+        head_to_head.rebuild(self.conn)
+        self.assertEqual(head_to_head.verify(self.conn), [])
+        self.assertEqual(self.record(), (2, 1, 0, 1, 3, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import threading
+import time
+import unittest
+
+from backend.inference_batcher import MicroBatcher
+
+
+class MicroBatcherTestCase(unittest.TestCase):
+    def submit_concurrently(self, batcher, items):
+        results = {}
+        errors = {}
+
+        def call(item):
+            try:
+                results[item] = batcher.submit(item)
+            except Exception as e:
+                errors[item] = e
+
+        threads = [threading.Thread(target=call, args=(item,)) for item in items]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_calls_share_one_batch(self):
+        batches = []
+
+        def upper(texts):
+            batches.append(list(texts))
+            return [text.upper() for text in texts]
+
+        batcher = MicroBatcher(upper, max_batch=64, window_seconds=0.2)
+        results, errors = self.submit_concurrently(batcher, ["a", "b", "c", "d"])
+
+        self.assertEqual(results, {"a": "A", "b": "B", "c": "C", "d": "D"})
+        self.assertEqual(len(batches), 1)
+        stats = batcher.stats()
+        self.assertEqual((stats["batches"], stats["items"], stats["largest_batch"]), (1, 4, 4))
+
+    def test_batches_close_at_max_size(self):
+        batches = []
+
+        def record(texts):
+            batches.append(len(texts))
+            return texts
+
+        batcher = MicroBatcher(record, max_batch=2, window_seconds=0.2)
+        start = time.monotonic()
+        self.submit_concurrently(batcher, ["a", "b", "c", "d"])
+
+        self.assertTrue(all(size <= 2 for size in batches))
+        self.assertEqual(sum(batches), 4)
+        self.assertLess(time.monotonic() - start, 0.6)
+
+    def test_errors_reach_every_caller_in_the_batch(self):
+        def failing(texts):
+            raise ValueError("model not fitted")
+
+        batcher = MicroBatcher(failing, window_seconds=0.05)
+        results, errors = self.submit_concurrently(batcher, ["a", "b"])
+        self.assertEqual(results, {})
+        self.assertTrue(all(isinstance(e, ValueError) for e in errors.values()))
+        self.assertEqual(len(errors), 2)
+
+    def test_zero_window_calls_directly(self):
+        batcher = MicroBatcher(lambda texts: [len(t) for t in texts], window_seconds=0)
+        self.assertEqual(batcher.submit("abc"), 3)
+        self.assertEqual(batcher.stats()["batches"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
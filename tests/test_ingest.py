@@ -0,0 +1,112 @@
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from backend import head_to_head
+from backend.ingest import iter_csv, iter_json_array, iter_ndjson, ingest
+
+SEED_PATH = os.path.join(os.path.dirname(__file__), "..", "backend", "data", "seed_matches.json")
+
+
+class FeedReaderTestCase(unittest.TestCase):
+    def test_json_array_streams_across_chunk_boundaries(self):
+        with open(SEED_PATH, encoding="utf-8-sig") as f:
+            text = f.read()
+        expected = json.loads(text)
+        for read_size in (1, 7, 64, 1 << 16):
+            self.assertEqual(list(iter_json_array(io.StringIO(text), read_size=read_size)), expected)
+        self.assertEqual(list(iter_json_array(io.StringIO("[1, 22, 333]"), read_size=2)), [1, 22, 333])
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('[{"a": 1}, {"b":')))
+
+    def test_bad_json_array_element_fails_without_reading_on(self):
+        class Feed(io.StringIO):
+            reads = 0
+
+            def read(self, size=-1):
+                self.reads += 1
+                return super().read(size)
+
+        good = '{"home_team": "Alpha FC", "away_team": "Beta United"}, '
+        feed = Feed("[" + good + '{"home_team": Alpha FC}, ' + good * 10000 + "]")
+        items = iter_json_array(feed, read_size=64)
+        self.assertEqual(next(items)["home_team"], "Alpha FC")
+        with self.assertRaises(ValueError):
+            next(items)
+        self.assertLess(feed.reads, 5)
+
+        # an unterminated string gives up at the record size limit
+        feed = Feed('[{"a": "' + "x" * 10000)
+        with self.assertRaises(ValueError):
+            list(iter_json_array(feed, read_size=64, max_record_size=1000))
+        self.assertLess(feed.reads, 20)
+
+    def test_ndjson_and_csv(self):
+        self.assertEqual(list(iter_ndjson(io.StringIO('{"a": 1}\n\n{"a": 2}\n'))), [{"a": 1}, {"a": 2}])
+        rows = list(iter_csv(io.StringIO(
+            "home_team,away_team,home_score,away_score,date,scorers\n"
+            "Alpha FC,Beta United,1,0,2025-01-02,R. Kumar|Alpha FC|90+2'\n")))
+        self.assertEqual(rows[0]["scorers"], [{"name": "R. Kumar", "team": "Alpha FC", "minute": "90+2'"}])
+
+
+class IngestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_feed(self, name, lines):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(json.dumps(line) for line in lines))
+        return path
+
+    def query(self, sql):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def test_seed_feed_loads_once(self):
+        first = ingest(self.db_path, SEED_PATH, progress_every=0)
+        self.assertEqual(first.counts["inserted"], 5)
+        self.assertEqual(first.counts["scorers"], 12)
+        again = ingest(self.db_path, SEED_PATH, progress_every=0)
+        self.assertEqual((again.counts["inserted"], again.counts["unchanged"], again.counts["scorers"]), (0, 5, 0))
+        self.assertEqual(self.query("SELECT name, season FROM tournaments WHERE id = 1"), [("City Cup", "2025/2026")])
+
+    def test_updates_by_natural_key_and_skips_bad_records(self):
+        match = {"home_team": "Alpha FC", "away_team": "Beta United", "date": "2025-03-01",
+                 "home_score": 1, "away_score": 0, "scorers": [{"name": "Kumar", "team": "Alpha FC", "minute": 10}]}
+        ingest(self.db_path, self.write_feed("a.ndjson", [match]), progress_every=0)
+
+        corrected = dict(match, home_score=2, scorers=match["scorers"] + [{"name": "Kumar", "team": "Alpha FC"}])
+        bad = {"home_team": "Ghost FC", "away_team": "Alpha FC", "home_score": "x"}
+        result = ingest(self.db_path, self.write_feed("b.ndjson", [corrected, bad]), progress_every=0)
+        self.assertEqual((result.counts["updated"], result.counts["skipped"]), (1, 1))
+        self.assertEqual(self.query("SELECT home_score FROM matches"), [(2,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM scorers"), [(2,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM teams WHERE name = 'Ghost FC'"), [(0,)])
+
+    def test_bulk_mode_rebuilds_summaries(self):
+        ingest(self.db_path, SEED_PATH, progress_every=0, bulk=True)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.assertEqual(head_to_head.verify(conn), [])
+            triggers = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' "
+                                    "AND sql NOT LIKE '%change_counters%'").fetchone()[0]
+            self.assertEqual(triggers, 12)
+            pairs = conn.execute("SELECT COUNT(DISTINCT pair_lo || '-' || pair_hi) FROM matches").fetchone()[0]
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM match_pair_versions").fetchone()[0], pairs)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
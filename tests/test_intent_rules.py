@@ -0,0 +1,101 @@
+import time
+import unittest
+
+from backend.intent_rules import IntentCascade, IntentRules
+
+
+class IntentRulesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rules = IntentRules()
+
+    def test_unambiguous_phrasings_match(self):
+        self.assertEqual(self.rules.match("Who won Alpha FC vs Beta United?")[0], "score")
+        self.assertEqual(self.rules.match("WHICH STADIUM hosted Alpha vs Beta")[0], "stadium")
+        self.assertEqual(self.rules.match("Who's the league's top scorer?")[0], "league_top_scorer")
+        self.assertEqual(self.rules.match("When is Alpha FC's next match?")[0], "next_match")
+        self.assertEqual(self.rules.match("Head-to-head Alpha v Beta")[0], "head_to_head")
+
+    def test_top_scorer_questions_outrank_their_scope(self):
+        for question in ["Top 5 scorers in the tournament", "top three goal scorers", "Top scorer standings?"]:
+            self.assertEqual(self.rules.match(question)[0], "league_top_scorer", question)
+
+    def test_ambiguous_or_unknown_questions_are_left_to_the_model(self):
+        self.assertIsNone(self.rules.match("When was the final score announced?"))
+        self.assertIsNone(self.rules.match("Tell me about football history"))
+        # whole words only: "scorer" is not "score", "ranked" is not "rank" inside "frankly"
+        self.assertIsNone(self.rules.match("frankly, who is the scorer"))
+
+    def test_common_words_need_an_anchor(self):
+        self.assertIsNone(self.rules.match("Stats on how fans reacted"))
+        self.assertIsNone(self.rules.match("Who won the argument about VAR?"))
+        self.assertEqual(self.rules.match("Haaland's season stats")[0], "player_stats")
+        self.assertEqual(self.rules.match("Who won the final between Alpha and Beta?")[0], "score")
+
+    def test_general_questions_are_left_to_the_model(self):
+        for question in ["When was football invented?", "Who has scored the most goals in World Cup history?",
+                         "What's the biggest stadium in the world?", "Which venue hosts the Oscars?",
+                         "How does the tournament format work?", "Is this competition fair?",
+                         "How are FIFA rankings calculated?", "Who ranked first in the Ballon d'Or vote?",
+                         "Explain the standings tiebreakers", "When did VAR start?", "Who won the final?"]:
+            self.assertIsNone(self.rules.match(question), question)
+            self.assertEqual(self.rules.classify(question)[1], 0.95, question)
+
+    def test_team_intents_need_the_teams_to_resolve(self):
+        known = {"alpha fc": "Alpha FC", "beta united": "Beta United"}
+        rules = IntentRules(teams=lambda text: [name for key, name in known.items() if key in text.lower()])
+
+        self.assertEqual(rules.match("When was Alpha FC vs Beta United played?")[0], "date")
+        self.assertEqual(rules.match("Where is Alpha FC ranked?")[0], "team_ranking")
+        self.assertIsNone(rules.match("When was the USA vs Canada friendly?"))
+        self.assertIsNone(rules.match("Where is football ranked among sports?"))
+
+    def test_classify_always_answers(self):
+        self.assertEqual(self.rules.classify("Top scorer standings?"), ("league_top_scorer", 0.95))
+        self.assertEqual(self.rules.classify("Alpha FC against Beta United"), ("score", 0.8))
+        self.assertEqual(self.rules.classify("hello there"), ("general", 0.2))
+
+
+class IntentCascadeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def model(self, text):
+        self.calls.append(text)
+        time.sleep(0.002)
+        return "stadium", 0.7
+
+    def test_rules_short_circuit_the_model(self):
+        cascade = IntentCascade(IntentRules(), self.model)
+
+        self.assertEqual(cascade.classify("Tell me about football history"), ("stadium", 0.7, "model"))
+        self.assertEqual(cascade.classify("Who won Alpha FC vs Beta United?"), ("score", 0.95, "rules"))
+        self.assertEqual(self.calls, ["Tell me about football history"])
+        stats = cascade.stats()
+        self.assertEqual(stats["stages"], {"rules": 1, "model": 1, "degraded": 0, "none": 0})
+        self.assertEqual(stats["rule_hit_rate"], 0.5)
+        self.assertGreater(stats["saved_ms"], 1.0)
+
+    def test_fallback_mode_only_uses_rules_without_a_model(self):
+        cascade = IntentCascade(IntentRules(), self.model, mode="fallback")
+        self.assertEqual(cascade.classify("Who won Alpha FC vs Beta United?"), ("stadium", 0.7, "model"))
+
+        cascade = IntentCascade(IntentRules(), None, mode="fallback")
+        self.assertEqual(cascade.classify("Who won Alpha FC vs Beta United?"), ("score", 0.95, "degraded"))
+        self.assertTrue(cascade.stats()["degraded"])
+
+    def test_rules_stand_in_for_a_failing_model(self):
+        def broken(text):
+            raise RuntimeError("model unavailable")
+
+        cascade = IntentCascade(IntentRules(), broken)
+        self.assertEqual(cascade.classify("Alpha FC against Beta United"), ("score", 0.8, "degraded"))
+        cascade = IntentCascade(IntentRules(), broken, mode="off")
+        self.assertEqual(cascade.classify("Alpha FC against Beta United"), (None, 0.0, "none"))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            IntentCascade(IntentRules(), self.model, mode="rules")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from backend.intent_scorer import CompiledIntentModel, artifact_version, compile_pipeline
+from backend.semantic_cache import SemanticCache
+
+TEXTS = [
+    "Who won Alpha FC vs Beta United?", "What was the score of Alpha vs Beta?", "Final score Gamma Rovers Delta City",
+    "Where was Alpha FC vs Beta United played?", "Which stadium hosted Gamma vs Delta?", "Stadium of the Beta match",
+    "Who scored in Alpha FC vs Beta United?", "Goal scorers Gamma Rovers Delta City", "Who scored the goals for Beta?",
+]
+INTENTS = ["score"] * 3 + ["stadium"] * 3 + ["scorers"] * 3
+QUERIES = TEXTS + ["", "the and of", "completely unknown words", "score score score alpha", "Stadium? Scored!"]
+
+
+class CompiledIntentModelTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "model.npz")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def compiled(self, pipeline, texts=TEXTS, intents=INTENTS):
+        pipeline.fit(texts, intents)
+        compile_pipeline(pipeline, self.path)
+        return CompiledIntentModel(self.path)
+
+    def test_matches_the_pipeline(self):
+        pipeline = Pipeline([
+            ("tfidf", TfidfVectorizer(ngram_range=(1, 3), stop_words="english")),
+            ("clf", LogisticRegression(C=10, max_iter=2000)),
+        ])
+        model = self.compiled(pipeline)
+
+        np.testing.assert_allclose(model.predict_proba(QUERIES), pipeline.predict_proba(QUERIES), atol=1e-9)
+        self.assertEqual(list(model.classes_), list(pipeline.classes_))
+        self.assertEqual(list(model.predict(QUERIES)), list(pipeline.predict(QUERIES)))
+
+    def test_matches_binary_sublinear_pipeline(self):
+        pipeline = Pipeline([
+            ("tfidf", TfidfVectorizer(ngram_range=(2, 2), sublinear_tf=True, norm="l1")),
+            ("clf", LogisticRegression()),
+        ])
+        model = self.compiled(pipeline, TEXTS[:6], INTENTS[:6])
+
+        np.testing.assert_allclose(model.predict_proba(QUERIES), pipeline.predict_proba(QUERIES), atol=1e-9)
+
+    def test_mapped_directory_and_quantized_coefficients(self):
+        pipeline = Pipeline([
+            ("tfidf", TfidfVectorizer(ngram_range=(1, 2), stop_words="english")),
+            ("clf", LogisticRegression(C=10, max_iter=2000)),
+        ]).fit(TEXTS, INTENTS)
+        expected = pipeline.predict_proba(QUERIES)
+
+        for dtype, atol in (("float64", 1e-9), ("float32", 1e-6), ("int8", 0.05)):
+            path = os.path.join(self.tmpdir.name, dtype)
+            compile_pipeline(pipeline, path, dtype=dtype)
+            model = CompiledIntentModel(path)
+            self.assertIsInstance(model.coef, np.memmap)
+            self.assertEqual(model.coef.dtype, np.dtype(dtype))
+            np.testing.assert_allclose(model.predict_proba(QUERIES), expected, atol=atol)
+            self.assertEqual(list(model.predict(TEXTS)), INTENTS)
+
+    def test_recompiling_leaves_mapped_files_alone(self):
+        pipeline = Pipeline([("tfidf", TfidfVectorizer()), ("clf", LogisticRegression())]).fit(TEXTS, INTENTS)
+        path = os.path.join(self.tmpdir.name, "model.compiled")
+        compile_pipeline(pipeline, path)
+        serving = CompiledIntentModel(path)
+        before = serving.predict_proba(QUERIES)
+
+        compile_pipeline(pipeline, path, dtype="int8")
+        np.testing.assert_array_equal(serving.predict_proba(QUERIES), before)
+        self.assertEqual(CompiledIntentModel(path).dtype, "int8")
+
+    def test_artifact_version_follows_content(self):
+        pipeline = Pipeline([("tfidf", TfidfVectorizer()), ("clf", LogisticRegression())]).fit(TEXTS, INTENTS)
+        path = os.path.join(self.tmpdir.name, "model.compiled")
+        compile_pipeline(pipeline, path)
+        version = artifact_version(path)
+
+        compile_pipeline(pipeline, path)
+        self.assertEqual(artifact_version(path), version)
+        compile_pipeline(pipeline, path, dtype="float32")
+        self.assertNotEqual(artifact_version(path), version)
+        compile_pipeline(pipeline, self.path)
+        self.assertEqual(len(artifact_version(self.path)), 16)
+
+    def test_semantic_cache_builds_over_it(self):
+        pipeline = Pipeline([("tfidf", TfidfVectorizer()), ("clf", LogisticRegression())])
+        model = self.compiled(pipeline)
+        vectorizer = pipeline.named_steps["tfidf"]
+
+        self.assertEqual(model.vocabulary_.get("stadium"), vectorizer.vocabulary_["stadium"])
+        self.assertIsNone(model.vocabulary_.get("unknown"))
+        cache = SemanticCache.from_pipeline(model)
+        cache.set("Which stadium hosted the final?", "Wembley")
+        self.assertEqual(cache.get("which stadium hosted the final")[0], "Wembley")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from collections import Counter
+
+from backend.data_version import DataVersion
+from backend.leaderboard import Leaderboard, LiveLeaderboard
+from backend.migrations import apply_migrations
+from backend.schema import create_schema
+
+
+class LeaderboardTestCase(unittest.TestCase):
+    def test_bounded_top_k_matches_full_sort(self):
+        rng = random.Random(7)
+        board = Leaderboard(k=5)
+        totals = Counter()
+        for _ in range(5000):
+            player = rng.randrange(200)
+            goals = -1 if totals[player] and rng.random() < 0.1 else 1
+            totals[player] += goals
+            board.add_goals(player, "League", "2024/2025", goals)
+
+        expected = sorted(((-g, p) for p, g in totals.items() if g > 0))[:5]
+        for scope in [(None, None), ("League", None), (None, "2024/2025"), ("League", "2024/2025")]:
+            top = board.top(5, *scope)
+            self.assertEqual([(-row["goals"], row["player_id"]) for row in top], expected)
+        self.assertEqual(board.top(3, "Cup"), [])
+
+    def test_catch_up_from_scorers(self):
+        conn = sqlite3.connect(":memory:")
+        create_schema(conn)
+        conn.executemany("INSERT INTO tournaments (id, name, season) VALUES (?, ?, ?)",
+                         [(1, "League", "2023/2024"), (2, "Cup", "2023/2024")])
+        conn.execute("INSERT INTO teams (id, name) VALUES (1, 'Alpha FC')")
+        conn.executemany("INSERT INTO players (id, name, team_id, goals) VALUES (?, ?, 1, 99)",
+                         [(1, "Rodriguez"), (2, "Smith")])
+        conn.executemany("INSERT INTO matches (id, tournament_id) VALUES (?, ?)", [(1, 1), (2, 2)])
+        conn.executemany("INSERT INTO scorers (match_id, player_id, minute) VALUES (?, ?, 10)",
+                         [(1, 1), (1, 2), (2, 2)])
+
+        board = Leaderboard.from_db(conn)
+        self.assertEqual([(r["name"], r["goals"]) for r in board.top(2)], [("Smith", 2), ("Rodriguez", 1)])
+        self.assertEqual(board.top(1, "League")[0]["team"], "Alpha FC")
+
+        conn.executemany("INSERT INTO scorers (match_id, player_id, minute) VALUES (1, 1, ?)", [(20,), (30,)])
+        self.assertEqual(board.catch_up(conn), 2)
+        self.assertEqual(board.top(1)[0]["name"], "Rodriguez")
+
+        # without the migrations' change counter, any change means a rebuild
+        conn.execute("DELETE FROM scorers WHERE match_id = 1 AND minute = 30")
+        self.assertTrue(board.is_stale(conn))
+        board = Leaderboard.from_db(conn)
+        self.assertEqual([r["goals"] for r in board.top(2)], [2, 2])
+        conn.close()
+
+
+class LiveLeaderboardTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.sqlite3")
+        with sqlite3.connect(self.db_path) as conn:
+            create_schema(conn)
+            conn.executemany("INSERT INTO tournaments (id, name, season) VALUES (?, ?, ?)",
+                             [(1, "League", "2023/2024"), (2, "Cup", "2023/2024")])
+            conn.executemany("INSERT INTO teams (id, name) VALUES (?, ?)", [(1, "Alpha FC"), (2, "Beta United")])
+            conn.executemany("INSERT INTO players (id, name, team_id) VALUES (?, ?, 1)",
+                             [(1, "Rodriguez"), (2, "Smith")])
+            conn.executemany("INSERT INTO matches (id, home_team_id, away_team_id, tournament_id) "
+                             "VALUES (?, 1, 2, ?)", [(1, 1), (2, 2)])
+            conn.executemany("INSERT INTO scorers (match_id, player_id, minute) VALUES (?, ?, 10)",
+                             [(1, 1), (1, 1), (2, 2)])
+        apply_migrations(self.db_path)
+        self.version = DataVersion(self.db_path)
+        self.live = LiveLeaderboard(self.db_path, self.version)
+        self.live.get()
+
+    def tearDown(self):
+        self.version.close()
+        self.tmpdir.cleanup()
+
+    def write(self, sql, params=()):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(sql, params)
+
+    def top(self, n=2, tournament=None):
+        return [(r["name"], r["team"], r["goals"]) for r in self.live.get().top(n, tournament)]
+
+    def test_inserts_are_folded_in_without_a_rebuild(self):
+        self.write("INSERT INTO scorers (match_id, player_id, minute) VALUES (2, 2, 20), (2, 2, 30)")
+        self.assertEqual(self.top(), [("Smith", "Alpha FC", 3), ("Rodriguez", "Alpha FC", 2)])
+        self.assertEqual(self.live.rebuilds, 1)
+
+    def test_updates_in_place_rebuild_the_board(self):
+        # a goal credited to another player
+        self.write("UPDATE scorers SET player_id = 2 WHERE id = 1")
+        self.assertEqual(self.top(), [("Smith", "Alpha FC", 2), ("Rodriguez", "Alpha FC", 1)])
+        # a match moved to another tournament
+        self.write("UPDATE matches SET tournament_id = 1 WHERE id = 2")
+        self.assertEqual(self.top(1, "Cup"), [])
+        self.assertEqual(self.top(1, "League"), [("Smith", "Alpha FC", 2)])
+        # a rename and a transfer
+        self.write("UPDATE players SET name = 'J. Smith', team_id = 2 WHERE id = 2")
+        self.assertEqual(self.top(1), [("J. Smith", "Beta United", 2)])
+        self.assertEqual(self.live.rebuilds, 4)
+
+        # edits that change nothing the board shows keep it
+        self.write("UPDATE players SET goals = 40 WHERE id = 2")
+        self.write("UPDATE matches SET home_score = 3 WHERE id = 1")
+        self.live.get()
+        self.assertEqual(self.live.rebuilds, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.llm_client import CircuitBreaker, CircuitOpenError, DeadlineError, LLMClient, LLMError
+
+
+class _Upstream(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server.requests.append((self.client_address, self.headers["Authorization"], body))
+        status, delay = server.script.pop(0) if server.script else (200, 0)
+        time.sleep(delay)
+        if body.get("stream") and status == 200:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b": OPENROUTER PROCESSING\n\n")
+            for text in ("Football ", "began ", "in England."):
+                chunk = {"choices": [{"delta": {"content": text}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+            return
+        payload = json.dumps({"choices": [{"message": {"content": f" reply {len(server.requests)} "}}]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class LLMClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Upstream)
+        self.server.requests = []
+        self.server.script = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/chat"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def client(self, **options):
+        options.setdefault("backoff", 0.01)
+        return LLMClient("key", "model-a", url=self.url, **options)
+
+    def test_calls_reuse_one_connection(self):
+        client = self.client()
+        replies = [client.chat([{"role": "user", "content": "hi"}]) for _ in range(3)]
+
+        self.assertEqual(replies, ["reply 1", "reply 2", "reply 3"])
+        self.assertEqual(len({address for address, _, _ in self.server.requests}), 1)
+        _, auth, body = self.server.requests[0]
+        self.assertEqual((auth, body["model"], body["max_tokens"]), ("Bearer key", "model-a", 150))
+        self.assertEqual(client.stats()["calls"], 3)
+
+    def test_retries_upstream_errors(self):
+        self.server.script = [(503, 0), (429, 0)]
+        client = self.client(retries=2)
+
+        self.assertEqual(client.chat([{"role": "user", "content": "hi"}]), "reply 3")
+        stats = client.stats()
+        self.assertEqual((stats["attempts"], stats["retries"], stats["failures"]), (3, 2, 0))
+        self.assertEqual(stats["last"]["attempts"], 3)
+
+    def test_client_errors_are_not_retried(self):
+        self.server.script = [(401, 0)]
+        client = self.client(retries=2)
+
+        with self.assertRaises(LLMError):
+            client.chat([{"role": "user", "content": "hi"}])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(client.stats()["failures"], 1)
+
+    def test_budget_bounds_slow_upstream(self):
+        self.server.script = [(200, 0.5)] * 5
+        client = self.client(read_timeout=5, budget_seconds=0.3, retries=5)
+
+        start = time.monotonic()
+        with self.assertRaises(LLMError):
+            client.chat([{"role": "user", "content": "hi"}])
+        self.assertLess(time.monotonic() - start, 0.45)
+
+    def test_streamed_reply_arrives_in_pieces(self):
+        self.server.script = [(502, 0)]
+        client = self.client(retries=1)
+
+        pieces = list(client.stream_chat([{"role": "user", "content": "football history?"}]))
+        self.assertEqual(pieces, ["Football ", "began ", "in England."])
+        self.assertTrue(self.server.requests[0][2]["stream"])
+        stats = client.stats()
+        self.assertEqual((stats["calls"], stats["retries"], stats["failures"]), (1, 1, 0))
+        self.assertIsNotNone(stats["last"]["first_token_ms"])
+
+    def test_slow_threshold_follows_the_read_timeout(self):
+        self.assertEqual(self.client(read_timeout=10).breaker.slow_seconds, 8.0)
+        self.assertEqual(self.client(read_timeout=10, slow_seconds=9.5).breaker.slow_seconds, 9.5)
+
+    def test_open_breaker_and_short_deadline_skip_the_upstream(self):
+        self.server.script = [(500, 0)] * 2
+        client = self.client(retries=0, breaker=CircuitBreaker(min_calls=2, open_seconds=60))
+        for _ in range(2):
+            with self.assertRaises(LLMError):
+                client.chat([{"role": "user", "content": "hi"}])
+
+        with self.assertRaises(CircuitOpenError):
+            client.chat([{"role": "user", "content": "hi"}])
+        with self.assertRaises(DeadlineError):
+            client.chat([{"role": "user", "content": "hi"}], deadline=time.monotonic() + 0.5)
+        self.assertEqual(len(self.server.requests), 2)
+        stats = client.stats()
+        self.assertEqual((stats["breaker"]["state"], stats["breaker"]["rejected"]), ("open", 1))
+        self.assertEqual(stats["skipped_for_deadline"], 1)
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def test_opens_on_errors_and_closes_after_a_good_probe(self):
+        breaker = CircuitBreaker(min_calls=4, error_rate=0.5, open_seconds=0.05)
+        for failed in (False, True, False, True):
+            self.assertTrue(breaker.allow())
+            breaker.record(failed, 0.1)
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        probe = breaker.allow()
+        self.assertTrue(probe)
+        self.assertFalse(breaker.allow())  # everyone else waits for it
+        breaker.record(False, 0.1, probe)
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+    def test_slow_calls_open_it_and_a_slow_probe_reopens_it(self):
+        breaker = CircuitBreaker(min_calls=3, slow_seconds=1.0, slow_rate=0.6, open_seconds=0.05)
+        for seconds in (2.0, 0.1, 2.0):
+            breaker.record(False, seconds)
+        self.assertEqual(breaker.state, "open")
+
+        time.sleep(0.06)
+        breaker.record(False, 2.0, breaker.allow())
+        self.assertEqual((breaker.state, breaker.stats()["opened"]), ("open", 2))
+
+    def test_only_the_probe_decides_while_half_open(self):
+        breaker = CircuitBreaker(min_calls=2, error_rate=0.5, open_seconds=0.05)
+        early = [breaker.allow() for _ in range(3)]
+        breaker.record(True, 0.1, early[0])
+        breaker.record(True, 0.1, early[1])
+        self.assertEqual(breaker.state, "open")
+
+        time.sleep(0.06)
+        probe = breaker.allow()
+        # a call admitted while the breaker was closed reports late
+        breaker.record(True, 0.1, early[2])
+        breaker.record(False, 0.1)
+        self.assertEqual(breaker.state, "half_open")
+        breaker.record(False, 0.1, probe)
+        self.assertEqual((breaker.state, breaker.stats()["opened"]), ("closed", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from backend.data_version import DataVersion
+from backend.match_facts import MatchFactsService
+from backend.migrations import apply_migrations
+from backend.schema import create_schema
+
+
+class MatchFactsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.sqlite3")
+        conn = sqlite3.connect(self.db_path)
+        create_schema(conn)
+        conn.executemany("INSERT INTO teams (id, name) VALUES (?, ?)",
+                         [(1, "Barcelona"), (2, "Real Madrid"), (3, "Sevilla")])
+        conn.execute("INSERT INTO tournaments (id, name, season) VALUES (1, 'La Liga', '2023-24')")
+        conn.execute("INSERT INTO players (id, name, team_id) VALUES (1, 'Lewandowski', 1)")
+        conn.commit()
+        conn.close()
+        apply_migrations(self.db_path)
+
+        self.writer = sqlite3.connect(self.db_path)
+        self.reader = sqlite3.connect(self.db_path)
+        self.reader.row_factory = sqlite3.Row
+        self.version = DataVersion(self.db_path)
+        self.queries = []
+        self.reader.set_trace_callback(self.queries.append)
+        self.service = MatchFactsService(lambda: self.reader, self.version)
+
+    def tearDown(self):
+        self.version.close()
+        self.reader.close()
+        self.writer.close()
+        self.tmpdir.cleanup()
+
+    def add_match(self, match_id, home, away, date):
+        self.writer.execute(
+            "INSERT INTO matches (id, home_team_id, away_team_id, home_score, away_score, "
+            "match_date, stadium, tournament_id) VALUES (?, ?, ?, 2, 1, ?, 'Camp Nou', 1)",
+            (match_id, home, away, date))
+        self.writer.commit()
+
+    def test_latest_match_with_scorers(self):
+        self.add_match(1, 1, 2, "2024-01-01")
+        self.add_match(2, 2, 1, "2024-03-01")
+        self.writer.executemany("INSERT INTO scorers (match_id, player_id, minute) VALUES (?, 1, ?)",
+                                [(2, 70), (2, 12), (1, 5)])
+        self.writer.commit()
+
+        facts = self.service.latest((1, 2))
+        self.assertEqual(facts["match_id"], 2)
+        self.assertEqual(facts["home_team"], "Real Madrid")
+        self.assertEqual(facts["tournament"], "La Liga")
+        self.assertEqual([s["minute"] for s in facts["scorers"]], [12, 70])
+        self.assertIsNone(self.service.latest((1, 3)))
+
+    def test_repeat_lookups_run_no_query(self):
+        self.add_match(1, 1, 2, "2024-01-01")
+        self.service.latest((1, 2))
+        self.queries.clear()
+        for _ in range(5):
+            self.service.latest((1, 2))
+        self.assertEqual(self.queries, [])
+        self.assertEqual(self.service.stats()["hits"], 5)
+
+    def test_reloads_only_when_the_pair_changes(self):
+        self.add_match(1, 1, 2, "2024-01-01")
+        self.service.latest((1, 2))
+
+        # another pair's match only costs a version check
+        self.add_match(2, 1, 3, "2024-02-01")
+        self.assertEqual(self.service.latest((1, 2))["match_id"], 1)
+        self.assertEqual(self.service.stats()["revalidations"], 1)
+
+        self.add_match(3, 2, 1, "2024-03-01")
+        self.assertEqual(self.service.latest((1, 2))["match_id"], 3)
+        self.assertEqual(self.service.stats()["misses"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
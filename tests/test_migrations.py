@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from backend.migrations import (LATEST_VERSION, apply_migrations, check_query_plans, pending_versions,
+                                schema_version)
+from backend.schema import create_schema
+
+
+class MigrationsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.sqlite3")
+        conn = sqlite3.connect(self.db_path)
+        create_schema(conn)
+        conn.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_unmigrated_database_scans(self):
+        self.assertEqual(schema_version(self.connect()), 0)
+        self.assertTrue(check_query_plans(self.connect()))
+
+    def test_migrations_are_idempotent_and_versioned(self):
+        self.assertEqual(apply_migrations(self.db_path), list(range(1, LATEST_VERSION + 1)))
+        self.assertEqual(apply_migrations(self.db_path), [])
+        conn = self.connect()
+        self.assertEqual(schema_version(conn), LATEST_VERSION)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], LATEST_VERSION)
+
+    def test_skipped_steps_leave_the_migration_pending(self):
+        conn = self.connect()
+        conn.execute("DROP TABLE team_standings")
+        conn.commit()
+        applied = apply_migrations(self.db_path)
+        self.assertNotIn(1, applied)
+        self.assertEqual(pending_versions(conn), [1, 2, 8])
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], 0)
+
+        create_schema(conn)
+        self.assertEqual(apply_migrations(self.db_path), [1, 2, 8])
+        self.assertEqual(pending_versions(conn), [])
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], LATEST_VERSION)
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("idx_standings_tournament", indexes)
+
+    def test_hot_queries_use_indexes(self):
+        apply_migrations(self.db_path)
+        problems = check_query_plans(self.connect())
+        self.assertEqual(problems, [], f"hot queries fall back to table scans: {problems}")
+
+    def test_pair_key_is_orientation_free(self):
+        apply_migrations(self.db_path)
+        conn = self.connect()
+        conn.executemany(
+            "INSERT INTO matches (home_team_id, away_team_id, match_date) VALUES (?, ?, ?)",
+            [(1, 2, "2024-01-01"), (2, 1, "2024-02-01"), (1, 3, "2024-03-01")],
+        )
+        rows = conn.execute(
+            "SELECT match_date FROM matches WHERE pair_lo = ? AND pair_hi = ? ORDER BY match_date DESC",
+            (1, 2),
+        ).fetchall()
+        self.assertEqual([r[0] for r in rows], ["2024-02-01", "2024-01-01"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from backend import precompute
+from backend.data_version import DataVersion
+from backend.migrations import apply_migrations
+from backend.schema import create_schema
+
+
+class PrecomputeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.sqlite3")
+        conn = sqlite3.connect(self.db_path)
+        create_schema(conn)
+        conn.executemany("INSERT INTO teams (id, name) VALUES (?, ?)", [(1, "Alpha FC"), (2, "Beta United")])
+        conn.execute("INSERT INTO tournaments (id, name, season) VALUES (1, 'City Cup', '2024/2025')")
+        conn.execute("INSERT INTO players (id, name, team_id, position) VALUES (1, 'Rodriguez', 1, 'Forward')")
+        conn.execute("INSERT INTO matches (home_team_id, away_team_id, home_score, away_score, tournament_id, "
+                     "match_date) VALUES (1, 2, 2, 1, 1, '2024-11-01')")
+        conn.commit()
+        conn.close()
+        apply_migrations(self.db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        self.answers_path = precompute.default_answers_path(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def write_answers(self, answers, token):
+        out = sqlite3.connect(self.answers_path)
+        out.executescript(precompute.SCHEMA)
+        out.executemany("INSERT INTO answers (key, answer) VALUES (?, ?)", answers.items())
+        out.executemany("INSERT INTO build_info (name, value) VALUES (?, ?)",
+                        [("data_token", token), ("keys", str(len(answers)))])
+        out.commit()
+        out.close()
+
+    def test_answers_are_used_only_while_the_data_matches(self):
+        key = precompute.answer_key("score", (2, 1))
+        self.write_answers({key: "Alpha FC 2-1 Beta United"}, precompute.data_token(self.conn))
+        version = DataVersion(self.db_path)
+        answers = precompute.PrecomputedAnswers(self.answers_path, lambda: self.conn, version)
+
+        self.assertEqual(answers.get(key), "Alpha FC 2-1 Beta United")
+        self.assertIsNone(answers.get(precompute.answer_key("score", (1, 2))))
+
+        writer = sqlite3.connect(self.db_path)
+        writer.execute("UPDATE players SET position = 'Winger' WHERE id = 1")
+        writer.commit()
+        writer.close()
+        self.assertIsNone(answers.get(key))
+        self.assertEqual(answers.stats()["valid"], False)
+        answers.pool.close_all()
+        version.close()
+
+    def test_serving_never_hashes_the_tables(self):
+        key = precompute.answer_key("score", (2, 1))
+        self.write_answers({key: "Alpha FC 2-1 Beta United"}, precompute.data_token(self.conn))
+        version = DataVersion(self.db_path)
+        answers = precompute.PrecomputedAnswers(self.answers_path, lambda: self.conn, version)
+
+        def full_hash(conn):
+            raise AssertionError("data_fingerprint called while serving")
+
+        original, precompute.data_fingerprint = precompute.data_fingerprint, full_hash
+        try:
+            self.assertEqual(answers.get(key), "Alpha FC 2-1 Beta United")
+            self.conn.execute("INSERT INTO tournaments (name, season) VALUES ('Cup', '2025')")
+            self.conn.commit()
+            self.assertIsNone(answers.get(key))
+        finally:
+            precompute.data_fingerprint = original
+            answers.pool.close_all()
+            version.close()
+
+    def test_plan_covers_both_orders_of_every_pair(self):
+        tasks = precompute.plan_tasks(self.conn)
+        keys = {precompute.answer_key(intent, ids, season) for intent, ids, _, season in tasks}
+
+        self.assertIn("score:1,2:", keys)
+        self.assertIn("head_to_head:2,1:", keys)
+        self.assertIn("head_to_head:1,2:2024/2025", keys)
+        self.assertIn("team_ranking:2:", keys)
+        self.assertIn("player_stats:1:", keys)
+
+    def test_build_writes_handler_answers(self):
+        info = precompute.build(self.db_path, workers=1)
+
+        out = sqlite3.connect(self.answers_path)
+        answers = dict(out.execute("SELECT key, answer FROM answers"))
+        out.close()
+        self.assertEqual(info["keys"], len(answers))
+        self.assertEqual(info["fingerprint"], precompute.data_fingerprint(self.conn))
+        self.assertEqual(info["data_token"], precompute.data_token(self.conn))
+        self.assertEqual(answers["score:2,1:"], "Alpha FC 2-1 Beta United (City Cup)")
+        self.assertIn("Beta United: 0 wins", answers["head_to_head:2,1:2024/2025"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,241 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from backend.data_version import DataVersion
+from backend.performance_optimization import (BoundedExecutor, QueueFullError, ResponseCache, SharedResponseCache,
+                                              SingleFlight, create_cache)
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def test_keys_use_normalized_text_intent_entities_and_version(self):
+        cache = ResponseCache(max_size=10, ttl_seconds=60)
+        cache.set("Who won Barcelona vs Real Madrid?", "2-1", "score", (("team", 1), ("team", 2)), 3)
+
+        self.assertEqual(cache.get("who won  barcelona vs real madrid", "score", (("team", 1), ("team", 2)), 3), "2-1")
+        self.assertIsNone(cache.get("Who won Barcelona vs Real Madrid?", "date", (("team", 1), ("team", 2)), 3))
+        self.assertIsNone(cache.get("Who won Barcelona vs Real Madrid?", "score", (("team", 1),), 3))
+        # a new data version makes the old answer unreachable
+        self.assertIsNone(cache.get("Who won Barcelona vs Real Madrid?", "score", (("team", 1), ("team", 2)), 4))
+
+    def test_evicts_least_recently_used(self):
+        cache = ResponseCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_expired_entries_are_dropped(self):
+        cache = ResponseCache(max_size=10, ttl_seconds=0.05)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("a"))
+
+        stats = cache.stats()
+        self.assertEqual((stats["size"], stats["expirations"]), (0, 1))
+        self.assertEqual(stats["memory_bytes"], 0)
+
+    def test_counters_and_memory_estimate(self):
+        cache = ResponseCache(max_size=10, ttl_seconds=60)
+        cache.set("a", "x" * 1000)
+        cache.set("a", "y" * 1000)  # replacing an entry does not double count it
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.stats()
+        self.assertEqual((stats["size"], stats["hits"], stats["misses"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertGreater(stats["memory_bytes"], 1000)
+        self.assertLess(stats["memory_bytes"], 2000)
+
+        cache.clear()
+        self.assertEqual(cache.stats()["memory_bytes"], 0)
+
+
+class SharedResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_entries_are_shared_between_instances(self):
+        writer = SharedResponseCache(self.path, max_size=10, ttl_seconds=60)
+        reader = SharedResponseCache(self.path, max_size=10, ttl_seconds=60)
+        writer.set("Score of Alpha FC vs Beta United?", "Alpha FC 2-1 Beta United", "score", (("team", 1),), "v1")
+
+        self.assertEqual(reader.get("score of alpha fc vs beta united", "score", (("team", 1),), "v1"),
+                         "Alpha FC 2-1 Beta United")
+        self.assertIsNone(reader.get("score of alpha fc vs beta united", "score", (("team", 1),), "v2"))
+        self.assertEqual((reader.stats()["hits"], reader.stats()["misses"]), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = SharedResponseCache(self.path, max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        time.sleep(0.01)
+        cache.set("b", 2)
+        time.sleep(0.01)
+        cache.set("c", 3)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual((cache.get("b"), cache.get("c")), (2, 3))
+        stats = cache.stats()
+        self.assertEqual((stats["size"], stats["evictions"], stats["backend"]), (2, 1, "sqlite"))
+
+    def test_entry_count_is_kept_without_counting(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript("CREATE TABLE response_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                           "expires_at REAL NOT NULL, last_used REAL NOT NULL, size INTEGER NOT NULL) WITHOUT ROWID;"
+                           "INSERT INTO response_cache VALUES ('old', '0', 1e12, 0, 5);")
+        cache = SharedResponseCache(self.path, max_size=3, ttl_seconds=60)
+        for value in range(3):
+            cache.set("a", value)  # replacing an entry does not grow the count
+        cache.set("b", 1)
+        self.assertEqual(cache.stats()["evictions"], 0)
+        cache.get("missing")
+        cache.set("c", 1)
+
+        entries = conn.execute("SELECT entries FROM response_cache_size").fetchone()[0]
+        self.assertEqual(entries, conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0])
+        self.assertEqual((entries, cache.stats()["evictions"]), (3, 1))
+        self.assertIsNone(cache.get("old"))
+        cache.clear()
+        self.assertEqual(conn.execute("SELECT entries FROM response_cache_size").fetchone()[0], 0)
+        conn.close()
+
+    def test_expired_entries_are_dropped(self):
+        cache = SharedResponseCache(self.path, max_size=10, ttl_seconds=0.05)
+        cache.set("a", {"response": "x"})
+        self.assertEqual(cache.get("a"), {"response": "x"})
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_per_entry_ttl_and_separate_tables(self):
+        llm = SharedResponseCache(self.path, max_size=10, ttl_seconds=60, table="llm_cache")
+        answers = SharedResponseCache(self.path, max_size=10, ttl_seconds=60)
+        llm.set("football history?", "Football began in England.", "model-a", version="system prompt")
+        llm.set("what time is it", "Noon.", "model-a", version="system prompt", ttl_seconds=0.05)
+        time.sleep(0.06)
+
+        # a new instance, as after a restart, still sees the reply
+        reopened = SharedResponseCache(self.path, max_size=10, ttl_seconds=60, table="llm_cache")
+        self.assertEqual(reopened.get("Football history", "model-a", version="system prompt"),
+                         "Football began in England.")
+        self.assertIsNone(reopened.get("Football history", "model-b", version="system prompt"))
+        self.assertIsNone(reopened.get("Football history", "model-a", version="another prompt"))
+        self.assertIsNone(reopened.get("what time is it", "model-a", version="system prompt"))
+        self.assertEqual(answers.stats()["size"], 0)
+
+    def test_backend_chosen_by_configuration(self):
+        self.assertIsInstance(create_cache(10, 60, backend="sqlite", path=self.path), SharedResponseCache)
+        self.assertNotIsInstance(create_cache(10, 60, backend="memory"), SharedResponseCache)
+
+
+class DataVersionTokenTestCase(unittest.TestCase):
+    def test_token_is_shared_and_changes_with_the_data(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "test.sqlite3")
+            conn = sqlite3.connect(db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE teams (id INTEGER PRIMARY KEY, name TEXT)")
+            conn.commit()
+            first, second = DataVersion(db_path), DataVersion(db_path)
+            before = first.token()
+            self.assertEqual(second.token(), before)
+
+            conn.execute("INSERT INTO teams (name) VALUES ('Alpha FC')")
+            conn.commit()
+            self.assertNotEqual(first.token(), before)
+            self.assertEqual(first.token(), second.token())
+            first.close()
+            second.close()
+            conn.close()
+
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def run_concurrently(self, flights, key, func, callers=8):
+        results = [None] * callers
+        errors = [None] * callers
+
+        def call(i):
+            try:
+                results[i] = flights.do(key, func)
+            except Exception as e:
+                errors[i] = e
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_calls_share_one_upstream_call(self):
+        flights = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return "reply"
+
+        results, errors = self.run_concurrently(flights, "football history", slow)
+        self.assertEqual(results, ["reply"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.stats(), {"upstream_calls": 1, "saved_calls": 7, "in_flight": 0})
+
+        # once finished, the next call goes upstream again
+        self.assertEqual(flights.do("football history", slow), "reply")
+        self.assertEqual(len(calls), 2)
+
+    def test_errors_reach_every_waiter(self):
+        flights = SingleFlight()
+
+        def failing():
+            time.sleep(0.1)
+            raise TimeoutError("upstream timed out")
+
+        results, errors = self.run_concurrently(flights, "key", failing, callers=4)
+        self.assertTrue(all(isinstance(e, TimeoutError) for e in errors))
+        self.assertEqual(flights.stats()["in_flight"], 0)
+
+
+class BoundedExecutorTestCase(unittest.TestCase):
+    def test_rejects_past_the_queue_limit(self):
+        executor = BoundedExecutor(workers=1, max_queue=1)
+        release = threading.Event()
+        started = threading.Event()
+        running = executor.submit(lambda: started.set() or release.wait())
+        started.wait(1)
+        queued = executor.submit(lambda: "queued")
+        with self.assertRaises(QueueFullError):
+            executor.submit(lambda: "rejected")
+
+        stats = executor.stats()
+        self.assertEqual((stats["running"], stats["queue_length"], stats["rejected"]), (1, 1, 1))
+        time.sleep(0.05)
+        release.set()
+        self.assertTrue(running.result(timeout=1))
+        self.assertEqual(queued.result(timeout=1), "queued")
+
+        # finished calls give their slots back
+        self.assertEqual(executor.submit(lambda: "again").result(timeout=1), "again")
+        stats = executor.stats()
+        self.assertEqual((stats["submitted"], stats["queue_length"], stats["running"]), (3, 0, 0))
+        self.assertGreaterEqual(stats["max_wait_ms"], 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
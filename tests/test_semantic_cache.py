@@ -0,0 +1,65 @@
+import time
+import unittest
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from backend.semantic_cache import SemanticCache
+
+TRAINING = [
+    "what was the score of the match", "who scored in the final", "tell me the score",
+    "which stadium hosted the game", "how many goals did he score", "who won the league",
+    "what is the history of the club", "tell me about the league history",
+]
+
+
+class SemanticCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.vectorizer = TfidfVectorizer(stop_words="english").fit(TRAINING)
+
+    def make_cache(self, **options):
+        return SemanticCache(self.vectorizer, threshold=0.85, **options)
+
+    def test_paraphrase_reuses_reply(self):
+        cache = self.make_cache()
+        cache.set("What is the history of football?", "Football began in England.")
+
+        reply, similarity = cache.get("football history")
+        self.assertEqual(reply, "Football began in England.")
+        self.assertGreaterEqual(similarity, 0.85)
+
+    def test_unknown_words_keep_prompts_apart(self):
+        cache = self.make_cache()
+        cache.set("Tell me about football history", "Football began in England.")
+
+        self.assertIsNone(cache.get("Tell me about basketball history"))
+        self.assertIsNone(cache.get("the"))  # nothing but stop words
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (0, 2))
+
+    def test_closest_entry_wins(self):
+        cache = self.make_cache()
+        cache.set("history of cricket", "cricket")
+        cache.set("history of rugby union", "rugby union")
+        cache.set("history of rugby league", "rugby league")
+
+        self.assertEqual(cache.get("rugby union history")[0], "rugby union")
+
+    def test_bounded_with_oldest_evicted(self):
+        cache = self.make_cache(max_entries=3)
+        for sport in ["cricket", "rugby", "hockey", "tennis", "golf", "polo", "judo", "sumo"]:
+            cache.set(f"{sport} history", sport)
+
+        self.assertIsNone(cache.get("cricket history"))
+        self.assertEqual(cache.get("sumo history")[0], "sumo")
+        self.assertEqual(cache.get("judo history")[0], "judo")
+        stats = cache.stats()
+        self.assertEqual((stats["size"], stats["evictions"]), (3, 5))
+
+    def test_expired_entries_are_ignored(self):
+        cache = self.make_cache(ttl_seconds=0.05)
+        cache.set("football history", "Football began in England.")
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("football history"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from backend.db_pool import ConnectionPool
+from backend.gazetteer import LiveGazetteer
+from backend.leaderboard import LiveLeaderboard
+from backend.migrations import apply_migrations
+from backend.schema import create_schema
+from backend.snapshot import SnapshotServer
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.sqlite3")
+        conn = sqlite3.connect(self.db_path)
+        create_schema(conn)
+        conn.executemany("INSERT INTO matches (home_team_id, away_team_id, home_score, away_score, tournament_id) "
+                         "VALUES (?, ?, ?, ?, 1)", [(1, 2, 2, 0), (2, 1, 1, 1), (2, 1, 3, 1), (1, 3, 0, 1)])
+        conn.executemany("INSERT INTO scorers (match_id, player_id, minute) VALUES (?, ?, 10)",
+                         [(1, 7), (1, 7), (2, 8), (3, 9), (3, 9), (3, 8)])
+        conn.commit()
+        conn.close()
+        apply_migrations(self.db_path)
+
+        self.pool = ConnectionPool(self.db_path, wal=False)
+        self.server = SnapshotServer(self.db_path, self.pool, interval=3600)
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.server.current.close()
+        self.server.source_version.close()
+        self.tmpdir.cleanup()
+
+    def count(self):
+        return self.pool.connection().execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def test_reads_come_from_memory_with_indexes(self):
+        conn = self.pool.connection()
+        self.assertEqual(conn.execute("PRAGMA database_list").fetchone()[2], "")
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM matches WHERE pair_lo = 1 AND pair_hi = 2").fetchall()
+        self.assertIn("idx_matches_pair_date", plan[0][-1])
+        self.assertEqual(self.count(), 4)
+
+    def test_swaps_in_a_new_snapshot_when_the_file_changes(self):
+        self.assertFalse(self.server.check())
+        generation = self.server.generation()
+
+        writer = sqlite3.connect(self.db_path)
+        writer.execute("INSERT INTO matches (home_team_id, away_team_id, home_score, away_score) VALUES (1, 2, 5, 0)")
+        writer.commit()
+        writer.close()
+
+        self.assertEqual(self.count(), 4)
+        self.assertTrue(self.server.check())
+        self.assertEqual(self.count(), 5)
+        self.assertGreater(self.server.generation(), generation)
+        self.assertEqual(self.server.stats()["swaps"], 1)
+
+    def test_gazetteer_and_leaderboard_read_the_snapshot(self):
+        writer = sqlite3.connect(self.db_path)
+        writer.execute("INSERT INTO teams (id, name) VALUES (1, 'Alpha FC')")
+        writer.execute("INSERT INTO players (id, name, team_id) VALUES (7, 'Rodriguez', 1)")
+        writer.commit()
+        self.server.check()
+        gazetteer = LiveGazetteer(self.db_path, version=self.server, connect=self.server.connect)
+        leaderboard = LiveLeaderboard(self.db_path, self.server, connect=self.server.connect)
+        self.assertEqual(leaderboard.get().top(1)[0]["name"], "Rodriguez")
+
+        writer.execute("UPDATE teams SET name = 'Omega FC' WHERE id = 1")
+        writer.execute("INSERT INTO scorers (match_id, player_id, minute) VALUES (4, 9, 80)")
+        writer.commit()
+        writer.close()
+        # the file changed, the snapshot being served did not
+        self.assertEqual(gazetteer.get().team_names("Alpha FC vs Omega FC"), ["Alpha FC"])
+        self.assertEqual(leaderboard.get().top(2)[1]["goals"], 2)
+
+        self.server.check()
+        self.assertEqual(gazetteer.get().team_names("Alpha FC vs Omega FC"), ["Omega FC"])
+        self.assertEqual([(r["player_id"], r["goals"]) for r in leaderboard.get().top(1)], [(9, 3)])
+
+if __name__ == "__main__":
+    unittest.main()